@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+CLI 流程回放性能回归测试
+
+按 benchmarks/cassettes/ 中录制的真实请求/响应回放 create_task.py、query_task.py
+和 list_tasks.py 的典型流程（不访问网络），断言：
+- 请求数与录制完全一致（多出的请求、未用到的录制都视为回归）
+- 客户端自身耗时（回放总耗时减去模拟的服务端耗时）不超过预算
+
+任一断言失败时以非零状态退出，可直接用于 CI。
+修改了请求行为（例如轮询策略）后，用 --record 对真实 API 重新录制。
+
+用法:
+    python benchmarks/bench_cassette_flows.py [--speed 0] [--repeat 5] [--budget-scale 1.0]
+    python benchmarks/bench_cassette_flows.py --record [--base-url URL]   # 需要 ARK_API_KEY
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import statistics
+import sys
+import time
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes")
+sys.path.insert(0, SCRIPTS_DIR)
+
+from seedance_client import SeedanceClient  # noqa: E402
+from cassette import Cassette, RecordingAdapter, ReplayAdapter, activate  # noqa: E402
+
+
+PROMPT = "一只橘猫在窗台上晒太阳，镜头缓慢推近"
+
+# (名称, 模块, 回放参数, 录制参数, 期望请求数, 客户端耗时预算秒)
+# 期望请求数为 None 时以录制的交互数为准（例如轮询次数取决于录制时任务的实际耗时）；
+# 回放时轮询间隔为 0，等待时间只来自录制的服务端耗时。
+FLOWS = [
+    (
+        "create",
+        "create_task",
+        ["--prompt", PROMPT, "--duration", "5", "--json"],
+        ["--prompt", PROMPT, "--duration", "5", "--json"],
+        1,
+        0.05,
+    ),
+    (
+        "watch",
+        "query_task",
+        ["--watch", "{task_id}", "--poll-interval", "0", "--json"],
+        ["--watch", "{task_id}", "--poll-interval", "5", "--json"],
+        None,
+        0.1,
+    ),
+    (
+        "query",
+        "query_task",
+        ["{task_id}", "--json"],
+        ["{task_id}", "--json"],
+        1,
+        0.05,
+    ),
+    (
+        "list",
+        "list_tasks",
+        ["--page-size", "20", "--json"],
+        ["--page-size", "20", "--json"],
+        1,
+        0.05,
+    ),
+]
+
+
+def cassette_path(name: str) -> str:
+    return os.path.join(CASSETTE_DIR, f"{name}.jsonl")
+
+
+def recorded_task_id() -> str:
+    """create 流程录制中创建的任务 ID，watch/query 流程查询该任务"""
+    for interaction in Cassette.load(cassette_path("create")).interactions:
+        if interaction["request"]["method"] == "POST":
+            return interaction["response"]["body"]["json"]["id"]
+    raise RuntimeError("create cassette has no POST request")
+
+
+def run_cli(module_name: str, argv) -> None:
+    """在当前进程中运行 CLI 的 main()，丢弃输出；非零退出时抛出 RuntimeError"""
+    module = importlib.import_module(module_name)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    old_argv = sys.argv
+    sys.argv = [f"{module_name}.py", *argv]
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            module.main()
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError(f"{module_name} exited with {e.code}: {stderr.getvalue().strip()}")
+    finally:
+        sys.argv = old_argv
+
+
+def record(base_url: str):
+    SeedanceClient.DEFAULT_BASE_URL = base_url
+    task_id = None
+    for name, module, _, argv, _, _ in FLOWS:
+        if task_id is None and any("{task_id}" in arg for arg in argv):
+            task_id = recorded_task_id()
+        argv = [arg.replace("{task_id}", task_id or "") for arg in argv]
+        adapter = RecordingAdapter(path=cassette_path(name))
+        start = time.perf_counter()
+        with activate(adapter):
+            run_cli(module, argv)
+        print(f"{name:<8} recorded {len(adapter.cassette.interactions)} requests "
+              f"in {time.perf_counter() - start:.1f}s -> {cassette_path(name)}")
+
+
+def replay(speed: float, repeat: int, budget_scale: float) -> bool:
+    os.environ.setdefault("ARK_API_KEY", "replay")
+    task_id = recorded_task_id()
+    ok = True
+    print(f"Replay at {'no delay' if speed == 0 else f'{speed:g}x'}, median of {repeat} runs")
+    print(f"{'flow':<8} {'requests':>8} {'expected':>8} {'server ms':>10} {'total ms':>9} "
+          f"{'client ms':>10} {'budget ms':>10}  result")
+    for name, module, argv, _, expected, budget in FLOWS:
+        cassette = Cassette.load(cassette_path(name))
+        argv = [arg.replace("{task_id}", task_id) for arg in argv]
+        expected = len(cassette.interactions) if expected is None else expected
+        server = cassette.server_seconds / speed if speed > 0 else 0.0
+
+        # 首次运行包含模块导入，不计入
+        with activate(ReplayAdapter(cassette, speed=0)):
+            run_cli(module, argv)
+
+        totals, reports = [], []
+        for _ in range(repeat):
+            adapter = ReplayAdapter(cassette, speed=speed)
+            start = time.perf_counter()
+            with activate(adapter):
+                run_cli(module, argv)
+            totals.append(time.perf_counter() - start)
+            reports.append(adapter.report())
+
+        total = statistics.median(totals)
+        client = max(total - server, 0.0)
+        problems = []
+        for report in reports:
+            if report["requests"] != expected or report["extra"] or report["unused"]:
+                problems.append(f"requests {report['requests']} (extra {report['extra']}, unused {report['unused']})")
+                break
+        if client > budget * budget_scale:
+            problems.append("over budget")
+        ok = ok and not problems
+        print(f"{name:<8} {reports[0]['requests']:>8} {expected:>8} {server * 1000:>10.1f} {total * 1000:>9.1f} "
+              f"{client * 1000:>10.1f} {budget * budget_scale * 1000:>10.1f}  {'; '.join(problems) or 'ok'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded CLI flows and check request counts and timing budgets")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed: 1 = recorded latency, 0 = no delay")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply client time budgets (slow CI hosts)")
+    parser.add_argument("--record", action="store_true", help="Re-record cassettes against the API")
+    parser.add_argument("--base-url", type=str, default=SeedanceClient.DEFAULT_BASE_URL)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.base_url)
+        return
+    if not replay(args.speed, args.repeat, args.budget_scale):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+租户公平排队基准
+
+启动一个本地模拟 API（任务固定耗时后成功）。批量租户在开始时一次提交
+--bulk 个任务，交互租户每 --interactive-interval 秒提交一个任务，
+对比共用一个先进先出队列与 FairQueue 按租户公平排队时：
+- 交互任务的等待提交时间（p50/p95/最大值）
+- 批量作业的完成时间和全部任务完成前的额度利用率（公平排队不应让额度空闲）
+
+用法:
+    python benchmarks/bench_fair_queue.py [--bulk 200] [--concurrency 8] [--task-seconds 0.5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from seedance_client import SeedanceClient  # noqa: E402
+from fair_queue import FairQueue, TenantConfig  # noqa: E402
+
+
+PAYLOAD = {"model": "doubao-seedance-1-5-pro-251215", "content": [{"type": "text", "text": "bench"}]}
+
+
+def start_mock_api(task_seconds: float):
+    """模拟 API：任务创建后 task_seconds 秒成功"""
+    tasks = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                task_id = f"cgt-{len(tasks)}"
+                tasks[task_id] = time.time()
+            self._send({"id": task_id})
+
+        def do_GET(self):
+            task_id = self.path.rsplit("/", 1)[-1]
+            done = time.time() - tasks[task_id] >= task_seconds
+            self._send({"id": task_id, "model": PAYLOAD["model"], "status": "succeeded" if done else "running"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(base_url: str, fair: bool, args) -> dict:
+    client = SeedanceClient(api_key="bench", base_url=base_url)
+    # 先进先出：所有请求进入同一个租户队列
+    tenant = (lambda name: name) if fair else (lambda name: "shared")
+    tenants = {"interactive": TenantConfig(weight=1, burst=2), "bulk": TenantConfig(weight=1, burst=0)}
+    queue = FairQueue(client, args.concurrency, tenants=tenants if fair else None, poll_interval=0.05)
+    start = time.monotonic()
+    bulk = [queue.submit(tenant("bulk"), PAYLOAD) for _ in range(args.bulk)]
+    interactive = []
+    while any(not job.done.done() for job in bulk):
+        interactive.append(queue.submit(tenant("interactive"), PAYLOAD))
+        time.sleep(args.interactive_interval)
+    queue.wait_idle()
+    queue.close()
+    client.close()
+
+    jobs = bulk + interactive
+    elapsed = max(job.finished_at for job in jobs) - start
+    waits = sorted(job.submitted_at - job.queued_at for job in interactive)
+    return {
+        "p50": statistics.median(waits),
+        "p95": waits[min(len(waits) - 1, int(0.95 * len(waits)))],
+        "max": waits[-1],
+        "interactive": len(interactive),
+        "bulk_seconds": max(job.finished_at for job in bulk) - start,
+        # 任务实际运行的槽位时间占全部槽位时间的比例（轮询间隔和创建延迟使其略低于 100%）
+        "utilization": len(jobs) * args.task_seconds / (args.concurrency * elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FairQueue tenant isolation benchmark")
+    parser.add_argument("--bulk", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--task-seconds", type=float, default=0.5)
+    parser.add_argument("--interactive-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = start_mock_api(args.task_seconds)
+    base_url = f"http://127.0.0.1:{server.server_port}/api/v3"
+
+    print(f"{args.bulk} bulk jobs at once + 1 interactive job every {args.interactive_interval:g}s, "
+          f"{args.concurrency} slots, {args.task_seconds:g}s per task")
+    print(f"{'queue':<6} {'wait p50':>9} {'wait p95':>9} {'wait max':>9} {'bulk s':>8} {'slots used':>10}")
+    for name, fair in (("fifo", False), ("fair", True)):
+        row = run(base_url, fair, args)
+        print(f"{name:<6} {row['p50']:>9.3f} {row['p95']:>9.3f} {row['max']:>9.3f} "
+              f"{row['bulk_seconds']:>8.2f} {row['utilization']:>10.0%}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
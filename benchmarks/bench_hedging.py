@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+对冲请求与熔断基准
+
+启动一个本地模拟 API：查询任务通常 20ms 左右返回，但有少量请求卡顿数秒。
+对比不启用 / 启用对冲时 get_task 的 p50/p99/最大延迟；
+随后模拟服务故障（全部返回 503），统计多个轮询方在故障期间实际发出的请求数。
+
+用法:
+    python benchmarks/bench_hedging.py [--requests 400] [--stall-rate 0.03] [--stall 2.0]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from seedance_client import SeedanceClient, SeedanceError, TransportConfig  # noqa: E402
+from resilience import ResilienceConfig  # noqa: E402
+
+
+def serve_mock_api(port, outage, requests, stall_rate: float, stall: float):
+    """模拟 API（独立进程，避免与客户端争用 GIL）；outage 为 1 时所有请求返回 503"""
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                stalled = rng.random() < stall_rate
+                jitter = rng.uniform(0.01, 0.03)
+            with requests.get_lock():
+                requests.value += 1
+            if outage.value:
+                code, body = 503, {"error": {"message": "unavailable"}}
+            else:
+                time.sleep(stall if stalled else jitter)
+                code, body = 200, {"id": self.path.rsplit("/", 1)[-1], "status": "running", "model": "m"}
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port.value = server.server_port
+    server.serve_forever()
+
+
+def start_mock_api(stall_rate: float, stall: float):
+    """启动模拟 API 进程，返回 (进程, 端口, outage 开关, 请求计数)"""
+    port = multiprocessing.Value("i", 0)
+    outage = multiprocessing.Value("i", 0)
+    requests = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(
+        target=serve_mock_api, args=(port, outage, requests, stall_rate, stall), daemon=True
+    )
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+    return process, port.value, outage, requests
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(client: SeedanceClient, requests: int, concurrency: int):
+    def timed(i):
+        start = time.perf_counter()
+        client.get_task(f"cgt-{i}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(timed, range(requests)))
+
+
+def run_outage(client: SeedanceClient, outage, requests, pollers: int, seconds: float) -> int:
+    """pollers 个轮询方每 0.1s 查询一次，持续 seconds 秒，返回服务端收到的请求数"""
+    outage.value = 1
+    before = requests.value
+    deadline = time.time() + seconds
+
+    def poll(i):
+        while time.time() < deadline:
+            try:
+                client.get_task(f"cgt-{i}")
+            except SeedanceError:
+                pass
+            time.sleep(0.1)
+
+    with ThreadPoolExecutor(max_workers=pollers) as executor:
+        list(executor.map(poll, range(pollers)))
+    outage.value = 0
+    return requests.value - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedging and circuit breaker benchmark")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stall-rate", type=float, default=0.03)
+    parser.add_argument("--stall", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server, port, outage, requests = start_mock_api(args.stall_rate, args.stall)
+    base_url = f"http://127.0.0.1:{port}/api/v3"
+    transport = TransportConfig(max_concurrency=args.concurrency)
+
+    print(f"{args.requests} get_task calls, {args.stall_rate:.0%} stall for {args.stall}s")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'hedges':>7} {'wins':>5}")
+    for name, resilience in (("plain", None), ("hedged", ResilienceConfig(breaker=False))):
+        client = SeedanceClient(api_key="bench", base_url=base_url, transport=transport, resilience=resilience)
+        # 预热：让对冲延迟基于实际 p95
+        measure(client, 50, args.concurrency)
+        latencies = measure(client, args.requests, args.concurrency)
+        stats = client.resilience_stats().get("get_task", {})
+        print(
+            f"{name:<10} {percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} "
+            f"{max(latencies) * 1000:>8.1f} {stats.get('hedges', 0):>7} {stats.get('hedge_wins', 0):>5}"
+        )
+        client.close()
+
+    print("\nOutage: 16 pollers every 0.1s for 3s, all requests return 503")
+    for name, resilience in (
+        ("no breaker", None),
+        ("breaker", ResilienceConfig(hedge=False, breaker_failures=5, breaker_cooldown=1.0)),
+    ):
+        client = SeedanceClient(api_key="bench", base_url=base_url, transport=transport, resilience=resilience)
+        sent = run_outage(client, outage, requests, pollers=16, seconds=3.0)
+        print(f"{name:<10} {sent:>6} requests reached the server")
+        client.close()
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+请求体压缩基准
+
+启动一个本地模拟 API（独立进程），按 --bandwidth 模拟受限的出口带宽：
+服务端收到请求体后按实际传输字节数等待相应时间再响应。对比不压缩、gzip、zstd
+（需要 Python 3.14+ 或 zstandard）时创建任务的传输字节数和端到端延迟，
+以及服务端拒绝 Content-Encoding 时自动回退的开销。
+
+默认载荷为 4 张内联图片：随机字节（接近 JPEG 等已压缩格式，最坏情况）和
+平滑渐变的未压缩位图各一组；也可以用 --image 指定真实图片。
+
+用法:
+    python benchmarks/bench_request_compression.py [--bandwidth 2] [--repeat 5] [--image a.jpg --image b.png]
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import mimetypes
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from seedance_client import SeedanceClient  # noqa: E402
+from request_compression import CompressionConfig, _zstd, zstandard  # noqa: E402
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if _zstd is not None:
+        return _zstd.decompress(body)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+
+def serve_mock_api(port, reject, wire_bytes, bandwidth: float):
+    """模拟 API；reject 为 1 时对带 Content-Encoding 的请求返回 415"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, code, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with wire_bytes.get_lock():
+                wire_bytes.value += len(body)
+            # 按实际传输字节数模拟受限链路
+            time.sleep(len(body) / (bandwidth * 1024 * 1024))
+            encoding = self.headers.get("Content-Encoding")
+            if encoding and reject.value:
+                return self._reply(415, {"error": {"code": "UnsupportedMediaType",
+                                                   "message": "Content-Encoding is not supported"}})
+            if encoding:
+                body = decompress(body, encoding)
+            payload = json.loads(body)
+            if not payload.get("content"):
+                return self._reply(400, {"error": {"message": "content is required"}})
+            self._reply(200, {"id": "cgt-20250101000000-bench"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port.value = server.server_port
+    server.serve_forever()
+
+
+def start_mock_api(bandwidth: float):
+    port = multiprocessing.Value("i", 0)
+    reject = multiprocessing.Value("i", 0)
+    wire_bytes = multiprocessing.Value("q", 0)
+    process = multiprocessing.Process(target=serve_mock_api, args=(port, reject, wire_bytes, bandwidth), daemon=True)
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+    return process, port.value, reject, wire_bytes
+
+
+def synthetic_images(size: int):
+    """两张随机字节的 "JPEG"（已压缩数据）和两张渐变 BMP（未压缩位图）的 data URL"""
+    rng = random.Random(0)
+    images = [("image/jpeg", bytes(rng.getrandbits(8) for _ in range(size))) for _ in range(2)]
+    width = 1024
+    height = max(size // (width * 3), 1)
+    pixels = bytes((x // 4 + y) % 256 for y in range(height) for x in range(width * 3))
+    header = (b"BM" + (54 + len(pixels)).to_bytes(4, "little") + b"\0\0\0\0" + (54).to_bytes(4, "little")
+              + (40).to_bytes(4, "little") + width.to_bytes(4, "little") + height.to_bytes(4, "little")
+              + (1).to_bytes(2, "little") + (24).to_bytes(2, "little") + b"\0" * 24)
+    images += [("image/bmp", header + pixels)] * 2
+    return [f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}" for mime, data in images]
+
+
+def file_images(paths):
+    urls = []
+    for path in paths:
+        mime = mimetypes.guess_type(path)[0] or "image/jpeg"
+        with open(path, "rb") as f:
+            urls.append(f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}")
+    return urls
+
+
+def build_payload(image_urls):
+    content = [{"type": "text", "text": "一只橘猫在窗台上晒太阳，镜头缓慢推近"}]
+    content += [{"type": "image_url", "image_url": {"url": url}, "role": "reference_image"} for url in image_urls]
+    return {"model": "doubao-seedance-1-0-lite-i2v-250428", "content": content, "resolution": "720p"}
+
+
+def run(base_url, payload, compression, repeat, wire_bytes):
+    """返回 (每次请求的传输字节数, 创建延迟列表, 回退次数)"""
+    latencies = []
+    fallbacks = 0
+    start_bytes = wire_bytes.value
+    for _ in range(repeat):
+        # 每次使用新客户端：压缩回退状态不跨次保留，与单次 CLI 调用一致
+        client = SeedanceClient(api_key="bench", base_url=base_url, compression=compression)
+        start = time.perf_counter()
+        client.create_task(payload)
+        latencies.append(time.perf_counter() - start)
+        fallbacks += client.compression_info()["fallbacks"]
+        client.close()
+    return (wire_bytes.value - start_bytes) / repeat, latencies, fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request body compression for inline-image payloads")
+    parser.add_argument("--bandwidth", type=float, default=2.0, help="Simulated egress bandwidth in MB/s (default: 2)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--image-size", type=int, default=2 * 1024 * 1024, help="Bytes per synthetic image")
+    parser.add_argument("--image", action="append", help="Use these image files instead of synthetic ones")
+    args = parser.parse_args()
+
+    os.environ.pop("SEEDANCE_REQUEST_COMPRESSION", None)
+    process, port, reject, wire_bytes = start_mock_api(args.bandwidth)
+    base_url = f"http://127.0.0.1:{port}/api/v3"
+    payload = build_payload(file_images(args.image) if args.image else synthetic_images(args.image_size))
+    raw = len(json.dumps(payload).encode())
+
+    modes = [("none", None, False), ("gzip", CompressionConfig("gzip"), False)]
+    if _zstd is not None or zstandard is not None:
+        modes.append(("zstd", CompressionConfig("zstd"), False))
+    else:
+        print("zstd skipped (requires Python 3.14+ or: pip install zstandard)")
+    modes.append(("gzip, 415", CompressionConfig("gzip"), True))
+
+    print(f"Payload {raw / 1024 / 1024:.1f} MB JSON, simulated link {args.bandwidth:g} MB/s, "
+          f"median of {args.repeat} creates")
+    print(f"{'mode':<10} {'wire MB':>8} {'ratio':>6} {'p50 ms':>8} {'max ms':>8} {'fallbacks':>9}")
+    try:
+        for name, compression, rejecting in modes:
+            reject.value = int(rejecting)
+            wire, latencies, fallbacks = run(base_url, payload, compression, args.repeat, wire_bytes)
+            print(f"{name:<10} {wire / 1024 / 1024:>8.2f} {wire / raw:>6.2f} "
+                  f"{statistics.median(latencies) * 1000:>8.0f} {max(latencies) * 1000:>8.0f} {fallbacks:>9}")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+视频流写入 sink 的基准
+
+启动一个本地模拟 CDN（独立进程，按 --download-rate 限速输出一个视频），
+把视频流式写入 S3 分段上传的本地替身（每个分段按 --upload-rate 模拟上传耗时），
+对比同步写入（缓冲区为 0）与不同后台缓冲区大小：
+- 端到端耗时：有缓冲时下载与上传重叠
+- 内存峰值（tracemalloc）：不超过缓冲区加一个分段，与视频大小无关
+- 反压：缓冲区已满时下载线程等待的时间
+并校验对象内容与源一致、本地除对象存储替身外没有写入任何文件。
+
+用法:
+    python benchmarks/bench_sinks.py [--size-mb 64] [--download-rate 40] [--upload-rate 30]
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import requests  # noqa: E402
+from downloader import download_to_sinks  # noqa: E402
+from sinks import LocalMultipartClient, S3Sink  # noqa: E402
+
+
+CHUNK = 256 * 1024
+
+
+def video_bytes(size: int) -> bytes:
+    """确定性的伪视频数据"""
+    block = hashlib.sha256(b"seedance").digest() * (CHUNK // 32)
+    return (block * (size // CHUNK + 1))[:size]
+
+
+def serve_cdn(port, size: int, rate: float):
+    data = video_bytes(size)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            for offset in range(0, len(data), CHUNK):
+                self.wfile.write(data[offset:offset + CHUNK])
+                time.sleep(CHUNK / (rate * 1024 * 1024))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port.value = server.server_port
+    server.serve_forever()
+
+
+def run(url: str, root: str, part_size: int, upload_delay: float, buffer_bytes: int):
+    client = LocalMultipartClient(root, upload_delay=upload_delay)
+    key = f"video-{buffer_bytes}.mp4"
+    sink = S3Sink("bucket", key, client=client, part_size=part_size)
+    session = requests.Session()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = download_to_sinks(url, [sink], session=session, hash_algorithm="sha256", buffer_bytes=buffer_bytes)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    session.close()
+    with open(os.path.join(root, "bucket", key), "rb") as f:
+        stored = hashlib.sha256(f.read()).hexdigest()
+    return elapsed, peak, result.sinks[0].get("stall_seconds", 0.0), stored == result.digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming videos into an S3 multipart sink")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--download-rate", type=float, default=40.0, help="Simulated CDN MB/s (default: 40)")
+    parser.add_argument("--upload-rate", type=float, default=30.0, help="Simulated object store MB/s (default: 30)")
+    parser.add_argument("--part-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    part_size = args.part_mb * 1024 * 1024
+    upload_delay = args.part_mb / args.upload_rate
+
+    port = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=serve_cdn, args=(port, size, args.download_rate), daemon=True)
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+    url = f"http://127.0.0.1:{port.value}/video.mp4"
+
+    print(f"{args.size_mb} MB video, CDN {args.download_rate:g} MB/s, object store {args.upload_rate:g} MB/s, "
+          f"{args.part_mb} MB parts")
+    print(f"{'buffer':>8} {'seconds':>8} {'peak MB':>8} {'stall s':>8}  content")
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            for buffer_mb in (0, 4, 16, 64):
+                elapsed, peak, stall, ok = run(url, root, part_size, upload_delay, buffer_mb * 1024 * 1024)
+                label = "sync" if buffer_mb == 0 else f"{buffer_mb} MB"
+                print(f"{label:>8} {elapsed:>8.2f} {peak / 1024 / 1024:>8.1f} {stall:>8.2f}  "
+                      f"{'ok' if ok else 'MISMATCH'}")
+            leftovers = [name for name in os.listdir(root) if name not in ("bucket", ".uploads")]
+            if leftovers or os.listdir(os.path.join(root, ".uploads")):
+                print(f"Unexpected local files: {leftovers}")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+TaskInfo 内存与解析性能基准
+
+对比旧版 @dataclass 实现与当前 __slots__ 实现在大量任务（默认 10 万条）下的
+解析耗时和内存占用，并对比标准库 json 与 orjson（如已安装）的解码耗时。
+
+用法:
+    python benchmarks/bench_task_info.py [--count 100000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from seedance_client import TaskInfo, TaskStatus, orjson  # noqa: E402
+
+
+@dataclass
+class LegacyTaskInfo:
+    """旧版 TaskInfo 实现（仅用于对比）"""
+    id: str
+    status: TaskStatus
+    model: str
+    created_at: str
+    video_url: Optional[str] = None
+    last_frame_url: Optional[str] = None
+    resolution: Optional[str] = None
+    ratio: Optional[str] = None
+    duration: Optional[int] = None
+    error_message: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LegacyTaskInfo":
+        try:
+            status = TaskStatus(data.get("status", "queued"))
+        except ValueError:
+            status = TaskStatus.QUEUED
+
+        content = data.get("content", {})
+        usage = data.get("usage", {})
+
+        return cls(
+            id=data.get("id", ""),
+            status=status,
+            model=data.get("model", ""),
+            created_at=data.get("created_at", ""),
+            video_url=content.get("video_url"),
+            last_frame_url=content.get("last_frame_url"),
+            resolution=data.get("resolution"),
+            ratio=data.get("ratio"),
+            duration=data.get("duration"),
+            error_message=data.get("error_message"),
+            usage=usage
+        )
+
+
+MODELS = [
+    "doubao-seedance-1-5-pro-251215",
+    "doubao-seedance-1-0-pro-t2v",
+    "doubao-seedance-1-0-lite-i2v",
+]
+STATUSES = ["succeeded", "failed", "running", "queued"]
+
+
+def make_payload(count: int) -> bytes:
+    """生成模拟的列表接口响应"""
+    items = []
+    for i in range(count):
+        items.append({
+            "id": f"cgt-20250101{i:010d}",
+            "model": MODELS[i % len(MODELS)],
+            "status": STATUSES[i % len(STATUSES)],
+            "created_at": 1735689600 + i,
+            "updated_at": 1735689900 + i,
+            "content": {
+                "video_url": f"https://ark-content-generation.tos-cn-beijing.volces.com/{i}.mp4?X-Tos-Signature=abc",
+                "last_frame_url": f"https://ark-content-generation.tos-cn-beijing.volces.com/{i}.png",
+            },
+            "resolution": "720p",
+            "ratio": "16:9",
+            "duration": 5,
+            "usage": {"completion_tokens": 108900, "total_tokens": 108900},
+        })
+    return json.dumps({"items": items, "total": count}).encode("utf-8")
+
+
+def measure(label: str, cls, raw: bytes, loads):
+    """解码并构建对象，返回 (解码耗时, 构建耗时, 保留内存)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = loads(raw)["items"]
+    decoded = time.perf_counter()
+    tasks = [cls.from_dict(item) for item in items]
+    built = time.perf_counter()
+    del items
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<28} decode {decoded - start:7.3f}s  "
+        f"build {built - decoded:7.3f}s  "
+        f"retained {retained / 1024 / 1024:8.1f} MB  ({len(tasks)} tasks)"
+    )
+    del tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TaskInfo parsing and memory")
+    parser.add_argument("--count", type=int, default=100_000, help="Number of tasks (default: 100000)")
+    args = parser.parse_args()
+
+    raw = make_payload(args.count)
+    print(f"Payload: {len(raw) / 1024 / 1024:.1f} MB, {args.count} tasks\n")
+
+    measure("dataclass + json", LegacyTaskInfo, raw, json.loads)
+    measure("slots + json", TaskInfo, raw, json.loads)
+    if orjson is not None:
+        measure("slots + orjson", TaskInfo, raw, orjson.loads)
+    else:
+        print("(orjson not installed, skipping fast decoder run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+连接预热基准
+
+启动一个本地 HTTPS 模拟 API（自签名证书，需要 openssl 命令行），
+新连接在 TLS 握手前按 --rtt 模拟 2 个网络往返（TCP 握手和 TLS 1.3 握手）。
+模拟 create_task.py 的流程：创建客户端后
+编码 --images 张 --image-mb MB 的图片，再创建任务，对比：
+- cold：不预热，第一个请求时才建立连接
+- warmup：创建客户端时后台预热，握手与图片编码重叠
+并在同一客户端上并发建立新连接，对比完整握手与恢复 TLS 会话
+（TLS 1.3 下往返次数相同，省去的是证书传输和校验的开销）。
+
+用法:
+    python benchmarks/bench_warmup.py [--rtt 0.08] [--images 3] [--image-mb 4] [--runs 5]
+"""
+
+import argparse
+import base64
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from seedance_client import SeedanceClient, TransportConfig  # noqa: E402
+
+
+def make_certificate(directory: str):
+    """生成 localhost 的自签名证书"""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def start_mock_api(cert: str, key: str, rtt: float):
+    """模拟 API：新连接握手前延迟 2 个往返，POST 返回任务 ID"""
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            data = json.dumps({"id": "cgt-bench"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def finish_request(self, request, client_address):
+            # TCP 握手和 TLS 握手各 1 个往返
+            time.sleep(2 * rtt)
+            try:
+                request = context.wrap_socket(request, server_side=True)
+            except (ssl.SSLError, OSError):
+                return
+            super().finish_request(request, client_address)
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def prepare_payload(images: int, image_bytes: int) -> dict:
+    """模拟 create_task.py 读取并编码图片"""
+    content = [{"type": "text", "text": "bench"}]
+    for _ in range(images):
+        raw = os.urandom(image_bytes)
+        url = "data:image/jpeg;base64," + base64.b64encode(raw).decode("utf-8")
+        content.append({"type": "image_url", "image_url": {"url": url}})
+    return {"model": "doubao-seedance-1-5-pro-251215", "content": content}
+
+
+def run_create(base_url: str, warmup: bool, args) -> float:
+    start = time.perf_counter()
+    transport = TransportConfig(warmup=warmup)
+    client = SeedanceClient(api_key="bench", base_url=base_url, transport=transport)
+    payload = prepare_payload(args.images, int(args.image_mb * 1024 * 1024))
+    client.create_task(payload)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+def run_concurrent(base_url: str, resumption: bool, args) -> dict:
+    transport = TransportConfig(max_concurrency=args.connections, tls_resumption=resumption)
+    client = SeedanceClient(api_key="bench", base_url=base_url, transport=transport)
+    # 先建立一个连接拿到会话，再并发建立其余连接
+    payload = prepare_payload(0, 0)
+    client.create_task(payload)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.connections) as executor:
+        list(executor.map(lambda _: client.create_task(payload),
+                          range(args.connections)))
+    elapsed = time.perf_counter() - start
+    stats = client.transport_stats()["api"]
+    client.close()
+    return {"seconds": elapsed, "handshakes": stats["handshakes"], "resumed": stats["tls_resumed"]}
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark background connection warm-up and TLS resumption")
+    parser.add_argument("--rtt", type=float, default=0.08, help="Simulated round trip in seconds (default: 0.08)")
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--image-mb", type=float, default=4.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--connections", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            cert, key = make_certificate(directory)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error: generating a test certificate requires the openssl command line: {e}", file=sys.stderr)
+            sys.exit(1)
+        server = start_mock_api(cert, key, args.rtt)
+        base_url = f"https://localhost:{server.server_port}/api/v3"
+        # 信任自签名证书；关闭 DNS 缓存，只比较预热本身
+        os.environ["REQUESTS_CA_BUNDLE"] = cert
+        os.environ["SEEDANCE_DNS_CACHE"] = ""
+
+        encode = statistics.median(
+            timed(lambda: prepare_payload(args.images, int(args.image_mb * 1024 * 1024))) for _ in range(args.runs)
+        )
+        print(f"RTT {args.rtt * 1000:.0f} ms, {args.images} x {args.image_mb:g} MB images "
+              f"(encoding {encode:.3f}s), median of {args.runs} runs")
+        print(f"{'mode':<8} {'create s':>9}")
+        for name, warmup in (("cold", False), ("warmup", True)):
+            times = [run_create(base_url, warmup, args) for _ in range(args.runs)]
+            print(f"{name:<8} {statistics.median(times):>9.3f}")
+
+        print(f"\n{args.connections} concurrent requests on a fresh pool")
+        print(f"{'tls':<8} {'seconds':>8} {'handshakes':>10} {'resumed':>8}")
+        for name, resumption in (("full", False), ("resume", True)):
+            row = run_concurrent(base_url, resumption, args)
+            print(f"{name:<8} {row['seconds']:>8.3f} {row['handshakes']:>10} {row['resumed']:>8}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+多进程任务队列基准
+
+启动一个本地模拟 API（任务固定耗时后成功），用 1/2/4/8 个 worker 进程
+消费同一个 SQLite 队列，测量吞吐随 worker 数的变化；
+随后强制结束一个 worker，验证其租约过期后任务被其他 worker 接管并全部完成。
+
+用法:
+    python benchmarks/bench_work_queue.py [--jobs 80] [--task-seconds 0.5]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from seedance_client import SeedanceClient  # noqa: E402
+from work_queue import WorkQueue, Worker  # noqa: E402
+
+
+PAYLOAD = {"model": "doubao-seedance-1-5-pro-251215", "content": [{"type": "text", "text": "bench"}]}
+
+
+def start_mock_api(task_seconds: float):
+    """模拟 API：任务创建后 task_seconds 秒成功，返回 (server, 创建次数计数器)"""
+    tasks = {}
+    created = multiprocessing.Value("i", 0)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                task_id = f"cgt-{len(tasks)}"
+                tasks[task_id] = time.time()
+            with created.get_lock():
+                created.value += 1
+            self._send({"id": task_id})
+
+        def do_GET(self):
+            task_id = self.path.rsplit("/", 1)[-1]
+            done = time.time() - tasks[task_id] >= task_seconds
+            body = {"id": task_id, "model": PAYLOAD["model"], "status": "succeeded" if done else "running"}
+            if done:
+                body["content"] = {"video_url": f"https://cdn.example.com/{task_id}.mp4"}
+            self._send(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, created
+
+
+def run_worker(db: str, base_url: str, lease: float, poll: float):
+    """worker 进程入口"""
+    queue = WorkQueue(db, lease_seconds=lease)
+    client = SeedanceClient(api_key="bench", base_url=base_url)
+    Worker(queue, client, concurrency=1, poll_interval=poll).run(idle_interval=poll)
+
+
+def fill(db: str, jobs: int, lease: float) -> WorkQueue:
+    queue = WorkQueue(db, lease_seconds=lease)
+    for i in range(jobs):
+        queue.add(PAYLOAD, name=f"job-{i}")
+    return queue
+
+
+def start_workers(count: int, db: str, base_url: str, lease: float, poll: float):
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(db, base_url, lease, poll))
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WorkQueue multi-process benchmark")
+    parser.add_argument("--jobs", type=int, default=80)
+    parser.add_argument("--task-seconds", type=float, default=0.5)
+    parser.add_argument("--workers", type=str, default="1,2,4,8")
+    args = parser.parse_args()
+
+    poll = 0.05
+    lease = 2.0
+    server, created = start_mock_api(args.task_seconds)
+    base_url = f"http://127.0.0.1:{server.server_port}/api/v3"
+
+    print(f"{args.jobs} jobs, {args.task_seconds}s per task, 1 job in flight per worker process")
+    print(f"{'workers':>8} {'seconds':>9} {'jobs/s':>8} {'speedup':>8} {'submits':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in [int(n) for n in args.workers.split(",")]:
+            db = os.path.join(tmp, f"scale{count}.db")
+            queue = fill(db, args.jobs, lease)
+            created.value = 0
+            start = time.perf_counter()
+            for process in start_workers(count, db, base_url, lease, poll):
+                process.join()
+            elapsed = time.perf_counter() - start
+            metrics = queue.metrics()
+            assert metrics["done"] == args.jobs, metrics
+            rate = args.jobs / elapsed
+            baseline = baseline or rate
+            print(f"{count:>8} {elapsed:>9.2f} {rate:>8.1f} {rate / baseline:>7.1f}x {created.value:>8}")
+            queue.close()
+
+        # 崩溃恢复：两个 worker 中途强制结束一个
+        db = os.path.join(tmp, "crash.db")
+        jobs = 20
+        queue = fill(db, jobs, lease)
+        created.value = 0
+        start = time.perf_counter()
+        victim, survivor = start_workers(2, db, base_url, lease, poll)
+        time.sleep(args.task_seconds * 3)
+        os.kill(victim.pid, signal.SIGKILL)
+        victim.join()
+        survivor.join()
+        elapsed = time.perf_counter() - start
+        metrics = queue.metrics()
+        print(
+            f"\nCrash recovery: killed 1 of 2 workers; {metrics['done']}/{jobs} done in {elapsed:.2f}s, "
+            f"{created.value} submits (lease {lease}s)"
+        )
+        assert metrics["done"] == jobs, metrics
+        queue.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
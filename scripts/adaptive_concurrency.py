@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+按限流反馈自适应的提交并发（AIMD）
+
+每个账号、模型和服务等级的 RPM / 并发配额都不同且会变化。控制器为每个
+(model, service_tier) 维护一个并发上限：请求成功时加性增加（每完成约一个上限的请求数 +1），
+遇到 RateLimitError 或并发配额错误时乘性减少。学到的上限保存到 JSON 文件，
+下次运行从该值开始，而不是从保守的固定值重新探测。
+
+并发以“槽位”计：create_task 前获取槽位；hold=True 时任务创建成功后继续占用，
+直到调用 task_done()（任务进入终态），以匹配按在途任务计算的并发配额。
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from seedance_client import SeedanceClient, TaskInfo, APIError, RateLimitError
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import SeedanceClient, TaskInfo, APIError, RateLimitError
+    from profiling import add_profiling_arguments, start_profiling
+
+
+# 错误码中包含这些词时视为配额/并发限制（除 429 外，部分配额错误以 4xx/5xx 返回）
+QUOTA_ERROR_PATTERN = re.compile(r"quota|limit|overload|concurren|throttl", re.IGNORECASE)
+
+# 模型未指定服务等级时按 default 处理
+DEFAULT_TIER = "default"
+
+
+def default_state_path() -> Optional[str]:
+    """持久化文件路径：SEEDANCE_CONCURRENCY_STATE 环境变量，未设置时不持久化"""
+    return os.environ.get("SEEDANCE_CONCURRENCY_STATE")
+
+
+def is_quota_error(error: Exception) -> bool:
+    """是否为限流或配额错误"""
+    if isinstance(error, RateLimitError):
+        return True
+    if isinstance(error, APIError) and error.response:
+        code = (error.response.get("error") or {}).get("code") or ""
+        return bool(QUOTA_ERROR_PATTERN.search(str(code)))
+    return False
+
+
+class AIMDLimit:
+    """单个 (model, service_tier) 的并发上限与在途计数"""
+
+    def __init__(self, limit: float, min_limit: float, max_limit: float):
+        self.limit = limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.successes = 0
+        self.throttles = 0
+        self.last_cut = 0.0
+        self.condition = threading.Condition()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "successes": self.successes,
+            "throttles": self.throttles,
+        }
+
+
+class AdaptiveConcurrency:
+    """按 (model, service_tier) 自适应的并发控制器（线程安全）"""
+
+    def __init__(
+        self,
+        state_path: Optional[str] = None,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 2.0,
+        save_interval: float = 5.0
+    ):
+        """
+        Args:
+            state_path: 持久化 JSON 文件路径，None 表示不持久化
+            initial: 没有历史记录时的初始上限
+            min_limit: 上限的下界
+            max_limit: 上限的上界
+            increase: 每完成约 limit 个成功请求增加的上限
+            decrease: 遇到限流时上限乘以该系数
+            cooldown: 两次减少之间的最短间隔（秒），同一批并发请求的多个 429 只减少一次
+            save_interval: 两次写入持久化文件的最短间隔（秒）
+        """
+        self.state_path = state_path
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._limits: Dict[Tuple[str, str], AIMDLimit] = {}
+        self._held: Dict[str, Tuple[str, str]] = {}
+        self._learned: Dict[str, float] = {}
+        self._last_save = 0.0
+        self._dirty = False
+        if state_path and Path(state_path).exists():
+            data = json.loads(Path(state_path).read_text(encoding="utf-8"))
+            self._learned = {key: entry["limit"] for key, entry in data.get("limits", {}).items()}
+
+    @staticmethod
+    def _key(model: str, service_tier: Optional[str]) -> Tuple[str, str]:
+        return (model, service_tier or DEFAULT_TIER)
+
+    def _get(self, key: Tuple[str, str]) -> AIMDLimit:
+        with self._lock:
+            entry = self._limits.get(key)
+            if entry is None:
+                start = self._learned.get("|".join(key), self.initial)
+                start = min(max(start, self.min_limit), self.max_limit)
+                entry = self._limits[key] = AIMDLimit(start, self.min_limit, self.max_limit)
+            return entry
+
+    def acquire(self, model: str, service_tier: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        获取一个槽位，在途数达到上限时等待
+
+        Returns:
+            是否获取成功（超时返回 False）
+        """
+        entry = self._get(self._key(model, service_tier))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with entry.condition:
+            entry.waiting += 1
+            try:
+                while entry.in_flight >= max(int(entry.limit), 1):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    entry.condition.wait(remaining)
+                entry.in_flight += 1
+                return True
+            finally:
+                entry.waiting -= 1
+
+    def release(self, model: str, service_tier: Optional[str] = None, outcome: str = "ok"):
+        """
+        释放槽位并按结果调整上限
+
+        Args:
+            outcome: "ok"（加性增加）、"throttled"（乘性减少）或 "error"（不调整）
+        """
+        key = self._key(model, service_tier)
+        entry = self._get(key)
+        changed = False
+        with entry.condition:
+            entry.in_flight = max(entry.in_flight - 1, 0)
+            if outcome == "ok":
+                entry.successes += 1
+                if entry.limit < entry.max_limit:
+                    entry.limit = min(entry.limit + self.increase / max(entry.limit, 1.0), entry.max_limit)
+                    changed = True
+            elif outcome == "throttled":
+                entry.throttles += 1
+                now = time.monotonic()
+                if now - entry.last_cut >= self.cooldown:
+                    entry.limit = max(entry.limit * self.decrease, entry.min_limit)
+                    entry.last_cut = now
+                    changed = True
+            entry.condition.notify_all()
+        if changed:
+            with self._lock:
+                self._learned["|".join(key)] = entry.limit
+                self._dirty = True
+            self._maybe_save()
+
+    def create_task(
+        self,
+        client: SeedanceClient,
+        payload: Dict[str, Any],
+        hold: bool = False,
+        on_wait: Optional[Callable[[], None]] = None,
+        wait_interval: float = 5.0
+    ) -> TaskInfo:
+        """
+        在槽位内调用 client.create_task
+
+        Args:
+            client: API 客户端
+            payload: 创建任务 payload（使用其中的 model 和 service_tier）
+            hold: 为 True 时任务创建成功后继续占用槽位，直到 task_done(task.id)
+            on_wait: 等待槽位期间每 wait_interval 秒调用一次（例如续约）
+            wait_interval: on_wait 的调用间隔（秒）
+
+        Returns:
+            TaskInfo
+
+        Raises:
+            client.create_task 抛出的异常（限流错误会先减少上限）
+        """
+        model, tier = payload.get("model", ""), payload.get("service_tier")
+        while not self.acquire(model, tier, timeout=wait_interval if on_wait else None):
+            on_wait()
+        try:
+            task = client.create_task(payload)
+        except Exception as e:
+            self.release(model, tier, "throttled" if is_quota_error(e) else "error")
+            raise
+        if hold:
+            with self._lock:
+                self._held[task.id] = self._key(model, tier)
+        else:
+            self.release(model, tier, "ok")
+        return task
+
+    def track(self, task_id: str, model: str, service_tier: Optional[str] = None):
+        """
+        为已存在的在途任务（例如重新认领的任务）计入槽位，直到 task_done
+
+        任务已经占用服务端配额，因此不等待，在途数可能暂时超过上限。
+        """
+        entry = self._get(self._key(model, service_tier))
+        with entry.condition:
+            entry.in_flight += 1
+        with self._lock:
+            self._held[task_id] = self._key(model, service_tier)
+
+    def task_done(self, task_id: str):
+        """任务进入终态（或不再跟踪），释放 hold 的槽位"""
+        with self._lock:
+            key = self._held.pop(task_id, None)
+        if key is not None:
+            self.release(key[0], key[1], "ok")
+
+    def limit(self, model: str, service_tier: Optional[str] = None) -> float:
+        """当前上限"""
+        return self._get(self._key(model, service_tier)).limit
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {"model/tier": {limit, in_flight, waiting, successes, throttles}}
+        """
+        with self._lock:
+            entries = dict(self._limits)
+        return {f"{model}/{tier}": entry.snapshot() for (model, tier), entry in sorted(entries.items())}
+
+    def _maybe_save(self):
+        if self.state_path and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """写入持久化文件（原子替换；多个进程共享文件时以最后写入为准）"""
+        if not self.state_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": 1,
+                "updated_at": time.time(),
+                "limits": {key: {"limit": round(limit, 3)} for key, limit in sorted(self._learned.items())},
+            }
+            self._dirty = False
+            self._last_save = time.monotonic()
+        path = Path(self.state_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show or reset learned per-model concurrency limits",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Show learned limits
+  python adaptive_concurrency.py --state ~/.seedance/concurrency.json
+
+  # Forget a model/tier so it is probed again from the initial limit
+  python adaptive_concurrency.py --state ~/.seedance/concurrency.json --reset doubao-seedance-1-5-pro-251215/default
+        """
+    )
+    parser.add_argument(
+        "--state",
+        type=str,
+        default=default_state_path(),
+        help="State file (default: SEEDANCE_CONCURRENCY_STATE env variable)"
+    )
+    parser.add_argument("--reset", type=str, metavar="MODEL/TIER", help="Forget the limit of one model/tier")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "adaptive_concurrency")
+
+    try:
+        if not args.state:
+            parser.error("--state or SEEDANCE_CONCURRENCY_STATE is required")
+        path = Path(args.state)
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {"limits": {}}
+        limits = data.get("limits", {})
+
+        if args.reset:
+            key = args.reset.replace("/", "|", 1) if "|" not in args.reset else args.reset
+            if limits.pop(key, None) is None:
+                raise ValueError(f"No learned limit for {args.reset}")
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+            print(f"Reset {args.reset}")
+            return
+
+        if args.json:
+            print(json.dumps(limits, indent=2, ensure_ascii=False))
+        elif not limits:
+            print("No learned limits")
+        else:
+            for key, entry in limits.items():
+                model, tier = key.split("|", 1)
+                print(f"{model:<40} {tier:<8} {entry['limit']:>6.2f}")
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,162 @@
 取消或删除视频生成任务
 
 取消队列中的任务，或删除已完成/失败的任务记录。
+支持批量操作：从文件/标准输入读取任务 ID，或按状态、模型、服务等级和
+创建时间筛选任务，通过同一会话并发发送限速的 DELETE 请求。
 """
 
 import os
+import re
 import sys
+import time
 import argparse
+from typing import Any, Dict, List, Optional
 
 try:
-    from seedance_client import SeedanceClient, TaskNotFoundError
+    from seedance_client import (
+        SeedanceClient,
+        TaskNotFoundError,
+        RateLimiter,
+        TransportConfig,
+        parse_timestamp
+    )
+    from profiling import add_profiling_arguments, start_profiling
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from seedance_client import SeedanceClient, TaskNotFoundError
+    from seedance_client import (
+        SeedanceClient,
+        TaskNotFoundError,
+        RateLimiter,
+        TransportConfig,
+        parse_timestamp
+    )
+    from profiling import add_profiling_arguments, start_profiling
+
+
+def parse_age(value: str) -> float:
+    """
+    解析时长字符串为秒数
+
+    Args:
+        value: 如 "90s"、"30m"、"12h"、"7d"，纯数字按秒处理
+
+    Returns:
+        秒数
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value)
+    if not match:
+        raise ValueError(f"Invalid age: {value}")
+    number, unit = match.groups()
+    return float(number) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+
+
+def read_task_ids(path: str) -> List[str]:
+    """
+    从文件或标准输入读取任务 ID（每行一个，忽略空行和 # 注释）
+
+    Args:
+        path: 文件路径，"-" 表示标准输入
+
+    Returns:
+        任务 ID 列表
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.split("#", 1)[0].strip() for line in lines if line.split("#", 1)[0].strip()]
+
+
+def select_tasks(
+    client: SeedanceClient,
+    status: Optional[str],
+    model: Optional[str],
+    service_tier: Optional[str],
+    older_than: Optional[float]
+) -> List[str]:
+    """
+    通过列表接口解析筛选条件为任务 ID 列表
+
+    Args:
+        client: SeedanceClient
+        status: 任务状态
+        model: 模型 ID
+        service_tier: 服务等级
+        older_than: 仅选择创建时间早于该秒数之前的任务
+
+    Returns:
+        任务 ID 列表
+    """
+    cutoff = time.time() - older_than if older_than is not None else None
+    task_ids = []
+    for task in client.iter_tasks(status=status, model=model, service_tier=service_tier):
+        if cutoff is not None:
+            created = parse_timestamp(task.get("created_at", task.get("created")))
+            if created is None or created > cutoff:
+                continue
+        task_ids.append(task["id"])
+    return task_ids
+
+
+def cancel_many(
+    client: SeedanceClient,
+    task_ids: List[str],
+    rate: float = 100.0
+) -> List[Dict[str, Any]]:
+    """
+    并发取消/删除任务
+
+    Args:
+        client: SeedanceClient（并发度由其 transport.max_concurrency 决定）
+        task_ids: 任务 ID 列表
+        rate: 每秒最多发送的请求数
+
+    Returns:
+        与 task_ids 顺序一致的结果列表，每项包含 id、result、message
+    """
+    limiter = RateLimiter(rate, burst=client.transport.max_concurrency)
+    futures = client.cancel_many(task_ids, rate_limiter=limiter)
+
+    results = []
+    for task_id, outcome in zip(task_ids, client.iter_results(futures, return_exceptions=True)):
+        if isinstance(outcome, TaskNotFoundError):
+            results.append({"id": task_id, "result": "not_found", "message": "Task not found"})
+        elif isinstance(outcome, Exception):
+            results.append({"id": task_id, "result": "error", "message": str(outcome)})
+        else:
+            message = outcome.get("message", "") if outcome else ""
+            results.append({"id": task_id, "result": "ok", "message": message})
+    return results
+
+
+def format_results(results: List[Dict[str, Any]], elapsed: float) -> str:
+    """
+    格式化批量结果
+
+    Args:
+        results: cancel_many 的返回值
+        elapsed: 总耗时（秒）
+
+    Returns:
+        格式化的字符串
+    """
+    lines = [f"{'Result':<10} {'Task ID':<40} Message", "-" * 70]
+    for item in results:
+        lines.append(f"{item['result']:<10} {item['id']:<40} {item['message']}")
+
+    counts: Dict[str, int] = {}
+    for item in results:
+        counts[item["result"]] = counts.get(item["result"], 0) + 1
+    summary = ", ".join(f"{name}: {count}" for name, count in sorted(counts.items()))
+    lines.append("")
+    lines.append(f"{len(results)} tasks in {elapsed:.2f}s ({summary})")
+    return "\n".join(lines)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Cancel or delete a video generation task",
+        description="Cancel or delete video generation tasks",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
@@ -27,14 +167,76 @@ Examples:
 
   # Delete completed/failed task record
   python cancel_task.py <task_id>
+
+  # Cancel many tasks listed in a file (one ID per line), or from stdin
+  python cancel_task.py --from-file aborted_batch.txt
+  cat ids.txt | python cancel_task.py --from-file -
+
+  # Preview which queued flex tasks would be cancelled
+  python cancel_task.py --status queued --service-tier flex --dry-run
+
+  # Purge failed task records older than 3 days
+  python cancel_task.py --status failed --older-than 3d
         """
     )
 
     parser.add_argument(
-        "task_id",
+        "task_ids",
+        type=str,
+        nargs="*",
+        help="Task ID(s) to cancel/delete"
+    )
+    parser.add_argument(
+        "--from-file",
+        type=str,
+        metavar="PATH",
+        help="Read task IDs from a file, one per line ('-' for stdin)"
+    )
+
+    # 筛选条件（通过列表接口解析）
+    parser.add_argument(
+        "--status",
+        type=str,
+        choices=["queued", "running", "succeeded", "failed", "cancelled", "expired"],
+        help="Select tasks by status"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        help="Select tasks by model ID"
+    )
+    parser.add_argument(
+        "--service-tier",
+        type=str,
+        choices=["default", "flex"],
+        help="Select tasks by service tier"
+    )
+    parser.add_argument(
+        "--older-than",
         type=str,
-        help="Task ID to cancel/delete"
+        metavar="AGE",
+        help="Select tasks created more than AGE ago (e.g. 30m, 12h, 7d)"
+    )
+
+    # 批量执行参数
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the tasks that would be cancelled/deleted"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=32,
+        help="Concurrent DELETE requests (default: 32)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=100.0,
+        help="Maximum DELETE requests per second (default: 100)"
+    )
+
     parser.add_argument(
         "--api-key",
         type=str,
@@ -46,23 +248,92 @@ Examples:
         help="Output raw JSON"
     )
 
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_profiling(args, "cancel_task")
+
+    has_selector = any([args.status, args.model, args.service_tier, args.older_than])
+    if not args.task_ids and not args.from_file and not has_selector:
+        parser.error("provide task IDs, --from-file, or a selector (--status/--model/--service-tier/--older-than)")
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    older_than = None
+    if args.older_than:
+        try:
+            older_than = parse_age(args.older_than)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # 单个任务 ID：保持原有输出
+    single = len(args.task_ids) == 1 and not args.from_file and not has_selector and not args.dry_run
 
     try:
-        client = SeedanceClient(api_key=args.api_key)
-        result = client.cancel_task(args.task_id)
+        # 连接池按并发数配置，避免连接被丢弃后重复握手
+        client = SeedanceClient(
+            api_key=args.api_key,
+            transport=TransportConfig(max_concurrency=args.concurrency)
+        )
+
+        if single:
+            task_id = args.task_ids[0]
+            try:
+                result = client.cancel_task(task_id)
+            except TaskNotFoundError:
+                print(f"Error: Task not found: {task_id}", file=sys.stderr)
+                sys.exit(1)
+
+            if args.json:
+                import json
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print(f"Task {task_id} cancelled/deleted successfully.")
+                if result:
+                    print(f"Response: {result}")
+            return
+
+        # 汇总任务 ID（保持顺序去重）
+        task_ids = list(args.task_ids)
+        if args.from_file:
+            task_ids.extend(read_task_ids(args.from_file))
+        if has_selector:
+            task_ids.extend(select_tasks(
+                client, args.status, args.model, args.service_tier, older_than
+            ))
+        task_ids = list(dict.fromkeys(task_ids))
+
+        if args.dry_run:
+            if args.json:
+                import json
+                print(json.dumps({"dry_run": True, "task_ids": task_ids}, indent=2))
+            else:
+                for task_id in task_ids:
+                    print(task_id)
+                print(f"\n{len(task_ids)} tasks would be cancelled/deleted (dry run)")
+            return
+
+        start = time.perf_counter()
+        results = cancel_many(client, task_ids, rate=args.rate)
+        elapsed = time.perf_counter() - start
 
         if args.json:
             import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print(json.dumps(results, indent=2, ensure_ascii=False))
         else:
-            print(f"Task {args.task_id} cancelled/deleted successfully.")
-            if result:
-                print(f"Response: {result}")
+            print(format_results(results, elapsed))
+            api_stats = client.transport_stats().get("api")
+            if api_stats:
+                print(
+                    f"Connections: {api_stats['handshakes']} handshakes for "
+                    f"{api_stats['requests']} requests (reuse {api_stats['reuse_ratio']:.0%})"
+                )
+
+        if any(item["result"] == "error" for item in results):
+            sys.exit(1)
 
-    except TaskNotFoundError:
-        print(f"Error: Task not found: {args.task_id}", file=sys.stderr)
-        sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
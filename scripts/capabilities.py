@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+模型能力表与请求预编译
+
+MODEL_CAPABILITIES 由 references/models.md 的模型对比表生成（并补充
+API 文档中的限制），随代码预先生成，运行时不解析文档。
+compile_payload 在读取任何图片、发送任何请求之前校验参数组合，
+并生成可直接提交的 payload。
+
+重新生成能力表：
+    python capabilities.py --generate
+检查能力表与文档是否一致：
+    python capabilities.py --check
+"""
+
+import os
+import re
+import sys
+import argparse
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from seedance_client import ValidationError
+    from profiling import add_profiling_arguments, profiled, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import ValidationError
+    from profiling import add_profiling_arguments, profiled, start_profiling
+
+
+MODELS_DOC = Path(__file__).parent.parent / "references" / "models.md"
+
+RESOLUTIONS = ("480p", "720p", "1080p")
+RATIOS = frozenset({"16:9", "4:3", "1:1", "3:4", "9:16", "21:9", "adaptive"})
+SERVICE_TIERS = frozenset({"default", "flex"})
+
+MAX_REFERENCE_IMAGES = 4
+FRAMES_RANGE = (29, 289)
+SEED_RANGE = (-1, 2 ** 32 - 1)
+EXPIRES_RANGE = (3600, 259200)
+
+# 图片字段取这些前缀时直接透传，不读取本地文件
+PASSTHROUGH_PREFIXES = ("http://", "https://", "data:", "asset://")
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """单个模型支持的能力"""
+    model: str
+    tier: str
+    text_to_video: bool
+    image_to_video: bool
+    first_last_frame: bool
+    reference_images: bool
+    audio: bool
+    draft: bool
+    max_resolution: str
+    max_duration: int
+    auto_duration: bool
+    # 以下来自 API 文档，models.md 表格中没有
+    min_duration: int = 2
+    frames: bool = True
+    adaptive_text_ratio: bool = False
+    heic: bool = False
+
+
+# models.md 之外的限制（volcengine-API.md：1.5 pro 时长 4~12 秒、不支持 frames、
+# 文生视频仅 1.5 pro 支持 adaptive 宽高比、仅 1.5 pro 支持 HEIC/HEIF 输入图片）
+API_OVERRIDES: Dict[str, Dict[str, Any]] = {
+    "doubao-seedance-1-5-pro-251215": {
+        "min_duration": 4,
+        "frames": False,
+        "adaptive_text_ratio": True,
+        "heic": True,
+    },
+}
+
+
+# --- 以下由 `python capabilities.py --generate` 生成 ---
+MODEL_CAPABILITIES: Dict[str, ModelCapabilities] = {
+    "doubao-seedance-1-5-pro-251215": ModelCapabilities(
+        model="doubao-seedance-1-5-pro-251215", tier="Pro",
+        text_to_video=True, image_to_video=True, first_last_frame=True, reference_images=False,
+        audio=True, draft=True, max_resolution="1080p", max_duration=12, auto_duration=True,
+        min_duration=4, frames=False, adaptive_text_ratio=True, heic=True,
+    ),
+    "doubao-seedance-1-0-pro-t2v": ModelCapabilities(
+        model="doubao-seedance-1-0-pro-t2v", tier="Pro",
+        text_to_video=True, image_to_video=False, first_last_frame=False, reference_images=False,
+        audio=False, draft=False, max_resolution="1080p", max_duration=12, auto_duration=False,
+        min_duration=2, frames=True, adaptive_text_ratio=False, heic=False,
+    ),
+    "doubao-seedance-1-0-pro-i2v": ModelCapabilities(
+        model="doubao-seedance-1-0-pro-i2v", tier="Pro",
+        text_to_video=False, image_to_video=True, first_last_frame=True, reference_images=False,
+        audio=False, draft=False, max_resolution="1080p", max_duration=12, auto_duration=False,
+        min_duration=2, frames=True, adaptive_text_ratio=False, heic=False,
+    ),
+    "doubao-seedance-1-0-pro-fast-t2v": ModelCapabilities(
+        model="doubao-seedance-1-0-pro-fast-t2v", tier="Fast",
+        text_to_video=True, image_to_video=False, first_last_frame=False, reference_images=False,
+        audio=False, draft=False, max_resolution="1080p", max_duration=12, auto_duration=False,
+        min_duration=2, frames=True, adaptive_text_ratio=False, heic=False,
+    ),
+    "doubao-seedance-1-0-lite-t2v": ModelCapabilities(
+        model="doubao-seedance-1-0-lite-t2v", tier="Lite",
+        text_to_video=True, image_to_video=False, first_last_frame=False, reference_images=False,
+        audio=False, draft=False, max_resolution="720p", max_duration=12, auto_duration=False,
+        min_duration=2, frames=True, adaptive_text_ratio=False, heic=False,
+    ),
+    "doubao-seedance-1-0-lite-i2v": ModelCapabilities(
+        model="doubao-seedance-1-0-lite-i2v", tier="Lite",
+        text_to_video=False, image_to_video=True, first_last_frame=True, reference_images=True,
+        audio=False, draft=False, max_resolution="720p", max_duration=12, auto_duration=False,
+        min_duration=2, frames=True, adaptive_text_ratio=False, heic=False,
+    ),
+}
+# --- 生成结束 ---
+
+
+def parse_models_table(text: str) -> Dict[str, ModelCapabilities]:
+    """
+    从 models.md 的模型对比表解析能力
+
+    Args:
+        text: models.md 内容
+
+    Returns:
+        {模型 ID: ModelCapabilities}（已合并 API_OVERRIDES）
+    """
+    result = {}
+    for line in text.splitlines():
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        if len(cells) != 10 or not cells[0].startswith("doubao-seedance"):
+            continue
+        model, tier, t2v, i2v, first_last, reference, audio, draft, max_res, max_dur = cells
+        duration_match = re.match(r"(\d+)s", max_dur)
+        values = dict(
+            model=model,
+            tier=tier,
+            text_to_video=t2v == "✅",
+            image_to_video=i2v == "✅",
+            first_last_frame=first_last == "✅",
+            reference_images=reference == "✅",
+            audio=audio == "✅",
+            draft=draft == "✅",
+            max_resolution=max_res,
+            max_duration=int(duration_match.group(1)) if duration_match else 12,
+            auto_duration="自动" in max_dur,
+        )
+        values.update(API_OVERRIDES.get(model, {}))
+        result[model] = ModelCapabilities(**values)
+    return result
+
+
+def render_table(table: Dict[str, ModelCapabilities]) -> str:
+    """将能力表渲染为 MODEL_CAPABILITIES 的 Python 源码"""
+    lines = ["MODEL_CAPABILITIES: Dict[str, ModelCapabilities] = {"]
+    for model, caps in table.items():
+        values = {f.name: getattr(caps, f.name) for f in fields(caps)}
+        lines.append(f'    "{model}": ModelCapabilities(')
+        lines.append(f'        model="{values["model"]}", tier="{values["tier"]}",')
+        lines.append(
+            f"        text_to_video={values['text_to_video']}, image_to_video={values['image_to_video']}, "
+            f"first_last_frame={values['first_last_frame']}, reference_images={values['reference_images']},"
+        )
+        lines.append(
+            f"        audio={values['audio']}, draft={values['draft']}, "
+            f"max_resolution=\"{values['max_resolution']}\", max_duration={values['max_duration']}, "
+            f"auto_duration={values['auto_duration']},"
+        )
+        lines.append(
+            f"        min_duration={values['min_duration']}, frames={values['frames']}, "
+            f"adaptive_text_ratio={values['adaptive_text_ratio']}, heic={values['heic']},"
+        )
+        lines.append("    ),")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=256)
+def get_capabilities(model: str) -> Optional[ModelCapabilities]:
+    """
+    查找模型能力
+
+    支持带版本后缀的模型 ID（如 doubao-seedance-1-0-lite-i2v-250428），
+    按最长前缀匹配。
+
+    Args:
+        model: 模型 ID
+
+    Returns:
+        ModelCapabilities，未知模型返回 None
+    """
+    caps = MODEL_CAPABILITIES.get(model)
+    if caps is not None:
+        return caps
+    best = None
+    for known, candidate in MODEL_CAPABILITIES.items():
+        if model.startswith(known + "-") and (best is None or len(known) > len(best.model)):
+            best = candidate
+    return best
+
+
+def job_mode(job: Dict[str, Any]) -> str:
+    """
+    判断生成场景
+
+    Returns:
+        "draft_task"、"reference"、"first_last"、"image" 或 "text"
+    """
+    if job.get("draft_task_id"):
+        return "draft_task"
+    if job.get("reference_images"):
+        return "reference"
+    if job.get("last_frame"):
+        return "first_last"
+    if job.get("image"):
+        return "image"
+    return "text"
+
+
+def _in_range(value: Any, low: int, high: int) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and low <= value <= high
+
+
+def validate_job(job: Dict[str, Any]) -> List[str]:
+    """
+    校验任务参数组合（不读取图片、不发送请求）
+
+    Args:
+        job: 任务描述，键与 create_task.py 参数对应：model、prompt、image、
+            last_frame、reference_images、draft_task_id、resolution、ratio、
+            duration、frames、seed、watermark、camera_fixed、generate_audio、
+            draft、service_tier、return_last_frame、execution_expires_after
+
+    Returns:
+        问题描述列表，为空表示合法
+    """
+    problems = []
+    model = job.get("model")
+    if not model:
+        return ["model is required"]
+
+    caps = get_capabilities(model)
+    mode = job_mode(job)
+    prompt = job.get("prompt")
+    image = job.get("image")
+    last_frame = job.get("last_frame")
+    references = job.get("reference_images") or []
+    resolution = job.get("resolution")
+    ratio = job.get("ratio")
+    duration = job.get("duration")
+    frames = job.get("frames")
+
+    # 场景
+    if mode == "draft_task":
+        if image or last_frame or references:
+            problems.append("draft_task_id cannot be combined with images")
+    elif mode == "text" and not prompt:
+        problems.append("prompt is required for text-to-video")
+    if last_frame and not image:
+        problems.append("last_frame requires image (first frame)")
+    if references and (image or last_frame):
+        problems.append("reference_images cannot be combined with image/last_frame")
+    if len(references) > MAX_REFERENCE_IMAGES:
+        problems.append(f"at most {MAX_REFERENCE_IMAGES} reference images are supported")
+
+    if caps is not None and mode != "draft_task":
+        if mode == "text" and not caps.text_to_video:
+            problems.append(f"{model} does not support text-to-video (provide an image)")
+        if mode in ("image", "first_last") and not caps.image_to_video:
+            problems.append(f"{model} does not support image-to-video")
+        if mode == "first_last" and not caps.first_last_frame:
+            problems.append(f"{model} does not support first/last frame mode")
+        if mode == "reference" and not caps.reference_images:
+            problems.append(f"{model} does not support reference images")
+
+    # 输出参数
+    if resolution is not None:
+        if resolution not in RESOLUTIONS:
+            problems.append(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+        else:
+            if caps is not None and RESOLUTIONS.index(resolution) > RESOLUTIONS.index(caps.max_resolution):
+                problems.append(f"{model} supports up to {caps.max_resolution}")
+            if mode == "reference" and resolution == "1080p":
+                problems.append("1080p is not supported with reference images")
+
+    if ratio is not None:
+        if ratio not in RATIOS:
+            problems.append(f"ratio must be one of {', '.join(sorted(RATIOS))}")
+        elif ratio == "adaptive":
+            if mode == "reference":
+                problems.append("ratio adaptive is not supported with reference images")
+            elif mode == "text" and caps is not None and not caps.adaptive_text_ratio:
+                problems.append(f"{model} does not support ratio adaptive for text-to-video")
+
+    if frames is not None:
+        if caps is not None and not caps.frames:
+            problems.append(f"{model} does not support frames (use duration)")
+        elif not _in_range(frames, *FRAMES_RANGE) or (frames - 25) % 4:
+            problems.append(f"frames must be 25+4n within [{FRAMES_RANGE[0]}, {FRAMES_RANGE[1]}]")
+    elif duration is not None:
+        if duration == -1:
+            if caps is not None and not caps.auto_duration:
+                problems.append(f"{model} does not support automatic duration (-1)")
+        else:
+            low = caps.min_duration if caps else 2
+            high = caps.max_duration if caps else 12
+            if not _in_range(duration, low, high):
+                problems.append(f"duration must be between {low} and {high}" +
+                                (" or -1" if caps is None or caps.auto_duration else ""))
+
+    # 高级参数
+    seed = job.get("seed")
+    if seed is not None and not _in_range(seed, *SEED_RANGE):
+        problems.append(f"seed must be within [{SEED_RANGE[0]}, {SEED_RANGE[1]}]")
+
+    tier = job.get("service_tier")
+    if tier is not None and tier not in SERVICE_TIERS:
+        problems.append(f"service_tier must be one of {', '.join(sorted(SERVICE_TIERS))}")
+
+    expires = job.get("execution_expires_after")
+    if expires is not None and not _in_range(expires, *EXPIRES_RANGE):
+        problems.append(f"execution_expires_after must be within [{EXPIRES_RANGE[0]}, {EXPIRES_RANGE[1]}]")
+
+    if job.get("camera_fixed") and mode == "reference":
+        problems.append("camera_fixed is not supported with reference images")
+
+    if job.get("generate_audio") and caps is not None and not caps.audio:
+        problems.append(f"{model} does not support generate_audio")
+
+    if job.get("draft"):
+        if caps is not None and not caps.draft:
+            problems.append(f"{model} does not support draft")
+        if resolution not in (None, "480p"):
+            problems.append("draft videos are generated at 480p (set resolution to 480p)")
+        if job.get("return_last_frame"):
+            problems.append("draft does not support return_last_frame")
+        if tier == "flex":
+            problems.append("draft does not support service_tier flex")
+
+    return problems
+
+
+@profiled("encode")
+def compile_payload(
+    job: Dict[str, Any],
+    read_image: Optional[Callable[[str], str]] = None
+) -> Dict[str, Any]:
+    """
+    校验任务描述并生成请求 payload
+
+    校验在读取图片之前完成；参数不合法时不会读取任何文件。
+
+    Args:
+        job: 任务描述（见 validate_job）
+        read_image: 将本地图片路径转换为 data URL 的函数；
+            URL 和 data URL 直接透传，为 None 时所有值都直接透传
+
+    Returns:
+        请求 payload
+
+    Raises:
+        ValidationError: 参数不合法
+    """
+    problems = validate_job(job)
+    if problems:
+        raise ValidationError(problems)
+
+    def image_url(value: str) -> str:
+        if read_image is None or value.startswith(PASSTHROUGH_PREFIXES):
+            return value
+        return read_image(value)
+
+    content = []
+    if job.get("prompt"):
+        content.append({"type": "text", "text": job["prompt"]})
+
+    if job.get("draft_task_id"):
+        content.append({"type": "draft_task", "draft_task_id": job["draft_task_id"]})
+    else:
+        if job.get("image"):
+            content.append({"type": "image", "image_url": image_url(job["image"]), "role": "first_frame"})
+        if job.get("last_frame"):
+            content.append({"type": "image", "image_url": image_url(job["last_frame"]), "role": "last_frame"})
+        for path in job.get("reference_images") or []:
+            content.append({"type": "image", "image_url": image_url(path), "role": "reference_image"})
+
+    payload: Dict[str, Any] = {"model": job["model"], "content": content}
+    for name in ("resolution", "ratio", "seed", "watermark", "camera_fixed",
+                 "service_tier", "return_last_frame", "execution_expires_after"):
+        if job.get(name) is not None:
+            payload[name] = job[name]
+
+    # frames 优先于 duration，只发送其中一个
+    if job.get("frames") is not None:
+        payload["frames"] = job["frames"]
+    elif job.get("duration") is not None:
+        payload["duration"] = job["duration"]
+
+    caps = get_capabilities(job["model"])
+    # 支持音频的模型默认生成音频，显式传递 false 才能得到无声视频
+    if job.get("generate_audio") is not None and (job["generate_audio"] or caps is None or caps.audio):
+        payload["generate_audio"] = job["generate_audio"]
+    if job.get("draft"):
+        payload["draft"] = True
+
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show or regenerate the model capability table",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Show the capability table
+  python capabilities.py
+
+  # Verify the table matches references/models.md
+  python capabilities.py --check
+
+  # Print the regenerated MODEL_CAPABILITIES source
+  python capabilities.py --generate
+        """
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--check", action="store_true", help="Check the table against references/models.md")
+    group.add_argument("--generate", action="store_true", help="Print MODEL_CAPABILITIES regenerated from models.md")
+    parser.add_argument("--models-doc", type=str, default=str(MODELS_DOC), help="Path to models.md")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "capabilities")
+
+    if args.check or args.generate:
+        try:
+            parsed = parse_models_table(Path(args.models_doc).read_text(encoding="utf-8"))
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.generate:
+            print(render_table(parsed))
+            return
+        if parsed != MODEL_CAPABILITIES:
+            print("Capability table is out of date, regenerate with: python capabilities.py --generate",
+                  file=sys.stderr)
+            sys.exit(1)
+        print(f"Capability table matches {args.models_doc} ({len(parsed)} models)")
+        return
+
+    header = f"{'Model':<36} {'T2V':<4} {'I2V':<4} {'F/L':<4} {'Ref':<4} {'Aud':<4} {'Dft':<4} {'Max res':<8} Duration"
+    print(header)
+    print("-" * len(header))
+    mark = {True: "✓", False: "-"}
+    for caps in MODEL_CAPABILITIES.values():
+        duration = f"{caps.min_duration}-{caps.max_duration}s" + (" / -1" if caps.auto_duration else "")
+        print(f"{caps.model:<36} {mark[caps.text_to_video]:<4} {mark[caps.image_to_video]:<4} "
+              f"{mark[caps.first_last_frame]:<4} {mark[caps.reference_images]:<4} {mark[caps.audio]:<4} "
+              f"{mark[caps.draft]:<4} {caps.max_resolution:<8} {duration}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+离散事件容量模拟器
+
+在不提交任何任务的情况下，预测一批混合任务在给定 RPM / 并发配额和客户端设置下的
+总耗时（makespan）、配额利用率和客户端开销。模拟的任务生命周期：
+
+    提交（受服务端 RPM 限制，429 后按退避重试；可选客户端限速）
+    -> 排队（服务调度延迟 + 等待并发配额）
+    -> 运行 -> 成功 / 失败，或自创建起超过 execution_expires_after 后过期
+    -> 客户端在下一次轮询时发现终态 -> 下载（受下载并发和带宽限制）
+
+运行与排队耗时、失败率从用量账本（--ledger，需要 numpy）中已完成任务拟合为对数正态分布，
+按 (model, tier, resolution, duration) 逐级回退到更粗的分组；没有账本时使用内置的粗略默认值。
+每组客户端设置用不同随机种子模拟多次，报告 makespan 的均值与 p90。
+"""
+
+import os
+import sys
+import json
+import math
+import heapq
+import random
+import time
+import argparse
+import itertools
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from work_queue import load_jobs
+    from cancel_task import parse_age
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from work_queue import load_jobs
+    from cancel_task import parse_age
+    from profiling import add_profiling_arguments, start_profiling
+
+
+DEFAULT_MODEL = "doubao-seedance-1-5-pro-251215"
+DEFAULT_EXPIRES_AFTER = 172800
+
+# 没有账本数据时的默认值（粗略估计，应尽量用账本拟合）
+DEFAULT_RUN_MEDIAN_5S_720P = 60.0
+DEFAULT_RUN_SIGMA = 0.35
+RESOLUTION_RUN_FACTOR = {"480p": 0.6, "720p": 1.0, "1080p": 2.0}
+DEFAULT_QUEUE = {"default": (2.0, 0.5), "flex": (300.0, 1.0)}
+DEFAULT_FAILURE_RATE = 0.02
+
+# 视频码率（MB/秒视频），用于估算下载量
+VIDEO_MB_PER_SECOND = {"480p": 0.25, "720p": 0.6, "1080p": 1.2}
+
+# 拟合一个分组所需的最少样本数
+MIN_SAMPLES = 5
+
+
+@dataclass
+class Quota:
+    """一个 (model, tier) 的服务端配额"""
+    rpm: float
+    concurrency: int
+
+
+@dataclass
+class ClientSettings:
+    """被评估的客户端设置"""
+    # 同时在途（已创建、尚未发现终态）的任务数
+    concurrency: int = 10
+    # 轮询间隔（秒）
+    poll_interval: float = 5.0
+    # 客户端提交限速（每分钟），None 表示不限速
+    rpm: Optional[float] = None
+    # 429 后的重试等待（秒），超出长度时使用最后一个值
+    retry_delays: Tuple[float, ...] = (1.0, 2.0, 4.0)
+    # 是否下载视频，以及下载并发和单个下载的带宽（MB/s）
+    download: bool = True
+    download_concurrency: int = 4
+    download_bandwidth: float = 20.0
+
+
+@dataclass
+class CostModel:
+    """客户端 CPU 开销"""
+    # 每个 API 请求（创建、轮询）的 CPU 秒数：请求构造、TLS、JSON 解析
+    request_cpu: float = 0.002
+    # 每 MB 下载的 CPU 秒数：读取、SHA-256、写盘
+    download_cpu_per_mb: float = 0.005
+
+
+class Lognormal:
+    """对数正态分布"""
+
+    def __init__(self, mu: float, sigma: float, samples: int = 0):
+        self.mu = mu
+        self.sigma = sigma
+        self.samples = samples
+
+    @classmethod
+    def from_median(cls, median: float, sigma: float) -> "Lognormal":
+        return cls(math.log(max(median, 1e-3)), sigma)
+
+    @classmethod
+    def fit(cls, values: Sequence[float]) -> Optional["Lognormal"]:
+        """按对数值的均值和标准差拟合，样本不足时返回 None"""
+        logs = [math.log(max(v, 1e-3)) for v in values if v == v and v >= 0]
+        if len(logs) < MIN_SAMPLES:
+            return None
+        mu = sum(logs) / len(logs)
+        sigma = math.sqrt(sum((x - mu) ** 2 for x in logs) / (len(logs) - 1))
+        return cls(mu, sigma, len(logs))
+
+    @property
+    def median(self) -> float:
+        return math.exp(self.mu)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+class LatencyProfile:
+    """按任务属性分组的运行/排队耗时分布和失败率"""
+
+    def __init__(self):
+        # 键为逐级变粗的分组元组，见 _run_keys / _queue_keys
+        self.run: Dict[tuple, Lognormal] = {}
+        self.queue: Dict[tuple, Lognormal] = {}
+        self.failure: Dict[tuple, Tuple[int, int]] = {}
+
+    @staticmethod
+    def _run_keys(job: Dict[str, Any]) -> List[tuple]:
+        model, tier = job["model"], job["service_tier"]
+        resolution, duration = job["resolution"], job["duration"]
+        # 不含时长的分组按每秒视频的耗时拟合，使用时乘以任务时长
+        return [
+            ("run", model, tier, resolution, duration),
+            ("run", model, resolution, duration),
+            ("run/s", model, resolution),
+            ("run/s", model),
+        ]
+
+    @staticmethod
+    def _queue_keys(job: Dict[str, Any]) -> List[tuple]:
+        return [("queue", job["model"], job["service_tier"]), ("queue", job["service_tier"])]
+
+    @staticmethod
+    def _failure_keys(job: Dict[str, Any]) -> List[tuple]:
+        return [("failure", job["model"], job["service_tier"]), ("failure", job["model"]), ("failure",)]
+
+    def sample_run(self, job: Dict[str, Any], rng: random.Random) -> float:
+        for key in self._run_keys(job):
+            if key in self.run:
+                scale = job["duration"] if key[0] == "run/s" else 1
+                return self.run[key].sample(rng) * scale
+        median = (DEFAULT_RUN_MEDIAN_5S_720P * RESOLUTION_RUN_FACTOR.get(job["resolution"], 1.0)
+                  * job["duration"] / 5)
+        return Lognormal.from_median(median, DEFAULT_RUN_SIGMA).sample(rng)
+
+    def queue_model(self, job: Dict[str, Any]) -> Lognormal:
+        for key in self._queue_keys(job):
+            if key in self.queue:
+                return self.queue[key]
+        median, sigma = DEFAULT_QUEUE.get(job["service_tier"], DEFAULT_QUEUE["default"])
+        return Lognormal.from_median(median, sigma)
+
+    def failure_rate(self, job: Dict[str, Any]) -> float:
+        for key in self._failure_keys(job):
+            failed, total = self.failure.get(key, (0, 0))
+            if total >= MIN_SAMPLES:
+                return failed / total
+        return DEFAULT_FAILURE_RATE
+
+    @classmethod
+    def from_ledger(cls, path: str, since: Optional[float] = None) -> "LatencyProfile":
+        """
+        从用量账本拟合
+
+        使用成功和失败的任务；没有 queue/run 拆分的记录（未观察到开始运行时间）
+        把创建到结束的总耗时计为运行耗时。
+        """
+        from usage_ledger import UsageLedger
+
+        ledger = UsageLedger(path)
+        data = ledger.load(("model", "resolution", "tier", "status", "duration", "created_at",
+                            "updated_at", "queue_seconds", "run_seconds"))
+        names = {column: ledger.dictionaries[column] for column in ("model", "resolution", "tier", "status")}
+        data = {column: values.tolist() for column, values in data.items()}
+        runs: Dict[tuple, List[float]] = {}
+        queues: Dict[tuple, List[float]] = {}
+        profile = cls()
+
+        for i in range(len(data["created_at"])):
+            if since is not None and data["created_at"][i] < since:
+                continue
+            status = names["status"][data["status"][i]]
+            if status not in ("succeeded", "failed"):
+                continue
+            job = {
+                "model": names["model"][data["model"][i]],
+                "resolution": names["resolution"][data["resolution"][i]],
+                "service_tier": names["tier"][data["tier"][i]] or "default",
+                "duration": data["duration"][i],
+            }
+            for key in cls._failure_keys(job):
+                failed, total = profile.failure.get(key, (0, 0))
+                profile.failure[key] = (failed + (status == "failed"), total + 1)
+            if status != "succeeded":
+                continue
+            run, queue = data["run_seconds"][i], data["queue_seconds"][i]
+            if run != run:
+                run = data["updated_at"][i] - data["created_at"][i]
+                queue = float("nan")
+            for key in cls._run_keys(job):
+                if key[0] == "run":
+                    runs.setdefault(key, []).append(run)
+                elif job["duration"] > 0:
+                    runs.setdefault(key, []).append(run / job["duration"])
+            if queue == queue:
+                for key in cls._queue_keys(job):
+                    queues.setdefault(key, []).append(queue)
+
+        for target, samples in ((profile.run, runs), (profile.queue, queues)):
+            for key, values in samples.items():
+                fitted = Lognormal.fit(values)
+                if fitted is not None:
+                    target[key] = fitted
+        return profile
+
+    def describe(self) -> List[str]:
+        """拟合出的分组（用于输出）"""
+        lines = []
+        for key, model in sorted(self.run.items(), key=lambda item: str(item[0])):
+            if len(key) == 5:
+                lines.append(f"  run   {'/'.join(str(k) for k in key[1:]):<55} "
+                             f"median {model.median:7.1f}s  sigma {model.sigma:.2f}  n={model.samples}")
+        for key, model in sorted(self.queue.items(), key=lambda item: str(item[0])):
+            if len(key) == 3:
+                lines.append(f"  queue {'/'.join(str(k) for k in key[1:]):<55} "
+                             f"median {model.median:7.1f}s  sigma {model.sigma:.2f}  n={model.samples}")
+        return lines
+
+
+@dataclass
+class SimTask:
+    job: Dict[str, Any]
+    arrival: float
+    created: float = 0.0
+    started: Optional[float] = None
+    ended: Optional[float] = None
+    status: str = "pending"
+    done: float = 0.0
+
+
+@dataclass
+class PoolState:
+    """一个 (model, tier) 配额的服务端状态"""
+    quota: Quota
+    window: Deque[float] = field(default_factory=deque)
+    waiting: Deque[SimTask] = field(default_factory=deque)
+    running: int = 0
+    busy_seconds: float = 0.0
+    creates: int = 0
+    throttled: int = 0
+    peak_waiting: int = 0
+
+
+class Simulation:
+    """单次模拟"""
+
+    def __init__(
+        self,
+        jobs: List[Dict[str, Any]],
+        quotas: Callable[[str, str], Quota],
+        settings: ClientSettings,
+        profile: LatencyProfile,
+        costs: CostModel,
+        seed: int = 0
+    ):
+        self.jobs = jobs
+        self.quota_for = quotas
+        self.settings = settings
+        self.profile = profile
+        self.costs = costs
+        self.rng = random.Random(seed)
+
+        self._events: List[tuple] = []
+        self._seq = itertools.count()
+        self.now = 0.0
+        self.pools: Dict[Tuple[str, str], PoolState] = {}
+        self.pending: Deque[SimTask] = deque()
+        self.in_flight = 0
+        self.next_submit = 0.0
+        self.downloads: Deque[SimTask] = deque()
+        self.active_downloads = 0
+        self.tasks: List[SimTask] = []
+
+        self.requests = 0
+        self.polls = 0
+        self.download_mb = 0.0
+
+    def _at(self, when: float, handler: Callable, *args):
+        heapq.heappush(self._events, (when, next(self._seq), handler, args))
+
+    def _pool(self, job: Dict[str, Any]) -> PoolState:
+        key = (job["model"], job["service_tier"])
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = PoolState(self.quota_for(*key))
+        return pool
+
+    def run(self) -> Dict[str, Any]:
+        for job in self.jobs:
+            task = SimTask(job, float(job.get("arrive_after") or 0))
+            self.tasks.append(task)
+            self._at(task.arrival, self._arrive, task)
+        while self._events:
+            self.now, _, handler, args = heapq.heappop(self._events)
+            handler(*args)
+        return self._summary()
+
+    # 客户端
+
+    def _arrive(self, task: SimTask):
+        self.pending.append(task)
+        self._fill()
+
+    def _fill(self):
+        while self.in_flight < self.settings.concurrency and self.pending:
+            task = self.pending.popleft()
+            self.in_flight += 1
+            when = self.now
+            if self.settings.rpm:
+                when = max(when, self.next_submit)
+                self.next_submit = when + 60.0 / self.settings.rpm
+            self._at(when, self._create, task, 0)
+
+    def _create(self, task: SimTask, attempt: int):
+        self.requests += 1
+        pool = self._pool(task.job)
+        while pool.window and pool.window[0] <= self.now - 60:
+            pool.window.popleft()
+        if len(pool.window) >= pool.quota.rpm:
+            pool.throttled += 1
+            delays = self.settings.retry_delays
+            self._at(self.now + delays[min(attempt, len(delays) - 1)], self._create, task, attempt + 1)
+            return
+        pool.window.append(self.now)
+        pool.creates += 1
+        task.created = self.now
+        task.status = "queued"
+        self._at(self.now + self.profile.queue_model(task.job).sample(self.rng), self._eligible, task)
+        self._at(self.now + task.job["execution_expires_after"], self._expire, task)
+
+    def _observe(self, task: SimTask):
+        """wait_for_completion 从创建起每 poll_interval 轮询一次（首次立即查询）"""
+        interval = self.settings.poll_interval
+        polls = math.ceil((task.ended - task.created) / interval - 1e-9)
+        self.polls += polls + 1
+        self.requests += polls + 1
+        self._at(task.created + polls * interval, self._detected, task)
+
+    def _detected(self, task: SimTask):
+        self.in_flight -= 1
+        self._fill()
+        if task.status == "succeeded" and self.settings.download:
+            self.downloads.append(task)
+            self._start_downloads()
+        else:
+            task.done = self.now
+
+    def _start_downloads(self):
+        while self.active_downloads < self.settings.download_concurrency and self.downloads:
+            task = self.downloads.popleft()
+            self.active_downloads += 1
+            size = VIDEO_MB_PER_SECOND.get(task.job["resolution"], 0.6) * task.job["duration"]
+            self.download_mb += size
+            self._at(self.now + 0.2 + size / self.settings.download_bandwidth, self._downloaded, task)
+
+    def _downloaded(self, task: SimTask):
+        self.active_downloads -= 1
+        task.done = self.now
+        self._start_downloads()
+
+    # 服务端
+
+    def _eligible(self, task: SimTask):
+        if task.ended is not None:
+            return
+        pool = self._pool(task.job)
+        pool.waiting.append(task)
+        pool.peak_waiting = max(pool.peak_waiting, len(pool.waiting))
+        self._dispatch(pool)
+
+    def _dispatch(self, pool: PoolState):
+        while pool.running < pool.quota.concurrency and pool.waiting:
+            task = pool.waiting.popleft()
+            if task.ended is not None:
+                continue
+            pool.running += 1
+            task.started = self.now
+            task.status = "running"
+            self._at(self.now + self.profile.sample_run(task.job, self.rng), self._finish, task)
+
+    def _end(self, task: SimTask, status: str):
+        pool = self._pool(task.job)
+        if task.status == "running":
+            pool.running -= 1
+            pool.busy_seconds += self.now - task.started
+        task.status = status
+        task.ended = self.now
+        self._observe(task)
+        self._dispatch(pool)
+
+    def _finish(self, task: SimTask):
+        if task.ended is None:
+            failed = self.rng.random() < self.profile.failure_rate(task.job)
+            self._end(task, "failed" if failed else "succeeded")
+
+    def _expire(self, task: SimTask):
+        if task.ended is None:
+            self._end(task, "expired")
+
+    def _summary(self) -> Dict[str, Any]:
+        makespan = max((task.done for task in self.tasks), default=0.0)
+        latencies = sorted(task.done - task.arrival for task in self.tasks)
+        statuses: Dict[str, int] = {}
+        for task in self.tasks:
+            statuses[task.status] = statuses.get(task.status, 0) + 1
+        pools = {}
+        for (model, tier), pool in sorted(self.pools.items()):
+            pools[f"{model}/{tier}"] = {
+                "creates": pool.creates,
+                "throttled": pool.throttled,
+                "concurrency_utilization": round(
+                    pool.busy_seconds / (pool.quota.concurrency * makespan), 4) if makespan else 0.0,
+                "rpm_utilization": round(pool.creates / (pool.quota.rpm * makespan / 60), 4) if makespan else 0.0,
+                "peak_waiting": pool.peak_waiting,
+            }
+        return {
+            "makespan": makespan,
+            "statuses": statuses,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p95": percentile(latencies, 0.95),
+            "requests": self.requests,
+            "polls": self.polls,
+            "throttled": sum(pool.throttled for pool in self.pools.values()),
+            "download_mb": round(self.download_mb, 1),
+            "client_cpu_seconds": round(
+                self.requests * self.costs.request_cpu + self.download_mb * self.costs.download_cpu_per_mb, 2),
+            "poll_cpu_seconds": round(self.polls * self.costs.request_cpu, 2),
+            "pools": pools,
+        }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def expand_jobs(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按 count 展开任务并补齐模拟需要的字段"""
+    jobs = []
+    for item in items:
+        job = {
+            "model": item.get("model") or DEFAULT_MODEL,
+            "service_tier": item.get("service_tier") or "default",
+            "resolution": item.get("resolution") or "720p",
+            "duration": int(item.get("duration") or 5),
+            "execution_expires_after": int(item.get("execution_expires_after") or DEFAULT_EXPIRES_AFTER),
+            "arrive_after": float(item.get("arrive_after") or 0),
+        }
+        jobs.extend(dict(job) for _ in range(int(item.get("count", 1))))
+    return jobs
+
+
+def parse_quota(value: str) -> Tuple[Optional[str], str, Quota]:
+    """
+    解析 [MODEL/]TIER:RPM:CONCURRENCY
+
+    Returns:
+        (model 或 None, tier, Quota)
+    """
+    try:
+        scope, rpm, concurrency = value.rsplit(":", 2)
+        model, _, tier = scope.rpartition("/")
+        return model or None, tier, Quota(float(rpm), int(concurrency))
+    except ValueError:
+        raise ValueError(f"Invalid quota {value!r}, expected [MODEL/]TIER:RPM:CONCURRENCY")
+
+
+def quota_lookup(specs: Sequence[Tuple[Optional[str], str, Quota]]) -> Callable[[str, str], Quota]:
+    """模型级配额优先于等级级配额"""
+    table = {(model, tier): quota for model, tier, quota in specs}
+
+    def lookup(model: str, tier: str) -> Quota:
+        quota = table.get((model, tier)) or table.get((None, tier))
+        if quota is None:
+            raise ValueError(f"No quota for {model}/{tier}, add --quota {tier}:RPM:CONCURRENCY")
+        return quota
+    return lookup
+
+
+def simulate(
+    jobs: List[Dict[str, Any]],
+    quotas: Callable[[str, str], Quota],
+    settings: ClientSettings,
+    profile: LatencyProfile,
+    costs: Optional[CostModel] = None,
+    runs: int = 5,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    用不同随机种子模拟 runs 次
+
+    Returns:
+        settings、各次结果中 makespan 的均值/p90/最大值，以及第一次模拟的完整结果（run）
+    """
+    results = [Simulation(jobs, quotas, settings, profile, costs or CostModel(), seed + i).run()
+               for i in range(runs)]
+    makespans = sorted(result["makespan"] for result in results)
+    mean = lambda name: sum(result[name] for result in results) / runs  # noqa: E731
+    return {
+        "settings": asdict(settings),
+        "makespan_mean": round(sum(makespans) / runs, 1),
+        "makespan_p90": round(percentile(makespans, 0.9), 1),
+        "makespan_max": round(makespans[-1], 1),
+        "requests_mean": round(mean("requests")),
+        "polls_mean": round(mean("polls")),
+        "throttled_mean": round(mean("throttled")),
+        "client_cpu_seconds_mean": round(mean("client_cpu_seconds"), 2),
+        "poll_cpu_seconds_mean": round(mean("poll_cpu_seconds"), 2),
+        "run": results[0],
+    }
+
+
+def format_duration(seconds: float) -> str:
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    if seconds >= 60:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds:.0f}s"
+
+
+def format_results(results: List[Dict[str, Any]], deadline: Optional[float] = None) -> str:
+    """格式化各组设置的模拟结果"""
+    lines = [
+        f"{'conc':>5} {'poll':>5} {'rpm':>5}  {'makespan':>9} {'p90':>7}  {'ok/fail/exp':>13} "
+        f"{'polls':>8} {'429s':>6} {'cpu s':>7} {'poll cpu':>8}  quota use (concurrency / rpm)"
+    ]
+    for result in results:
+        settings, run = result["settings"], result["run"]
+        statuses = run["statuses"]
+        outcome = f"{statuses.get('succeeded', 0)}/{statuses.get('failed', 0)}/{statuses.get('expired', 0)}"
+        usage = ", ".join(
+            f"{key.split('/')[-1]} {pool['concurrency_utilization']:.0%}/{pool['rpm_utilization']:.0%}"
+            for key, pool in run["pools"].items()
+        )
+        late = "  !" if deadline is not None and result["makespan_p90"] > deadline else ""
+        lines.append(
+            f"{settings['concurrency']:>5} {settings['poll_interval']:>5g} {format(settings['rpm'], 'g') if settings['rpm'] else '-':>5}  "
+            f"{format_duration(result['makespan_mean']):>9} {format_duration(result['makespan_p90']):>7}  "
+            f"{outcome:>13} {result['polls_mean']:>8} {result['throttled_mean']:>6} "
+            f"{result['client_cpu_seconds_mean']:>7.1f} {result['poll_cpu_seconds_mean']:>8.1f}  {usage}{late}"
+        )
+    if deadline is not None:
+        lines.append(f"! p90 makespan exceeds the deadline of {format_duration(deadline)}")
+    return "\n".join(lines)
+
+
+def _number_list(value: str, cast) -> List:
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate how long a job mix takes under quotas and client settings (no API calls)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # 5,000 mixed jobs; manifest lines may carry "count", e.g. {"resolution": "1080p", "count": 2000}
+  python capacity_sim.py campaign.jsonl --ledger ./ledger --quota default:600:10 --quota flex:600:50
+
+  # Compare client settings (comma-separated values form a grid) against a deadline
+  python capacity_sim.py campaign.jsonl --ledger ./ledger --quota default:600:10 \\
+      --concurrency 10,20,40 --poll-interval 5,15 --deadline 8h
+        """
+    )
+    parser.add_argument("manifest", help="Jobs file (JSON array or JSON lines, keys as in create_task.py plus count)")
+    parser.add_argument(
+        "--ledger",
+        type=str,
+        default=os.environ.get("SEEDANCE_LEDGER_DIR"),
+        help="Usage ledger to fit latency distributions from (default: SEEDANCE_LEDGER_DIR env variable)"
+    )
+    parser.add_argument("--since", type=str, help="Only fit on tasks newer than this age, e.g. 30d")
+    parser.add_argument(
+        "--quota",
+        type=str,
+        action="append",
+        metavar="[MODEL/]TIER:RPM:CONCURRENCY",
+        help="Service quota (repeatable, default: default:600:10 and flex:600:50 - set your account's values)"
+    )
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL, help=f"Default model (default: {DEFAULT_MODEL})")
+    parser.add_argument("--concurrency", type=str, default="10", help="Tasks in flight per client, comma list")
+    parser.add_argument("--poll-interval", type=str, default="5", help="Poll interval seconds, comma list")
+    parser.add_argument("--client-rpm", type=str, help="Client-side create rate limit per minute, comma list")
+    parser.add_argument("--no-download", action="store_true", help="Do not simulate downloads")
+    parser.add_argument("--download-concurrency", type=int, default=4)
+    parser.add_argument("--download-bandwidth", type=float, default=20.0, help="MB/s per download (default: 20)")
+    parser.add_argument("--request-cpu", type=float, default=CostModel.request_cpu,
+                        help=f"Client CPU seconds per API request (default: {CostModel.request_cpu})")
+    parser.add_argument("--runs", type=int, default=5, help="Simulations per setting (default: 5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--deadline", type=str, help="Flag settings whose p90 makespan exceeds this, e.g. 8h")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "capacity_sim")
+
+    try:
+        jobs = expand_jobs(load_jobs(args.manifest, {"model": args.model}))
+        if not jobs:
+            raise ValueError("Manifest contains no jobs")
+        quotas = quota_lookup([parse_quota(value) for value in (args.quota or ["default:600:10", "flex:600:50"])])
+
+        if args.ledger:
+            since = time.time() - parse_age(args.since) if args.since else None
+            profile = LatencyProfile.from_ledger(args.ledger, since=since)
+        else:
+            profile = LatencyProfile()
+
+        grid = itertools.product(
+            _number_list(args.concurrency, int),
+            _number_list(args.poll_interval, float),
+            _number_list(args.client_rpm, float) if args.client_rpm else [None],
+        )
+        costs = CostModel(request_cpu=args.request_cpu)
+        results = []
+        for concurrency, poll_interval, rpm in grid:
+            settings = ClientSettings(
+                concurrency=concurrency,
+                poll_interval=poll_interval,
+                rpm=rpm,
+                download=not args.no_download,
+                download_concurrency=args.download_concurrency,
+                download_bandwidth=args.download_bandwidth,
+            )
+            results.append(simulate(jobs, quotas, settings, profile, costs, runs=args.runs, seed=args.seed))
+
+        deadline = parse_age(args.deadline) if args.deadline else None
+        if args.json:
+            print(json.dumps(results, indent=2, ensure_ascii=False))
+        else:
+            print(f"{len(jobs)} jobs, {args.runs} runs per setting, latency from "
+                  f"{'ledger ' + args.ledger if args.ledger else 'built-in defaults'}")
+            for line in profile.describe():
+                print(line)
+            print(format_results(results, deadline))
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
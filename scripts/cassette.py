@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+HTTP 录制与回放（cassette）
+
+RecordingAdapter 包装 API 连接池适配器，把每次请求/响应连同相对时间写入 JSON Lines 文件；
+写入前去除认证头、API Key、签名 URL 的查询参数和 base64 数据（图片 data URL 等），
+录制文件可以提交到仓库。ReplayAdapter 按录制内容确定性地回放，不访问网络，
+按原速（speed=1）、加速（speed>1）或不等待（speed=0）模拟服务端耗时，
+并统计请求数，用于断言请求次数和耗时预算的性能回归测试。
+
+启用方式：
+- 代码中：with activate(ReplayAdapter(Cassette.load(path))): ... 期间创建的 SeedanceClient 使用该适配器
+- 命令行：设置 SEEDANCE_CASSETTE=文件 和 SEEDANCE_CASSETTE_MODE=record|replay
+  （可选 SEEDANCE_CASSETTE_SPEED），任何 CLI 工具无需修改即可录制或回放
+
+只作用于 API 请求；视频/图片下载走 CDN 会话，不录制。
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+# 录制时保留的响应头（其余如日志 ID、日期、服务端标识不影响客户端行为）
+KEPT_RESPONSE_HEADERS = ("content-type", "retry-after")
+
+# 签名 URL 中需要去除的查询参数
+SECRET_QUERY_PATTERN = re.compile(r"signature|credential|token|security|x-tos-|x-amz-|expires|policy", re.IGNORECASE)
+
+DATA_URL_PATTERN = re.compile(r"^data:([\w/+.-]+);base64,", re.IGNORECASE)
+BASE64_PATTERN = re.compile(r"^[A-Za-z0-9+/=\s]+$")
+URL_PATTERN = re.compile(r"https?://[^\s\"']+")
+
+# 超过该长度且只含 base64 字符的字符串视为二进制数据
+BASE64_MIN_LENGTH = 256
+
+REDACTED = "REDACTED"
+
+
+class CassetteError(Exception):
+    """回放时遇到录制中不存在的请求"""
+    pass
+
+
+def _placeholder(value: str, media_type: Optional[str] = None) -> str:
+    """用长度和摘要替换 base64 数据，回放时仍可比较请求是否携带了相同的数据"""
+    digest = hashlib.sha256(value.encode("ascii", "ignore")).hexdigest()[:16]
+    prefix = f"data:{media_type};base64," if media_type else ""
+    return f"{prefix}<scrubbed {len(value)} chars sha256:{digest}>"
+
+
+def scrub_url(url: str) -> str:
+    """去除 URL 中签名、凭证类查询参数的值"""
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [
+        (key, REDACTED if SECRET_QUERY_PATTERN.search(key) else value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query, safe="/:")))
+
+
+def scrub(value: Any, secrets: Tuple[str, ...] = ()) -> Any:
+    """
+    递归去除 JSON 数据中的敏感内容
+
+    - data URL 和长 base64 字符串替换为长度与摘要
+    - URL 中的签名、凭证参数替换为 REDACTED
+    - secrets 中的字符串（API Key 等，至少 8 个字符）出现在任何位置时替换为 REDACTED
+    """
+    if isinstance(value, dict):
+        return {key: scrub(item, secrets) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item, secrets) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    match = DATA_URL_PATTERN.match(value)
+    if match:
+        return _placeholder(value[match.end():], match.group(1))
+    if len(value) >= BASE64_MIN_LENGTH and BASE64_PATTERN.match(value):
+        return _placeholder(value)
+    value = URL_PATTERN.sub(lambda m: scrub_url(m.group(0)), value)
+    for secret in secrets:
+        # 过短的值（测试用的占位 Key）会误伤普通文本
+        if len(secret) >= 8:
+            value = value.replace(secret, REDACTED)
+    return value
+
+
+def _request_key(method: str, url: str) -> str:
+    """回放匹配键：方法 + 路径 + 排序后的查询参数（不含主机，录制与回放可使用不同 base_url）"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method} {parts.path}" + (f"?{query}" if query else "")
+
+
+def _decode_body(body: Optional[bytes], secrets: Tuple[str, ...]) -> Any:
+    """解析请求/响应体：JSON 按字段去敏，其他内容按文本或 base64 摘要保存"""
+    if not body:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        return {"json": scrub(json.loads(body), secrets)}
+    except ValueError:
+        pass
+    try:
+        return {"text": scrub(body.decode("utf-8"), secrets)}
+    except UnicodeDecodeError:
+        return {"text": _placeholder(base64.b64encode(body).decode("ascii"))}
+
+
+def _encode_body(body: Optional[Dict[str, Any]]) -> bytes:
+    if not body:
+        return b""
+    if "json" in body:
+        return json.dumps(body["json"], ensure_ascii=False).encode("utf-8")
+    return body["text"].encode("utf-8")
+
+
+class Cassette:
+    """一组录制的请求/响应"""
+
+    def __init__(self, interactions: Optional[List[Dict[str, Any]]] = None):
+        self.interactions = interactions or []
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """读取 JSON Lines 录制文件"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for interaction in self.interactions:
+                f.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+
+    @property
+    def server_seconds(self) -> float:
+        """录制中服务端响应耗时之和（原速回放时串行请求的最短耗时）"""
+        return sum(interaction["duration"] for interaction in self.interactions)
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    透传请求并录制（线程安全）
+
+    每次交互立即追加到文件，进程异常退出时已完成的交互不会丢失。
+    """
+
+    def __init__(self, inner: Optional[BaseAdapter] = None, path: Optional[str] = None):
+        """
+        Args:
+            inner: 实际发送请求的适配器；通过 activate() 使用时可为 None，由客户端提供
+            path: 录制文件路径（覆盖已有文件），None 时只保存在 cassette.interactions 中
+        """
+        super().__init__()
+        self.inner = inner
+        self.path = path
+        self.cassette = Cassette()
+        self._lock = threading.Lock()
+        self._start: Optional[float] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text("", encoding="utf-8")
+
+    def send(self, request, **kwargs):
+        start = time.monotonic()
+        with self._lock:
+            if self._start is None:
+                self._start = start
+        response = self.inner.send(request, **kwargs)
+        # 读取完整响应体后再计时（包含传输时间）
+        content = response.content
+        duration = time.monotonic() - start
+
+        authorization = request.headers.get("Authorization", "")
+        secrets = (authorization.split(" ", 1)[-1],) if authorization else ()
+        interaction = {
+            "offset": round(start - self._start, 4),
+            "duration": round(duration, 4),
+            "request": {
+                "method": request.method,
+                "url": scrub(_request_key(request.method, request.url).split(" ", 1)[1], secrets),
+                "body": _decode_body(request.body, secrets),
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": {
+                    name: response.headers[name] for name in KEPT_RESPONSE_HEADERS if name in response.headers
+                },
+                "body": _decode_body(content, secrets),
+            },
+        }
+        with self._lock:
+            self.cassette.interactions.append(interaction)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+        return response
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    按录制内容回放（线程安全，不访问网络）
+
+    请求按 方法 + 路径 + 查询参数 匹配，同一键的多次请求按录制顺序依次返回
+    （例如轮询同一任务时依次返回 queued、running、succeeded）。
+    某个键的录制用完后重复返回最后一个响应并计入 extra；录制中没有的请求抛出 CassetteError。
+    """
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0):
+        """
+        Args:
+            cassette: 录制内容
+            speed: 回放速度，1 为原速，大于 1 加速，0 不等待
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        for interaction in cassette.interactions:
+            key = f"{interaction['request']['method']} {interaction['request']['url']}"
+            self._queues.setdefault(key, deque()).append(interaction)
+        self.requests = 0
+        self.extra = 0
+        self.counts: Dict[str, int] = {}
+
+    def send(self, request, **kwargs):
+        key = _request_key(request.method, request.url)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                interaction = self._last[key] = queue.popleft()
+            elif key in self._last:
+                interaction = self._last[key]
+                self.extra += 1
+            else:
+                raise CassetteError(f"No recorded response for {key}")
+            self.requests += 1
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+        if self.speed > 0:
+            time.sleep(interaction["duration"] / self.speed)
+
+        recorded = interaction["response"]
+        response = Response()
+        response.status_code = recorded["status"]
+        response.reason = "OK" if recorded["status"] < 400 else "Error"
+        response.headers = CaseInsensitiveDict(recorded.get("headers") or {})
+        response._content = _encode_body(recorded.get("body"))
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction["duration"])
+        return response
+
+    @property
+    def unused(self) -> int:
+        """录制中尚未回放的交互数"""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns:
+            requests（回放的请求数）、extra（超出录制的重复请求数）、
+            unused（未回放的录制数）和按请求键的计数
+        """
+        with self._lock:
+            counts = dict(self.counts)
+        return {"requests": self.requests, "extra": self.extra, "unused": self.unused, "counts": counts}
+
+    def close(self):
+        pass
+
+
+_active = threading.local()
+
+
+@contextmanager
+def activate(adapter: BaseAdapter) -> Iterator[BaseAdapter]:
+    """在当前线程中，期间创建的 SeedanceClient 使用 adapter 发送 API 请求"""
+    previous = getattr(_active, "adapter", None)
+    _active.adapter = adapter
+    try:
+        yield adapter
+    finally:
+        _active.adapter = previous
+
+
+def cassette_adapter(inner: BaseAdapter) -> BaseAdapter:
+    """
+    选择客户端使用的 API 适配器：activate() 指定的适配器优先，
+    其次是 SEEDANCE_CASSETTE / SEEDANCE_CASSETTE_MODE 环境变量，否则返回 inner
+
+    Raises:
+        ValueError: SEEDANCE_CASSETTE_MODE 不是 record 或 replay
+    """
+    adapter = getattr(_active, "adapter", None)
+    if adapter is not None:
+        if isinstance(adapter, RecordingAdapter) and adapter.inner is None:
+            adapter.inner = inner
+        return adapter
+
+    path = os.environ.get("SEEDANCE_CASSETTE")
+    if not path:
+        return inner
+    mode = os.environ.get("SEEDANCE_CASSETTE_MODE", "replay")
+    if mode == "record":
+        return RecordingAdapter(inner, path)
+    if mode == "replay":
+        return ReplayAdapter(Cassette.load(path), float(os.environ.get("SEEDANCE_CASSETTE_SPEED", "1")))
+    raise ValueError(f"SEEDANCE_CASSETTE_MODE must be 'record' or 'replay', got {mode!r}")
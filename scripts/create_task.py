@@ -11,25 +11,43 @@ import base64
 import os
 import sys
 import mimetypes
-from typing import Optional, List, Dict, Any
+from typing import Optional
 from pathlib import Path
 
 try:
     from seedance_client import (
         SeedanceClient,
+        CompressionConfig,
         InvalidRequestError,
         TaskStatus,
-        TimeoutError
+        TimeoutError,
+        TransportConfig
     )
+    from transport import default_dns_cache_path
+    from downloader import download_to_sinks, download_video
+    from sinks import open_sinks, writes_stdout
+    from capabilities import compile_payload, validate_job
+    from image_probe import ImageProbeError, auto_ratio, check_image_file, probe_image
+    from profiling import add_profiling_arguments, start_profiling
+    from hooks import add_hook_arguments, format_hook_stats, hooks_from_args
 except ImportError:
     # 添加当前目录到路径
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from seedance_client import (
         SeedanceClient,
+        CompressionConfig,
         InvalidRequestError,
         TaskStatus,
-        TimeoutError
+        TimeoutError,
+        TransportConfig
     )
+    from transport import default_dns_cache_path
+    from downloader import download_to_sinks, download_video
+    from sinks import open_sinks, writes_stdout
+    from capabilities import compile_payload, validate_job
+    from image_probe import ImageProbeError, auto_ratio, check_image_file, probe_image
+    from profiling import add_profiling_arguments, start_profiling
+    from hooks import add_hook_arguments, format_hook_stats, hooks_from_args
 
 
 def read_image_file(file_path: str) -> str:
@@ -50,8 +68,11 @@ def read_image_file(file_path: str) -> str:
     if not path.is_file():
         raise ValueError(f"Path is not a file: {file_path}")
 
-    # 获取 MIME 类型
-    mime_type, _ = mimetypes.guess_type(file_path)
+    # 获取 MIME 类型：优先使用文件头识别的真实格式，无法识别时按扩展名猜测
+    try:
+        mime_type = probe_image(file_path).mime_type
+    except ImageProbeError:
+        mime_type, _ = mimetypes.guess_type(file_path)
     if mime_type is None:
         # 默认为 image/jpeg
         mime_type = "image/jpeg"
@@ -68,59 +89,6 @@ def read_image_file(file_path: str) -> str:
     return f"data:{mime_type};base64,{data}"
 
 
-def build_content_array(
-    prompt: Optional[str],
-    image: Optional[str],
-    last_frame: Optional[str],
-    reference_images: Optional[List[str]],
-    draft_task_id: Optional[str]
-) -> List[Dict[str, Any]]:
-    """
-    构建 content 数组
-
-    Args:
-        prompt: 文本提示词
-        image: 首帧图像路径
-        last_frame: 尾帧图像路径
-        reference_images: 参考图像路径列表
-        draft_task_id: 草稿任务 ID
-
-    Returns:
-        content 数组
-    """
-    content = []
-
-    # 文本提示词
-    if prompt:
-        if len(prompt) > 500:
-            print(f"Warning: Prompt exceeds 500 characters, truncating...")
-            prompt = prompt[:500]
-        content.append({"type": "text", "text": prompt})
-
-    # 草稿任务
-    if draft_task_id:
-        content.append({"type": "draft_task", "draft_task_id": draft_task_id})
-        return content
-
-    # 图像输入
-    if image:
-        image_data = read_image_file(image)
-        content.append({"type": "image", "image_url": image_data, "role": "first_frame"})
-
-    if last_frame:
-        if not image:
-            raise ValueError("--last-frame requires --image to be specified")
-        image_data = read_image_file(last_frame)
-        content.append({"type": "image", "image_url": image_data, "role": "last_frame"})
-
-    if reference_images:
-        for ref_image in reference_images:
-            image_data = read_image_file(ref_image)
-            content.append({"type": "image", "image_url": image_data, "role": "reference_image"})
-
-    return content
-
-
 def parse_bool(value: str) -> bool:
     """解析布尔值"""
     if value.lower() in ("true", "1", "yes", "y", "on"):
@@ -175,54 +143,6 @@ def generate_filename(task_id: str, prompt: Optional[str] = None) -> str:
     return f"video_{task_suffix}.mp4"
 
 
-def download_video(url: str, output_path: Path):
-    """
-    下载视频文件
-
-    Args:
-        url: 视频下载 URL
-        output_path: 输出文件路径
-    """
-    try:
-        import requests
-        from tqdm import tqdm
-    except ImportError:
-        import requests
-        tqdm = None
-
-    print(f"\n📥 Downloading video to: {output_path}")
-
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-
-    total_size = int(response.headers.get("content-length", 0))
-
-    with open(output_path, "wb") as f:
-        if tqdm:
-            progress_bar = tqdm(
-                total=total_size,
-                unit="B",
-                unit_scale=True,
-                desc="Downloading"
-            )
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                progress_bar.update(len(chunk))
-            progress_bar.close()
-        else:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    percent = downloaded / total_size * 100
-                    print(f"\r{percent:.1f}%", end="", flush=True)
-            print()
-
-    file_size_mb = output_path.stat().st_size / 1024 / 1024
-    print(f"✅ Video saved: {output_path} ({file_size_mb:.2f} MB)")
-
-
 def poll_callback(task):
     """轮询回调函数"""
     if task.status == TaskStatus.RUNNING:
@@ -298,15 +218,14 @@ Examples:
         "--resolution",
         type=str,
         choices=["480p", "720p", "1080p"],
-        default="720p",
-        help="Video resolution (default: 720p)"
+        help="Video resolution (default: 720p, 480p for drafts)"
     )
     parser.add_argument(
         "--ratio",
         type=str,
-        choices=["16:9", "4:3", "1:1", "3:4", "9:16", "21:9", "adaptive"],
+        choices=["16:9", "4:3", "1:1", "3:4", "9:16", "21:9", "adaptive", "auto"],
         default="16:9",
-        help="Aspect ratio (default: 16:9)"
+        help="Aspect ratio (default: 16:9); auto picks one from the input image header"
     )
     parser.add_argument(
         "--duration",
@@ -314,6 +233,11 @@ Examples:
         default=5,
         help="Video duration in seconds, 2-12 or -1 for auto (default: 5)"
     )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        help="Frame count instead of duration, 25+4n within 29-289 (not supported by 1.5 pro)"
+    )
 
     # 高级参数
     parser.add_argument(
@@ -364,6 +288,32 @@ Examples:
         help="Return last frame image (true/false, default: false)"
     )
 
+    parser.add_argument(
+        "--compress",
+        choices=["gzip", "zstd"],
+        help="Compress request bodies with inline images above --compress-threshold "
+             "(default: SEEDANCE_REQUEST_COMPRESSION env variable, otherwise off)"
+    )
+    parser.add_argument(
+        "--compress-threshold",
+        type=int,
+        default=CompressionConfig.threshold,
+        help=f"Minimum request body size in bytes to compress (default: {CompressionConfig.threshold})"
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Open the API connection in the background while images are encoded, "
+             "cache DNS results across runs (see --dns-cache) and resume TLS sessions"
+    )
+    parser.add_argument(
+        "--dns-cache",
+        type=str,
+        default=default_dns_cache_path(),
+        help="DNS cache file used with --warmup; empty string disables it "
+             "(default: SEEDANCE_DNS_CACHE env variable, otherwise ~/.cache/seedance/dns.json)"
+    )
+
     # 认证
     parser.add_argument(
         "--api-key",
@@ -387,6 +337,51 @@ Examples:
         type=str,
         help="Output directory for downloaded videos (default: ./output)"
     )
+    parser.add_argument(
+        "--download-queue",
+        type=str,
+        metavar="DB",
+        help="With --auto-download, enqueue the video into this download queue "
+             "database instead of downloading inline (see download_queue.py)"
+    )
+    parser.add_argument(
+        "--sink",
+        type=str,
+        action="append",
+        metavar="SPEC",
+        help="Stream the video into this sink instead of the output directory, without a local temp file: "
+             "a path, s3://bucket/key (requires boto3) or - for stdout; repeatable, {task_id} is substituted "
+             "(implies --auto-download)"
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=os.environ.get("SEEDANCE_STORE_DIR"),
+        metavar="DIR",
+        help="With --auto-download, keep the video in this content-addressed store and "
+             "link it into the output directory (default: SEEDANCE_STORE_DIR env variable)"
+    )
+    parser.add_argument(
+        "--store-quota",
+        type=str,
+        metavar="SIZE",
+        help="Evict least recently used videos from --store above this total size, e.g. 50G "
+             "(default: SEEDANCE_STORE_QUOTA env variable)"
+    )
+    parser.add_argument(
+        "--store-max-age",
+        type=str,
+        metavar="AGE",
+        help="Evict videos in --store not accessed for AGE, e.g. 30d "
+             "(default: SEEDANCE_STORE_MAX_AGE env variable)"
+    )
+    parser.add_argument(
+        "--review",
+        type=str,
+        metavar="DIR",
+        help="Review mode: request the last frame, fetch only that image into this review directory "
+             "and skip the video download until approved (implies --watch, see review.py)"
+    )
     parser.add_argument(
         "--poll-interval",
         type=int,
@@ -399,6 +394,13 @@ Examples:
         default=600,
         help="Timeout in seconds when watching (default: 600)"
     )
+    parser.add_argument(
+        "--ledger",
+        type=str,
+        default=os.environ.get("SEEDANCE_LEDGER_DIR"),
+        help="Record usage and latency of the finished task into this ledger directory "
+             "(default: SEEDANCE_LEDGER_DIR env variable, requires numpy)"
+    )
 
     # 输出格式
     parser.add_argument(
@@ -407,7 +409,10 @@ Examples:
         help="Output raw JSON"
     )
 
+    add_hook_arguments(parser)
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_profiling(args, "create_task")
 
     # 验证参数
     if args.draft_task_id:
@@ -420,11 +425,26 @@ Examples:
     if args.last_frame and not args.image:
         parser.error("--last-frame requires --image to be specified")
 
-    if args.duration != -1 and (args.duration < 2 or args.duration > 12):
-        parser.error("--duration must be between 2 and 12, or -1 for auto")
-
-    # auto-download 意味着 watch
-    if args.auto_download:
+    # 用量账本（提前加载，缺少 numpy 时在创建任务前报错）
+    ledger = None
+    if args.ledger:
+        try:
+            from usage_ledger import UsageLedger, StartTimeObserver
+        except ImportError as e:
+            parser.error(str(e))
+        ledger = UsageLedger(args.ledger)
+
+    if args.sink:
+        args.auto_download = True
+        # 视频写到标准输出时，其余输出改写到 stderr
+        if writes_stdout(args.sink):
+            sys.stdout = sys.stderr
+
+    if args.review and args.auto_download:
+        parser.error("--review cannot be used with --auto-download (approved videos are fetched by review.py)")
+
+    # auto-download、review 和完成后钩子意味着 watch
+    if args.auto_download or args.review or args.on_success or args.on_failure:
         args.watch = True
 
     # 解析参考图像
@@ -434,48 +454,77 @@ Examples:
         if len(reference_images) > 4:
             parser.error("--reference-images supports maximum 4 images")
 
-    # 构建 content 数组
+    prompt = args.prompt
+    if prompt and len(prompt) > 500:
+        print(f"Warning: Prompt exceeds 500 characters, truncating...")
+        prompt = prompt[:500]
+
+    # 尽早创建客户端：--warmup 时后台预热 API 连接（DNS、TCP、TLS），与下面的图片校验和编码并行
     try:
-        content = build_content_array(
-            prompt=args.prompt,
-            image=args.image,
-            last_frame=args.last_frame,
-            reference_images=reference_images,
-            draft_task_id=args.draft_task_id
+        compression = CompressionConfig(args.compress, args.compress_threshold) if args.compress else None
+        transport = TransportConfig(
+            warmup=args.warmup,
+            dns_cache=(args.dns_cache or None) if args.warmup else None,
+            tls_resumption=args.warmup
         )
+        client = SeedanceClient(api_key=args.api_key, compression=compression, transport=transport)
     except Exception as e:
-        print(f"Error processing images: {e}", file=sys.stderr)
+        print(f"❌ Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # 构建请求 payload
-    payload = {
-        "model": args.model,
-        "content": content,
-        "resolution": args.resolution,
-        "ratio": args.ratio,
-        "duration": args.duration,
-        "watermark": parse_bool(args.watermark),
-        "service_tier": args.service,
-        "return_last_frame": parse_bool(args.return_last_frame)
-    }
-
-    # 添加可选参数
-    if args.seed is not None:
-        payload["seed"] = args.seed
-
-    if parse_bool(args.camera_fixed):
-        payload["camera_fixed"] = True
+    # 只读取图片头部，校验格式、尺寸和宽高比
+    input_images = [p for p in [args.image, args.last_frame] + (reference_images or []) if p]
+    image_problems = []
+    for path in input_images:
+        image_problems.extend(f"{path}: {problem}" for problem in check_image_file(path, args.model))
 
-    if parse_bool(args.generate_audio):
-        payload["generate_audio"] = True
+    ratio = args.ratio
+    if ratio == "auto":
+        first_image = args.image or (reference_images[0] if reference_images else None)
+        ratio = auto_ratio(args.model, first_image, reference=bool(reference_images))
+        if not args.json:
+            print(f"📐 Ratio: auto → {ratio}")
 
-    if parse_bool(args.draft):
-        payload["draft"] = True
+    try:
+        draft = parse_bool(args.draft)
+        job = {
+            "model": args.model,
+            "prompt": prompt,
+            "image": args.image,
+            "last_frame": args.last_frame,
+            "reference_images": reference_images,
+            "draft_task_id": args.draft_task_id,
+            "resolution": args.resolution or ("480p" if draft else "720p"),
+            "ratio": ratio,
+            "duration": args.duration,
+            "frames": args.frames,
+            "seed": args.seed,
+            "watermark": parse_bool(args.watermark),
+            "camera_fixed": parse_bool(args.camera_fixed) or None,
+            "generate_audio": parse_bool(args.generate_audio),
+            "draft": draft,
+            "service_tier": args.service,
+            "return_last_frame": parse_bool(args.return_last_frame) or bool(args.review)
+        }
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 先校验参数组合和图片头部，通过后才读取图片
+    problems = image_problems + validate_job(job)
+    if problems:
+        print("❌ Invalid parameters:", file=sys.stderr)
+        for problem in problems:
+            print(f"   - {problem}", file=sys.stderr)
+        sys.exit(1)
 
-    # 创建客户端并发送请求
     try:
-        client = SeedanceClient(api_key=args.api_key)
+        payload = compile_payload(job, read_image=read_image_file)
+    except Exception as e:
+        print(f"Error processing images: {e}", file=sys.stderr)
+        sys.exit(1)
 
+    # 发送请求
+    try:
         # 创建任务
         task = client.create_task(payload)
 
@@ -511,13 +560,18 @@ Examples:
             print(f"   Poll interval: {args.poll_interval}s, Timeout: {args.timeout}s")
             print()
 
+            callback = StartTimeObserver(poll_callback) if ledger else poll_callback
+
             task = client.wait_for_completion(
                 task_id=task.id,
                 poll_interval=args.poll_interval,
                 timeout=args.timeout,
-                callback=poll_callback
+                callback=callback
             )
 
+            if ledger:
+                ledger.append(task, started_at=callback.started_at)
+
             # 清除进度显示
             print("\r" + " " * 60 + "\r", end="", flush=True)
 
@@ -536,6 +590,7 @@ Examples:
                 print(f"   Error: {task.error_message}")
 
             # 成功时显示信息
+            downloaded_path = None
             if task.status == TaskStatus.SUCCEEDED:
                 if task.usage:
                     input_tokens = task.usage.get("input_tokens", 0)
@@ -543,15 +598,57 @@ Examples:
                     print(f"   Usage: {input_tokens} input + {output_tokens} output tokens")
 
                 # 自动下载
-                if task.video_url and args.auto_download:
+                if task.video_url and args.sink:
+                    sinks = open_sinks(args.sink, task_id=task.id)
+                    download_to_sinks(
+                        task.video_url, sinks, session=client.cdn_session, task=task, timeout=client.download_timeout
+                    )
+                elif task.video_url and args.auto_download:
                     output_dir = get_output_dir(args.output_dir)
                     filename = generate_filename(task.id, args.prompt)
                     output_path = output_dir / filename
-                    download_video(task.video_url, output_path)
+                    if args.download_queue:
+                        from download_queue import DownloadQueue
+                        queue = DownloadQueue(args.download_queue)
+                        queue.add_task(task, str(output_path))
+                        queue.close()
+                        print(f"\n📥 Queued download: {output_path}")
+                    elif args.store:
+                        from video_store import open_store
+                        store = open_store(args.store, args.store_quota, args.store_max_age)
+                        try:
+                            store.fetch(
+                                task.id, task.video_url, session=client.cdn_session, task=task,
+                                timeout=client.download_timeout
+                            )
+                            store.link(task.id, output_path)
+                        finally:
+                            store.close()
+                        print(f"📦 Stored in {args.store}, linked: {output_path}")
+                        downloaded_path = output_path
+                    else:
+                        download_video(
+                            task.video_url, output_path, session=client.cdn_session, task=task, timeout=client.download_timeout
+                        )
+                        downloaded_path = output_path
+                elif args.review:
+                    from review import ReviewIndex
+                    index = ReviewIndex(args.review, session=client.cdn_session)
+                    index.add(task, prompt=prompt, first_frame=args.image)
+                    sheet = index.write_sheet()
+                    index.close()
+                    print(f"\n🖼  Last frame added to review: {sheet}")
                 elif task.video_url:
                     print(f"\n📹 Video URL: {task.video_url}")
                     print("   (URL valid for 24 hours)")
 
+            # 完成后钩子
+            hooks = hooks_from_args(args)
+            if hooks:
+                hooks.dispatch(task, path=downloaded_path)
+                hooks.close()
+                print(format_hook_stats(hooks.stats()), file=sys.stderr)
+
     except InvalidRequestError as e:
         print(f"❌ API Error: {e}", file=sys.stderr)
         if e.response:
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+按 URL 过期时间排序的持久化下载队列
+
+生成的视频 URL 只有 24 小时有效期。队列把待下载任务持久化到 SQLite，
+按过期时间从近到远处理；URL 临近过期或返回 403 时通过 get_task 重新获取，
+积压接近截止时间时自动提高下载并发。
+
+多个 run 进程可以共享同一个数据库：认领在 BEGIN IMMEDIATE 事务中完成并附带租约，
+下载期间续约；进程崩溃后租约过期，任务被其他进程重新认领。
+"""
+
+import os
+import sys
+import math
+import time
+import hashlib
+import socket
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from datetime import datetime, timezone
+
+try:
+    import requests
+    from seedance_client import SeedanceClient, TaskInfo, TaskStatus, TransportConfig, parse_timestamp
+    from profiling import add_profiling_arguments, profiled, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import requests
+    from seedance_client import SeedanceClient, TaskInfo, TaskStatus, TransportConfig, parse_timestamp
+    from profiling import add_profiling_arguments, profiled, start_profiling
+
+
+# 旧版本数据库缺少的列
+LEASE_COLUMNS = {
+    "lease_owner": "TEXT",
+    "lease_token": "INTEGER NOT NULL DEFAULT 0",
+    "lease_expires": "REAL",
+}
+
+# 视频 URL 有效期（秒）
+URL_TTL = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    task_id      TEXT PRIMARY KEY,
+    video_url    TEXT,
+    output_path  TEXT NOT NULL,
+    expires_at   REAL NOT NULL,
+    state        TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    not_before   REAL NOT NULL DEFAULT 0,
+    last_error   TEXT,
+    enqueued_at  REAL NOT NULL,
+    finished_at  REAL,
+    lease_owner    TEXT,
+    lease_token    INTEGER NOT NULL DEFAULT 0,
+    lease_expires  REAL
+);
+CREATE INDEX IF NOT EXISTS downloads_pending ON downloads (state, expires_at);
+"""
+
+
+class URLExpiredError(Exception):
+    """视频 URL 已失效（403/410）"""
+    pass
+
+
+class LeaseLostError(Exception):
+    """租约已过期并被其他进程接管"""
+    pass
+
+
+def url_expires_at(url: Optional[str], fallback: Optional[float] = None) -> float:
+    """
+    推算视频 URL 的过期时间
+
+    优先解析签名 URL 中的 X-Tos-Date / X-Tos-Expires（或 X-Amz-*）参数，
+    否则使用 fallback（通常为任务完成时间）加 24 小时。
+
+    Args:
+        url: 视频 URL
+        fallback: 无法从 URL 解析时使用的签发时间戳
+
+    Returns:
+        过期时间的 Unix 时间戳
+    """
+    if url:
+        query = {k.lower(): v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        for prefix in ("x-tos-", "x-amz-"):
+            signed = query.get(prefix + "date")
+            expires = query.get(prefix + "expires")
+            if signed and expires:
+                try:
+                    issued = datetime.strptime(signed, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+                    return issued.timestamp() + int(expires)
+                except ValueError:
+                    break
+    return (fallback if fallback is not None else time.time()) + URL_TTL
+
+
+class DownloadQueue:
+    """基于 SQLite 的持久化下载队列"""
+
+    def __init__(
+        self,
+        path: str,
+        client: Optional[SeedanceClient] = None,
+        refresh_margin: int = 600,
+        max_attempts: int = 5,
+        store=None,
+        lease_seconds: float = 120.0
+    ):
+        """
+        Args:
+            path: SQLite 数据库文件路径
+            client: 用于刷新 URL 的客户端（仅 run 时需要）
+            refresh_margin: 距离过期不足该秒数时先刷新 URL 再下载
+            max_attempts: 单个任务最大尝试次数（包括崩溃后的重新认领）
+            store: VideoStore；已存储的任务不再下载，新下载的视频存入其中
+            lease_seconds: 租约时长，进程崩溃后最多经过该时间被重新认领
+        """
+        self.path = path
+        self.client = client
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        # 多进程同时写入时等待锁而不是立即报错
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(downloads)")}
+        for name, definition in LEASE_COLUMNS.items():
+            if name not in columns:
+                self._db.execute(f"ALTER TABLE downloads ADD COLUMN {name} {definition}")
+
+        # 运行时指标
+        self.concurrency = 0
+        self._avg_download_seconds = 30.0
+        self._completed = 0
+        self._bytes = 0
+
+    def close(self):
+        self._db.close()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _update_leased(self, task_id: str, token: int, sql: str, params: tuple = ()):
+        """仅在仍持有租约时更新，否则抛出 LeaseLostError"""
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE downloads SET {sql} WHERE task_id = ? AND lease_token = ? AND state = 'active'",
+                params + (task_id, token)
+            )
+        if cursor.rowcount == 0:
+            raise LeaseLostError(f"Lease on download {task_id} was lost")
+
+    def add(
+        self,
+        task_id: str,
+        output_path: str,
+        video_url: Optional[str] = None,
+        expires_at: Optional[float] = None
+    ):
+        """
+        加入下载队列（已存在时更新 URL 与输出路径）
+
+        Args:
+            task_id: 任务 ID
+            output_path: 输出文件路径
+            video_url: 视频 URL，为 None 时下载前通过 get_task 获取
+            expires_at: URL 过期时间，默认从 URL 推算
+        """
+        if expires_at is None:
+            expires_at = url_expires_at(video_url)
+        self._execute(
+            """
+            INSERT INTO downloads (task_id, video_url, output_path, expires_at, enqueued_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(task_id) DO UPDATE SET
+                video_url = excluded.video_url,
+                output_path = excluded.output_path,
+                expires_at = excluded.expires_at,
+                state = CASE WHEN state IN ('done', 'active') THEN state ELSE 'pending' END
+            """,
+            (task_id, video_url, str(output_path), expires_at, time.time())
+        )
+
+    def add_task(self, task: TaskInfo, output_path: str):
+        """将已成功的任务加入队列，过期时间按完成时间推算"""
+        issued = parse_timestamp(task.updated_at)
+        self.add(task.id, output_path, task.video_url, url_expires_at(task.video_url, issued))
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        队列指标
+
+        Returns:
+            各状态数量、最旧待下载项剩余时间（headroom）、当前并发等
+        """
+        now = time.time()
+        counts = {row["state"]: row["n"] for row in self._execute(
+            "SELECT state, COUNT(*) AS n FROM downloads GROUP BY state"
+        )}
+        oldest = self._execute(
+            "SELECT task_id, expires_at FROM downloads "
+            "WHERE state IN ('pending', 'active') ORDER BY expires_at LIMIT 1"
+        )
+        return {
+            "pending": counts.get("pending", 0),
+            "active": counts.get("active", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "expired": counts.get("expired", 0),
+            "oldest_task_id": oldest[0]["task_id"] if oldest else None,
+            "oldest_headroom_s": round(oldest[0]["expires_at"] - now, 1) if oldest else None,
+            "concurrency": self.concurrency,
+            "avg_download_s": round(self._avg_download_seconds, 2),
+            "downloaded": self._completed,
+            "downloaded_mb": round(self._bytes / 1024 / 1024, 2),
+        }
+
+    def _desired_concurrency(self, min_workers: int, max_workers: int) -> int:
+        """
+        根据积压量和截止时间计算所需并发
+
+        以平均下载耗时估算按当前并发清空积压所需的时间，
+        确保最紧迫项的剩余时间内能完成全部积压（留出一倍余量）。
+        """
+        rows = self._execute(
+            "SELECT COUNT(*) AS n, MIN(expires_at) AS deadline FROM downloads "
+            "WHERE state = 'pending'"
+        )
+        pending, deadline = rows[0]["n"], rows[0]["deadline"]
+        if not pending:
+            return min_workers
+
+        headroom = max(deadline - time.time() - self.refresh_margin, 1.0)
+        needed = math.ceil(2 * pending * self._avg_download_seconds / headroom)
+        return max(min_workers, min(max_workers, needed))
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """
+        认领最先过期的待下载项，或租约已过期的下载项
+
+        Returns:
+            认领到的行（lease_token 为本次租约的凭据），没有可认领项时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE 立即获取写锁，保证多个进程不会认领同一项
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    # 旧版本留下的 active 行没有租约，视为已过期
+                    row = self._db.execute(
+                        "SELECT task_id, attempts FROM downloads "
+                        "WHERE (state = 'pending' AND not_before <= ?) "
+                        "OR (state = 'active' AND COALESCE(lease_expires, 0) < ?) "
+                        "ORDER BY expires_at LIMIT 1",
+                        (now, now)
+                    ).fetchone()
+                    if row is None or row["attempts"] < self.max_attempts:
+                        break
+                    # 反复崩溃的下载项不再认领
+                    self._db.execute(
+                        "UPDATE downloads SET state = 'failed', lease_owner = NULL, finished_at = ?, "
+                        "last_error = COALESCE(last_error, 'Lease expired too many times') WHERE task_id = ?",
+                        (now, row["task_id"])
+                    )
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE downloads SET state = 'active', lease_owner = ?, lease_token = lease_token + 1, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE task_id = ?",
+                    (self.owner, now + self.lease_seconds, row["task_id"])
+                )
+                claimed = self._db.execute(
+                    "SELECT * FROM downloads WHERE task_id = ?", (row["task_id"],)
+                ).fetchone()
+                self._db.execute("COMMIT")
+                return claimed
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _extend(self, task_id: str, token: int):
+        """续约"""
+        self._update_leased(task_id, token, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def _refresh(self, task_id: str, token: int) -> Optional[str]:
+        """通过 get_task 获取新的视频 URL"""
+        if self.client is None:
+            return None
+        task = self.client.get_task(task_id)
+        if task.status != TaskStatus.SUCCEEDED or not task.video_url:
+            return None
+        expires_at = url_expires_at(task.video_url, parse_timestamp(task.updated_at))
+        self._update_leased(task_id, token, "video_url = ?, expires_at = ?", (task.video_url, expires_at))
+        return task.video_url
+
+    @profiled("download")
+    def _fetch(self, url: str, output_path: Path, keep_alive=None) -> Tuple[int, str]:
+        """
+        下载到临时文件后原子重命名，返回 (字节数, SHA-256)
+
+        keep_alive 在下载过程中每个数据块后调用（用于续约），抛出异常时中止下载。
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = output_path.with_name(output_path.name + ".part")
+        http = self.client.cdn_session if self.client else requests
+        with http.get(url, stream=True, timeout=(10, 60)) as response:
+            if response.status_code in (403, 410):
+                raise URLExpiredError(f"URL rejected with HTTP {response.status_code}")
+            response.raise_for_status()
+            size = 0
+            hasher = hashlib.sha256()
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    if keep_alive:
+                        keep_alive()
+            if keep_alive:
+                keep_alive()
+        os.replace(part_path, output_path)
+        return size, hasher.hexdigest()
+
+    def _process(self, row: sqlite3.Row):
+        task_id, token = row["task_id"], row["lease_token"]
+        url = row["video_url"]
+        started = time.time()
+        lease_expires = row["lease_expires"]
+
+        def keep_alive():
+            # 剩余租约不足一半时续约；租约已被接管时抛出 LeaseLostError
+            nonlocal lease_expires
+            if lease_expires - time.time() < self.lease_seconds / 2:
+                self._extend(task_id, token)
+                lease_expires = time.time() + self.lease_seconds
+
+        try:
+            # 已在本地存储中的任务只创建链接，不访问网络
+            if self.store is not None and self.store.get(task_id) is not None:
+                self.store.link(task_id, row["output_path"])
+                self._update_leased(
+                    task_id, token,
+                    "state = 'done', last_error = NULL, lease_owner = NULL, finished_at = ?",
+                    (time.time(),)
+                )
+                return
+
+            try:
+                if not url or row["expires_at"] - started < self.refresh_margin:
+                    url = self._refresh(task_id, token) or url
+                if not url:
+                    raise URLExpiredError("No video URL available")
+
+                output_path = Path(row["output_path"])
+                try:
+                    size, digest = self._fetch(url, output_path, keep_alive)
+                except URLExpiredError:
+                    url = self._refresh(task_id, token)
+                    if not url:
+                        raise
+                    size, digest = self._fetch(url, output_path, keep_alive)
+
+                keep_alive()
+                if self.store is not None:
+                    self.store.put_file(task_id, output_path, digest=digest)
+                    self.store.link(task_id, output_path)
+
+            except URLExpiredError as e:
+                self._update_leased(
+                    task_id, token,
+                    "state = 'expired', last_error = ?, lease_owner = NULL, finished_at = ?",
+                    (str(e), time.time())
+                )
+                return
+            except LeaseLostError:
+                raise
+            except Exception as e:
+                # 失败后指数退避，达到最大次数标记为 failed（attempts 已在认领时递增）
+                state = "failed" if row["attempts"] >= self.max_attempts else "pending"
+                retry_at = time.time() + min(5 * 2 ** (row["attempts"] - 1), 300)
+                self._update_leased(
+                    task_id, token,
+                    "state = ?, last_error = ?, not_before = ?, lease_owner = NULL",
+                    (state, str(e), retry_at)
+                )
+                return
+
+            elapsed = time.time() - started
+            self._avg_download_seconds = 0.8 * self._avg_download_seconds + 0.2 * elapsed
+            self._completed += 1
+            self._bytes += size
+            self._update_leased(
+                task_id, token,
+                "state = 'done', last_error = NULL, lease_owner = NULL, finished_at = ?",
+                (time.time(),)
+            )
+        except LeaseLostError:
+            # 其他进程已接管，放弃本次处理
+            return
+
+    def run(
+        self,
+        min_workers: int = 1,
+        max_workers: int = 8,
+        until_empty: bool = True,
+        idle_interval: float = 5.0,
+        on_progress: Optional[callable] = None
+    ):
+        """
+        处理队列
+
+        Args:
+            min_workers: 最小下载并发
+            max_workers: 最大下载并发
+            until_empty: 队列为空时返回；为 False 时持续等待新任务
+            idle_interval: 队列为空时的等待间隔（秒）
+            on_progress: 每完成一项时调用，参数为 metrics()
+        """
+        # 上次运行中断时处于 active 的下载项在租约过期后由 _claim 重新认领
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                self.concurrency = self._desired_concurrency(min_workers, max_workers)
+
+                while len(in_flight) < self.concurrency:
+                    row = self._claim()
+                    if row is None:
+                        break
+                    in_flight.add(executor.submit(self._process, row))
+
+                if not in_flight:
+                    if until_empty and not self.metrics()["pending"]:
+                        return
+                    time.sleep(idle_interval)
+                    continue
+
+                done, in_flight = wait(in_flight, timeout=idle_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                if done and on_progress:
+                    on_progress(self.metrics())
+
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    """格式化队列指标"""
+    headroom = metrics["oldest_headroom_s"]
+    headroom_text = "-" if headroom is None else f"{headroom / 3600:.2f}h ({metrics['oldest_task_id']})"
+    return "\n".join([
+        f"Pending: {metrics['pending']}  Active: {metrics['active']}  Done: {metrics['done']}  "
+        f"Failed: {metrics['failed']}  Expired: {metrics['expired']}",
+        f"Oldest pending headroom: {headroom_text}",
+        f"Concurrency: {metrics['concurrency']}  Avg download: {metrics['avg_download_s']}s",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Expiry-ordered persistent download queue for generated videos",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Enqueue finished tasks
+  python download_queue.py --db downloads.db add <task_id> <task_id> --output-dir ./output
+
+  # Drain the queue with up to 16 parallel downloads
+  python download_queue.py --db downloads.db run --max-workers 16
+
+  # Show backlog and headroom of the most urgent item
+  python download_queue.py --db downloads.db stats
+        """
+    )
+
+    parser.add_argument(
+        "--db",
+        type=str,
+        default="downloads.db",
+        help="Queue database path (default: downloads.db)"
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=os.environ.get("SEEDANCE_STORE_DIR"),
+        help="Keep videos in this content-addressed store and skip tasks already in it "
+             "(default: SEEDANCE_STORE_DIR env variable)"
+    )
+    parser.add_argument(
+        "--store-quota",
+        type=str,
+        metavar="SIZE",
+        help="Evict least recently used videos from --store above this total size, e.g. 50G "
+             "(default: SEEDANCE_STORE_QUOTA env variable)"
+    )
+    parser.add_argument(
+        "--store-max-age",
+        type=str,
+        metavar="AGE",
+        help="Evict videos in --store not accessed for AGE, e.g. 30d "
+             "(default: SEEDANCE_STORE_MAX_AGE env variable)"
+    )
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        help="Override API Key"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output raw JSON"
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Enqueue tasks for download")
+    add_parser.add_argument("task_ids", nargs="+", help="Task IDs to download")
+    add_parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="output",
+        help="Output directory (default: ./output)"
+    )
+
+    run_parser = subparsers.add_parser("run", help="Process the queue")
+    run_parser.add_argument("--min-workers", type=int, default=1, help="Minimum concurrency (default: 1)")
+    run_parser.add_argument("--max-workers", type=int, default=8, help="Maximum concurrency (default: 8)")
+    run_parser.add_argument(
+        "--refresh-margin",
+        type=int,
+        default=600,
+        help="Refresh URLs expiring within this many seconds (default: 600)"
+    )
+    run_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep running and wait for new items instead of exiting when empty"
+    )
+
+    subparsers.add_parser("stats", help="Show queue metrics")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "download_queue")
+
+    try:
+        if args.command == "stats":
+            queue = DownloadQueue(args.db)
+        else:
+            # 下载连接池按最大并发配置
+            transport = TransportConfig(max_concurrency=getattr(args, "max_workers", 10))
+            store = None
+            if args.store:
+                from video_store import open_store
+                store = open_store(args.store, args.store_quota, args.store_max_age)
+            queue = DownloadQueue(
+                args.db,
+                client=SeedanceClient(api_key=args.api_key, transport=transport),
+                refresh_margin=getattr(args, "refresh_margin", 600),
+                store=store
+            )
+
+        if args.command == "add":
+            for task_id in args.task_ids:
+                task = queue.client.get_task(task_id)
+                if task.status != TaskStatus.SUCCEEDED:
+                    print(f"Skipping {task_id}: status {task.status.value}", file=sys.stderr)
+                    continue
+                output_path = Path(args.output_dir) / f"video_{task_id.split('-')[-1]}.mp4"
+                queue.add_task(task, str(output_path))
+                print(f"Enqueued {task_id} -> {output_path}")
+
+        elif args.command == "run":
+            def progress(metrics):
+                if not args.json:
+                    print(
+                        f"\rdone {metrics['done']}  pending {metrics['pending']}  "
+                        f"concurrency {metrics['concurrency']}  headroom {metrics['oldest_headroom_s']}s",
+                        end="", flush=True
+                    )
+
+            queue.run(
+                min_workers=args.min_workers,
+                max_workers=args.max_workers,
+                until_empty=not args.follow,
+                on_progress=progress
+            )
+            if not args.json:
+                print()
+
+        metrics = queue.metrics()
+        if args.json:
+            import json
+            print(json.dumps(metrics, indent=2, ensure_ascii=False))
+        elif args.command != "add":
+            print(format_metrics(metrics))
+
+        queue.close()
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+视频下载
+
+通过客户端的 CDN 会话流式下载生成的视频，复用连接池中的连接。
+下载过程中同步计算校验和，并在写入完成后仅解析 MP4 头部做校验，
+不需要再次完整读取文件。download_to_sinks 把数据流直接写入对象存储、
+标准输出等 sink（见 sinks.py），不经过本地磁盘。
+"""
+
+import os
+import sys
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import requests
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    from mp4_probe import MP4Info, MP4ProbeError, validate_task_video
+    from profiling import profiled
+    from sinks import DEFAULT_BUFFER_BYTES, BufferedSink, FileSink, Sink, StdoutSink, TeeSink
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mp4_probe import MP4Info, MP4ProbeError, validate_task_video
+    from profiling import profiled
+    from sinks import DEFAULT_BUFFER_BYTES, BufferedSink, FileSink, Sink, StdoutSink, TeeSink
+
+
+CHUNK_SIZE = 64 * 1024
+
+# 默认 (连接超时, 读取超时)，避免 CDN 连接停滞时无限等待
+DOWNLOAD_TIMEOUT = (10, 60)
+
+XXHASH_ALGORITHMS = ("xxh64", "xxh3_64", "xxh3_128", "xxh128")
+
+
+@dataclass
+class DownloadResult:
+    """下载结果"""
+    # 本地文件路径（没有 FileSink 时为 None）
+    path: Optional[Path]
+    size: int
+    algorithm: Optional[str] = None
+    digest: Optional[str] = None
+    # 传入 task 时的 MP4 头部信息与校验结果
+    probe: Optional[MP4Info] = None
+    problems: List[str] = field(default_factory=list)
+    # 各 sink 的 close() 结果
+    sinks: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def new_hasher(algorithm: str):
+    """
+    创建增量哈希对象
+
+    Args:
+        algorithm: hashlib 支持的算法名（如 "sha256"），或 xxhash 算法
+            （"xxh64"、"xxh3_64"、"xxh3_128"、"xxh128"，需要安装 xxhash）
+
+    Returns:
+        支持 update()/hexdigest() 的哈希对象
+    """
+    if algorithm in XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ImportError(
+                f"Missing optional dependency for {algorithm}: xxhash. "
+                "Install with: pip install xxhash"
+            )
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+
+def download_video(
+    url: str,
+    output_path: Union[str, Path],
+    session: Optional[requests.Session] = None,
+    hash_algorithm: Optional[str] = "sha256",
+    task: Optional[Any] = None,
+    timeout: Tuple[float, float] = DOWNLOAD_TIMEOUT
+) -> DownloadResult:
+    """
+    下载视频文件
+
+    Args:
+        url: 视频下载 URL
+        output_path: 输出文件路径
+        session: 用于下载的会话（通常为 SeedanceClient.cdn_session），
+            为 None 时使用一次性请求
+        hash_algorithm: 在下载流上增量计算的校验算法，None 表示不计算
+        task: 对应的 TaskInfo；提供时解析 MP4 头部，
+            校验分辨率、时长、帧率和音轨是否与任务一致
+        timeout: (连接超时, 读取超时)，通常为 SeedanceClient.download_timeout
+
+    Returns:
+        DownloadResult
+    """
+    return download_to_sinks(
+        url, [FileSink(output_path)], session=session, hash_algorithm=hash_algorithm, task=task,
+        buffer_bytes=0, timeout=timeout
+    )
+
+
+@profiled("download")
+def download_to_sinks(
+    url: str,
+    sinks: Sequence[Sink],
+    session: Optional[requests.Session] = None,
+    hash_algorithm: Optional[str] = "sha256",
+    task: Optional[Any] = None,
+    buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+    timeout: Tuple[float, float] = DOWNLOAD_TIMEOUT
+) -> DownloadResult:
+    """
+    把视频流直接写入一个或多个 sink（不经过本地临时文件）
+
+    Args:
+        url: 视频下载 URL
+        sinks: 输出目标；多个时同时写入，全部写出成功后才逐个提交（见 TeeSink）
+        session: 用于下载的会话（通常为 SeedanceClient.cdn_session）
+        hash_algorithm: 在下载流上增量计算的校验算法，None 表示不计算
+        task: 对应的 TaskInfo；sinks 中有 FileSink 时解析该文件的 MP4 头部并校验
+        buffer_bytes: 每个 sink 的后台写入缓冲区大小，写入跟不上时阻塞下载（反压）；
+            0 表示在下载线程中同步写入
+        timeout: (连接超时, 读取超时)，通常为 SeedanceClient.download_timeout
+
+    Returns:
+        DownloadResult
+
+    Raises:
+        SinkError: sink 写入失败
+    """
+    files = [sink for sink in sinks if isinstance(sink, FileSink)]
+    # 写入标准输出时，进度信息输出到 stderr
+    log = sys.stderr if any(isinstance(sink, StdoutSink) for sink in sinks) else sys.stdout
+    target = ", ".join(str(sink) for sink in sinks)
+    print(f"\n📥 Downloading video to: {target}", file=log)
+
+    hasher = new_hasher(hash_algorithm) if hash_algorithm else None
+    writers = [BufferedSink(sink, buffer_bytes) if buffer_bytes else sink for sink in sinks]
+    sink = writers[0] if len(writers) == 1 else TeeSink(writers)
+
+    http = session or requests
+    downloaded = 0
+    try:
+        with http.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+
+            total_size = int(response.headers.get("content-length", 0))
+            progress_bar = None
+            if tqdm:
+                progress_bar = tqdm(
+                    total=total_size,
+                    unit="B",
+                    unit_scale=True,
+                    desc="Downloading",
+                    file=log
+                )
+
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                sink.write(chunk)
+                if hasher:
+                    hasher.update(chunk)
+                downloaded += len(chunk)
+                if progress_bar:
+                    progress_bar.update(len(chunk))
+                elif total_size > 0:
+                    percent = downloaded / total_size * 100
+                    print(f"\r{percent:.1f}%", end="", flush=True, file=log)
+
+            if progress_bar:
+                progress_bar.close()
+            else:
+                print(file=log)
+
+        closed = sink.close()
+    except BaseException:
+        sink.abort()
+        raise
+
+    result = DownloadResult(
+        path=files[0].path if files else None,
+        size=downloaded,
+        sinks=closed["sinks"] if len(writers) > 1 else [closed]
+    )
+    print(f"✅ Video saved: {target} ({downloaded / 1024 / 1024:.2f} MB)", file=log)
+
+    if hasher:
+        result.algorithm = hash_algorithm
+        result.digest = hasher.hexdigest()
+        print(f"   {hash_algorithm}: {result.digest}", file=log)
+
+    if task is not None and files:
+        try:
+            result.probe, result.problems = validate_task_video(
+                str(files[0].path), task, expect_audio=task.generate_audio
+            )
+        except MP4ProbeError as e:
+            result.problems = [str(e)]
+
+        if result.probe:
+            info = result.probe
+            fps = f", {info.fps:.2f}fps" if info.fps else ""
+            audio = ", audio" if info.has_audio else ""
+            print(f"   Probe: {info.width}x{info.height}, {info.duration:.2f}s{fps}{audio}", file=log)
+        for problem in result.problems:
+            print(f"   ⚠️  {problem}", file=log)
+
+    return result
@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+"""
+按租户加权公平排队的任务提交
+
+多个团队共用一个 API Key 时，按到达顺序提交会让一个数千任务的批量作业
+占满并发额度数小时，其他团队的交互请求一直排在后面。FairQueue 为每个租户
+维护独立的待提交队列，用加权差额轮转（deficit round robin）决定下一个提交的任务：
+
+- 全局额度：同时处于 queued/running 的任务数（concurrency，任务进入终态后释放，
+  由内部轮询线程检测）和每分钟创建数（rpm，令牌桶）；各租户按权重分享，
+  RPM 按提交顺序消耗，因此同样按权重分配
+- 多个租户积压时，在途任务数低于加权份额的租户优先；其他租户空闲时，
+  积压的租户可以使用全部空闲额度（不浪费额度）
+- 突发额度：在途任务少于 burst 的租户直接提交、不参与轮转，
+  小租户的零星请求只需等待下一个空闲槽位
+- metrics() 按租户给出排队深度、在途数、提交/失败数和等待提交时间的分位数
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+try:
+    from seedance_client import (
+        SeedanceClient,
+        TaskInfo,
+        TaskStatus,
+        TransportConfig,
+        ResilienceConfig,
+        RateLimiter,
+        RateLimitError,
+        ValidationError,
+    )
+    from resilience import LatencyTracker
+    from capabilities import compile_payload
+    from work_queue import load_jobs
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import (
+        SeedanceClient,
+        TaskInfo,
+        TaskStatus,
+        TransportConfig,
+        ResilienceConfig,
+        RateLimiter,
+        RateLimitError,
+        ValidationError,
+    )
+    from resilience import LatencyTracker
+    from capabilities import compile_payload
+    from work_queue import load_jobs
+    from profiling import add_profiling_arguments, start_profiling
+
+
+TERMINAL_STATUSES = (TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.EXPIRED, TaskStatus.CANCELLED)
+
+
+@dataclass
+class TenantConfig:
+    """租户的权重与突发额度"""
+    # 多个租户积压时分得的额度比例与权重成正比
+    weight: float = 1.0
+    # 在途任务少于该数时直接提交，不参与轮转
+    burst: int = 1
+    # 在途任务上限，None 表示可以使用全部空闲额度
+    max_in_flight: Optional[int] = None
+
+    def __post_init__(self):
+        if self.weight <= 0:
+            raise ValueError("Tenant weight must be positive")
+        if self.burst < 0:
+            raise ValueError("Tenant burst must not be negative")
+
+
+def parse_tenant(value: str) -> tuple:
+    """
+    解析 NAME=WEIGHT[:BURST[:MAX_IN_FLIGHT]]
+
+    Returns:
+        (租户名, TenantConfig)
+    """
+    name, sep, spec = value.partition("=")
+    if not sep or not name.strip():
+        raise ValueError(f"Invalid tenant: {value} (expected NAME=WEIGHT[:BURST[:MAX_IN_FLIGHT]])")
+    parts = spec.split(":")
+    if len(parts) > 3:
+        raise ValueError(f"Invalid tenant: {value} (expected NAME=WEIGHT[:BURST[:MAX_IN_FLIGHT]])")
+    parts += [""] * (3 - len(parts))
+    config = TenantConfig(
+        weight=float(parts[0]),
+        burst=int(parts[1]) if parts[1] else TenantConfig.burst,
+        max_in_flight=int(parts[2]) if parts[2] else None
+    )
+    return name.strip(), config
+
+
+@dataclass
+class FairJob:
+    """一个待提交/已提交的任务"""
+    tenant: str
+    payload: Dict[str, Any]
+    queued_at: float
+    name: Optional[str] = None
+    task_id: Optional[str] = None
+    submitted_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # 结果为创建的 TaskInfo
+    created: Future = field(default_factory=Future, repr=False)
+    # 结果为终态 TaskInfo
+    done: Future = field(default_factory=Future, repr=False)
+
+
+class TenantState:
+    """单个租户的队列与统计（由 FairQueue 的锁保护）"""
+
+    def __init__(self, name: str, config: TenantConfig, window: int):
+        self.name = name
+        self.config = config
+        self.queue: deque = deque()
+        self.deficit = 0.0
+        self.in_flight = 0
+        self.submitted = 0
+        self.failed = 0
+        self.throttled = 0
+        self.max_queued = 0
+        self.wait = LatencyTracker(window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        def seconds(q: float) -> Optional[float]:
+            value = self.wait.quantile(q, 1)
+            return None if value is None else round(value, 3)
+
+        return {
+            "weight": self.config.weight,
+            "queued": len(self.queue),
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "wait_p50_s": seconds(0.5),
+            "wait_p95_s": seconds(0.95),
+            "wait_max_s": seconds(1.0),
+        }
+
+
+class FairQueue:
+    """在共享的并发和 RPM 额度内按租户加权公平地提交任务（线程安全）"""
+
+    def __init__(
+        self,
+        client: SeedanceClient,
+        concurrency: int,
+        rpm: Optional[float] = None,
+        tenants: Optional[Dict[str, TenantConfig]] = None,
+        default_tenant: Optional[TenantConfig] = None,
+        poll_interval: float = 5.0,
+        quantum: float = 1.0,
+        throttle_backoff: float = 5.0,
+        window: int = 500
+    ):
+        """
+        Args:
+            client: API 客户端
+            concurrency: 我方同时处于 queued/running 的任务上限
+            rpm: 每分钟最多创建的任务数，None 表示不限
+            tenants: {租户名: TenantConfig}；未列出的租户使用 default_tenant
+            default_tenant: 未配置租户的默认配置（默认权重 1、突发 1）
+            poll_interval: 在途任务状态轮询间隔（秒），终态后释放额度
+            quantum: 每轮每单位权重增加的差额（任务数）
+            throttle_backoff: 创建遇到限流时暂停提交的时间（秒），任务放回其租户队首
+            window: 计算等待时间分位数使用的最近样本数
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.client = client
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.poll_interval = poll_interval
+        self.quantum = quantum
+        self.throttle_backoff = throttle_backoff
+        self.default_tenant = default_tenant or TenantConfig()
+        self._window = window
+        self._configs = dict(tenants or {})
+        self._tenants: Dict[str, TenantState] = {}
+        # 有待提交任务的租户，按轮转顺序排列，队首为当前租户
+        self._active: deque = deque()
+        self._in_flight: Dict[str, FairJob] = {}
+        self._dispatching = 0
+        self._paused_until = 0.0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._bucket = RateLimiter(rpm / 60.0, burst=max(1, int(rpm // 60))) if rpm else None
+        self._executor = ThreadPoolExecutor(max_workers=min(concurrency, 8), thread_name_prefix="fair-submit")
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, name="fair-dispatch", daemon=True),
+            threading.Thread(target=self._poll_loop, name="fair-poll", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> "FairQueue":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _tenant(self, name: str) -> TenantState:
+        state = self._tenants.get(name)
+        if state is None:
+            config = self._configs.get(name, self.default_tenant)
+            state = self._tenants[name] = TenantState(name, config, self._window)
+        return state
+
+    def configure(self, tenant: str, config: TenantConfig):
+        """设置或修改租户配置（对之后的调度生效）"""
+        with self._changed:
+            self._configs[tenant] = config
+            if tenant in self._tenants:
+                self._tenants[tenant].config = config
+            self._changed.notify_all()
+
+    def submit(self, tenant: str, payload: Dict[str, Any], name: Optional[str] = None) -> FairJob:
+        """
+        加入租户的待提交队列，立即返回
+
+        Args:
+            tenant: 租户名
+            payload: 创建任务 payload
+            name: 任务名称
+
+        Returns:
+            FairJob；job.created 在提交后得到 TaskInfo（或异常），job.done 在任务终态后得到 TaskInfo
+        """
+        job = FairJob(tenant, payload, time.monotonic(), name)
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("FairQueue is closed")
+            state = self._tenant(tenant)
+            state.queue.append(job)
+            state.max_queued = max(state.max_queued, len(state.queue))
+            if state not in self._active:
+                self._active.append(state)
+            self._changed.notify_all()
+        return job
+
+    def create_task(self, tenant: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> TaskInfo:
+        """
+        排队并等待提交，与 SeedanceClient.create_task 用法一致
+
+        Raises:
+            concurrent.futures.TimeoutError: timeout 秒内未轮到提交
+            client.create_task 抛出的异常
+        """
+        return self.submit(tenant, payload).created.result(timeout)
+
+    def _eligible(self, state: TenantState) -> bool:
+        cap = state.config.max_in_flight
+        return bool(state.queue) and (cap is None or state.in_flight < cap)
+
+    def _pop(self, state: TenantState) -> FairJob:
+        job = state.queue.popleft()
+        if not state.queue:
+            # 队列清空的租户离开轮转，差额不累积
+            self._active.remove(state)
+            state.deficit = 0.0
+        return job
+
+    def _next_locked(self) -> Optional[FairJob]:
+        """按突发额度、加权份额和差额轮转选出下一个任务"""
+        eligible = [state for state in self._active if self._eligible(state)]
+        if not eligible:
+            return None
+        for state in eligible:
+            if state.in_flight < state.config.burst:
+                return self._pop(state)
+
+        total = sum(state.config.weight for state in eligible)
+        under = [state for state in eligible if state.in_flight < self.concurrency * state.config.weight / total]
+        candidates = under or eligible
+        while True:
+            state = self._active[0]
+            if state in candidates:
+                if state.deficit < 1:
+                    state.deficit += self.quantum * state.config.weight
+                if state.deficit >= 1:
+                    state.deficit -= 1
+                    job = self._pop(state)
+                    if state.queue and state.deficit < 1:
+                        self._active.rotate(-1)
+                    return job
+            self._active.rotate(-1)
+
+    def _dispatchable(self) -> bool:
+        return (
+            len(self._in_flight) + self._dispatching < self.concurrency
+            and any(self._eligible(state) for state in self._active)
+        )
+
+    def _dispatch_loop(self):
+        while True:
+            with self._changed:
+                while not self._closed and not self._dispatchable():
+                    self._changed.wait()
+                if self._closed:
+                    return
+                pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+                continue
+            with self._changed:
+                if self._closed:
+                    return
+                job = self._next_locked() if self._dispatchable() else None
+                if job is None:
+                    continue
+                state = self._tenants[job.tenant]
+                state.in_flight += 1
+                self._dispatching += 1
+            # 选出任务后才取令牌，没有可提交的任务时不消耗令牌
+            if self._bucket:
+                self._bucket.acquire()
+                # 等待令牌期间遇到限流时，等暂停结束再提交
+                pause = self._paused_until - time.monotonic()
+                while pause > 0 and not self._closed:
+                    time.sleep(pause)
+                    pause = self._paused_until - time.monotonic()
+            with self._changed:
+                closed = self._closed
+                if closed:
+                    state.in_flight -= 1
+                    self._dispatching -= 1
+                else:
+                    state.wait.record(time.monotonic() - job.queued_at)
+            if closed:
+                error = RuntimeError("FairQueue closed before the job was submitted")
+                job.created.set_exception(error)
+                job.done.set_exception(error)
+                return
+            self._executor.submit(self._create, job)
+
+    def _create(self, job: FairJob):
+        state = self._tenants[job.tenant]
+        try:
+            task = self.client.create_task(job.payload)
+        except RateLimitError:
+            # 账号级限流：放回租户队首，暂停提交；已关闭时不再放回，直接结束
+            with self._changed:
+                state.in_flight -= 1
+                state.throttled += 1
+                self._dispatching -= 1
+                closed = self._closed
+                if not closed:
+                    state.queue.appendleft(job)
+                    if state not in self._active:
+                        self._active.append(state)
+                    self._paused_until = time.monotonic() + self.throttle_backoff
+                self._changed.notify_all()
+            if closed:
+                error = RuntimeError("FairQueue closed before the job was submitted")
+                job.created.set_exception(error)
+                job.done.set_exception(error)
+            return
+        except Exception as e:
+            with self._changed:
+                state.in_flight -= 1
+                state.failed += 1
+                self._dispatching -= 1
+                self._changed.notify_all()
+            job.created.set_exception(e)
+            job.done.set_exception(e)
+            return
+
+        job.task_id = task.id
+        job.submitted_at = time.monotonic()
+        with self._changed:
+            state.submitted += 1
+            self._dispatching -= 1
+            self._in_flight[task.id] = job
+            self._changed.notify_all()
+        job.created.set_result(task)
+
+    def _poll_loop(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._closed or self._in_flight)
+                if self._closed:
+                    return
+                jobs = list(self._in_flight.values())
+            futures = self.client.get_many([job.task_id for job in jobs])
+            for job, result in zip(jobs, self.client.iter_results(futures, return_exceptions=True)):
+                if not isinstance(result, Exception) and result.status in TERMINAL_STATUSES:
+                    self._finish(job, result)
+            with self._changed:
+                self._changed.wait_for(lambda: self._closed, self.poll_interval)
+
+    def _finish(self, job: FairJob, task: TaskInfo):
+        job.finished_at = time.monotonic()
+        with self._changed:
+            if self._in_flight.pop(job.task_id, None) is None:
+                return
+            self._tenants[job.tenant].in_flight -= 1
+            self._changed.notify_all()
+        job.done.set_result(task)
+
+    def task_done(self, task_id: str, task: Optional[TaskInfo] = None):
+        """调用方已确认任务进入终态时立即释放额度，不等下一次轮询"""
+        with self._lock:
+            job = self._in_flight.get(task_id)
+        if job is not None:
+            self._finish(job, task or self.client.get_task(task_id))
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待所有任务提交并进入终态
+
+        Returns:
+            是否在超时前完成
+        """
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: not self._active and not self._in_flight and not self._dispatching, timeout
+            )
+
+    def close(self):
+        """停止提交和轮询；尚未提交的任务以 RuntimeError 结束，已提交的任务不会被取消"""
+        with self._changed:
+            self._closed = True
+            pending = [job for state in self._active for job in state.queue]
+            for state in self._active:
+                state.queue.clear()
+            self._active.clear()
+            self._changed.notify_all()
+        for job in pending:
+            error = RuntimeError("FairQueue closed before the job was submitted")
+            job.created.set_exception(error)
+            job.done.set_exception(error)
+        for thread in self._threads:
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns:
+            {concurrency, rpm, in_flight, queued, tenants: {租户名: {weight, queued, max_queued,
+            in_flight, submitted, failed, throttled, wait_p50_s, wait_p95_s, wait_max_s}}}；
+            wait 为进入队列到开始提交的时间
+        """
+        with self._lock:
+            tenants = {name: state.snapshot() for name, state in sorted(self._tenants.items())}
+            return {
+                "concurrency": self.concurrency,
+                "rpm": self.rpm,
+                "in_flight": len(self._in_flight),
+                "queued": sum(len(state.queue) for state in self._active),
+                "tenants": tenants,
+            }
+
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    """格式化租户指标"""
+    def cell(value):
+        return "-" if value is None else f"{value:g}"
+
+    lines = [
+        f"In flight {metrics['in_flight']}/{metrics['concurrency']}  Queued {metrics['queued']}"
+        + (f"  RPM {metrics['rpm']:g}" if metrics["rpm"] else ""),
+        f"{'Tenant':<16} {'Weight':>6} {'Queued':>6} {'Max q':>6} {'Flight':>6} {'Done':>6} {'Failed':>6} "
+        f"{'Wait p50':>9} {'Wait p95':>9} {'Wait max':>9}",
+    ]
+    for name, row in metrics["tenants"].items():
+        lines.append(
+            f"{name:<16} {row['weight']:>6g} {row['queued']:>6} {row['max_queued']:>6} {row['in_flight']:>6} "
+            f"{row['submitted']:>6} {row['failed']:>6} {cell(row['wait_p50_s']):>9} "
+            f"{cell(row['wait_p95_s']):>9} {cell(row['wait_max_s']):>9}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Submit jobs of several tenants with weighted fair queuing over one concurrency/RPM budget",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run a job file (JSON array or JSON lines with a "tenant" key)
+  python fair_queue.py jobs.jsonl --concurrency 10 --rpm 60
+
+  # Give the studio team 3x the batch team's share and 2 burst slots,
+  # cap the batch team at 8 tasks in flight
+  python fair_queue.py jobs.jsonl --concurrency 10 --tenant studio=3:2 --tenant batch=1:0:8
+
+Job file line:
+  {"prompt": "...", "tenant": "studio", "name": "trailer", "arrive_after": 30}
+        """
+    )
+
+    parser.add_argument("file", help="JSON/JSONL file of job objects")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        required=True,
+        help="Maximum of our tasks queued or running at once, shared by all tenants"
+    )
+    parser.add_argument("--rpm", type=float, help="Maximum task creations per minute, shared by all tenants")
+    parser.add_argument(
+        "--tenant",
+        action="append",
+        default=[],
+        metavar="NAME=WEIGHT[:BURST[:MAX]]",
+        help="Tenant weight, burst slots (default: 1) and in-flight cap (repeatable; others get weight 1)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="doubao-seedance-1-5-pro-251215",
+        help="Default model (default: doubao-seedance-1-5-pro-251215)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5,
+        help="Seconds between status polls (default: 5)"
+    )
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        help="Override API Key"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output metrics as JSON"
+    )
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "fair_queue")
+
+    try:
+        tenants = dict(parse_tenant(value) for value in args.tenant)
+
+        from create_task import read_image_file
+        entries = []
+        for index, job in enumerate(load_jobs(args.file, {"model": args.model})):
+            job = dict(job)
+            meta = {key: job.pop(key, None) for key in ("name", "tenant", "arrive_after")}
+            try:
+                payload = compile_payload(job, read_image=read_image_file)
+            except ValidationError as e:
+                raise ValueError(f"job {meta['name'] or index}: {e}")
+            entries.append((meta, payload))
+
+        transport = TransportConfig(max_concurrency=min(max(args.concurrency, 1), 32))
+        client = SeedanceClient(api_key=args.api_key, transport=transport, resilience=ResilienceConfig())
+        with FairQueue(
+            client,
+            concurrency=args.concurrency,
+            rpm=args.rpm,
+            tenants=tenants,
+            poll_interval=args.poll_interval
+        ) as queue:
+            def report(job: FairJob):
+                if args.json:
+                    return
+                error = job.done.exception()
+                detail = f"failed ({error})" if error else f"{job.done.result().status.value} {job.task_id}"
+                print(f"{time.strftime('%H:%M:%S')} [{job.tenant}] {job.name or '-'} {detail}")
+
+            def enqueue(meta, payload):
+                job = queue.submit(meta["tenant"] or "default", payload, meta["name"])
+                job.done.add_done_callback(lambda _: report(job))
+
+            # 立即到达的任务先入队，延迟到达的由定时器提交
+            timers = []
+            for meta, payload in entries:
+                if meta["arrive_after"]:
+                    timers.append(threading.Timer(float(meta["arrive_after"]), enqueue, (meta, payload)))
+                else:
+                    enqueue(meta, payload)
+            for timer in timers:
+                timer.start()
+            for timer in timers:
+                timer.join()
+            queue.wait_idle()
+            metrics = queue.metrics()
+
+        if args.json:
+            print(json.dumps(metrics, indent=2, ensure_ascii=False))
+        else:
+            print()
+            print(format_metrics(metrics))
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
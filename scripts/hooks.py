@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+任务完成后的钩子
+
+任务完成后的转码、缩略图、上传和通知等后续处理如果在轮询线程中同步执行，
+会推迟下一个任务的完成检测和下载。HookRunner 把注册的成功/失败钩子放到
+独立的有界线程池中执行，dispatch() 只入队、立即返回：
+
+- 每个钩子有自己的并发上限，超出时在该钩子的队列中等待，不占用其他钩子的线程
+- 失败后按指数退避重试，超时计为一次失败
+- 命令钩子在子进程中执行，超时时终止子进程；Python 函数钩子在线程池的线程中
+  直接执行（无法被强制终止），返回时已超过 timeout 的计为超时
+- stats() 按钩子给出调用数、失败/超时/重试次数、排队时长和执行耗时分位数
+"""
+
+import os
+import sys
+import json
+import shlex
+import threading
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    from seedance_client import TaskInfo, TaskStatus
+    from resilience import LatencyTracker
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import TaskInfo, TaskStatus
+    from resilience import LatencyTracker
+
+
+EVENTS = ("success", "failure", "any")
+
+FAILURE_STATUSES = (TaskStatus.FAILED, TaskStatus.EXPIRED, TaskStatus.CANCELLED)
+
+
+class HookError(Exception):
+    """钩子执行失败"""
+    pass
+
+
+class HookTimeout(HookError):
+    """钩子执行超时"""
+    pass
+
+
+@dataclass
+class Hook:
+    """一个完成后执行的动作"""
+    name: str
+    # Python 函数（参数为 TaskInfo 和 dispatch 时传入的字段），
+    # 或命令（字符串按 shell 规则拆分，或参数列表；不经过 shell），
+    # 参数中的 {task_id}、{status}、{model}、{video_url}、{last_frame_url}、{error}、
+    # {path}（下载后的本地路径）及 dispatch 时传入的其他字段会被替换，任务 JSON 写入标准输入
+    action: Union[Callable[..., Any], str, Sequence[str]]
+    # success：任务成功后；failure：失败、过期或取消后；any：两者
+    on: str = "success"
+    # 该钩子同时执行的最大数量
+    concurrency: int = 1
+    # 失败后的重试次数
+    retries: int = 0
+    # 第 n 次重试前等待 backoff * 2^(n-1) 秒
+    backoff: float = 1.0
+    # 单次执行的超时（秒），None 表示不限
+    timeout: Optional[float] = None
+
+    def __post_init__(self):
+        if self.on not in EVENTS:
+            raise ValueError(f"Unsupported hook event: {self.on} (choose from {', '.join(EVENTS)})")
+        if self.concurrency < 1:
+            raise ValueError("Hook concurrency must be at least 1")
+        if self.retries < 0:
+            raise ValueError("Hook retries must not be negative")
+        if isinstance(self.action, str):
+            self.action = shlex.split(self.action)
+        if not callable(self.action) and not self.action:
+            raise ValueError(f"Hook {self.name} has an empty command")
+
+    def matches(self, task: TaskInfo) -> bool:
+        if task.status == TaskStatus.SUCCEEDED:
+            return self.on in ("success", "any")
+        if task.status in FAILURE_STATUSES:
+            return self.on in ("failure", "any")
+        return False
+
+
+def task_fields(task: TaskInfo, **extra: Any) -> Dict[str, Any]:
+    """命令参数中可替换的字段（None 替换为空字符串）"""
+    fields = {
+        "task_id": task.id,
+        "status": task.status.value,
+        "model": task.model,
+        "video_url": task.video_url,
+        "last_frame_url": task.last_frame_url,
+        "error": task.error_message,
+        "path": None,
+        **extra,
+    }
+    return {key: "" if value is None else value for key, value in fields.items()}
+
+
+def task_json(task: TaskInfo, **extra: Any) -> str:
+    """写入命令钩子标准输入的任务 JSON"""
+    data = {name: getattr(task, name) for name in TaskInfo.__slots__}
+    data["status"] = task.status.value
+    data.update(extra)
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def run_command(argv: Sequence[str], task: TaskInfo, timeout: Optional[float], **extra: Any) -> int:
+    """
+    执行命令钩子
+
+    Raises:
+        HookTimeout: 超时（子进程已被终止）
+        HookError: 退出码非 0
+    """
+    fields = task_fields(task, **extra)
+    try:
+        args = [arg.format(**fields) for arg in argv]
+    except KeyError as e:
+        raise HookError(f"Unknown field {{{e.args[0]}}} in hook command (available: {', '.join(fields)})")
+    except (ValueError, IndexError) as e:
+        # 参数中的字面花括号需要写成 {{ 和 }}
+        raise HookError(f"Invalid placeholder in hook command ({e}); write literal braces as {{{{ and }}}}")
+    try:
+        completed = subprocess.run(
+            args,
+            input=task_json(task, **extra),
+            text=True,
+            capture_output=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        raise HookTimeout(f"{args[0]} timed out after {timeout:g}s")
+    except OSError as e:
+        raise HookError(f"{args[0]}: {e}")
+    if completed.returncode != 0:
+        detail = completed.stderr.strip().splitlines()[-1:] or [""]
+        raise HookError(f"{args[0]} exited with {completed.returncode}: {detail[0]}".rstrip(": "))
+    return completed.returncode
+
+
+def call_hook(func: Callable[..., Any], timeout: Optional[float], *args: Any, **kwargs: Any) -> Any:
+    """
+    在当前线程（HookRunner 的线程池）中调用函数钩子
+
+    函数无法被强制终止，因此一直占用线程直到返回，并发仍受线程池限制；
+    返回时已超过 timeout 的视为超时，结果被丢弃。
+
+    Raises:
+        HookTimeout: 执行时间超过 timeout
+    """
+    start = time.monotonic()
+    value = func(*args, **kwargs)
+    elapsed = time.monotonic() - start
+    if timeout is not None and elapsed > timeout:
+        raise HookTimeout(f"{getattr(func, '__name__', 'hook')} took {elapsed:.1f}s, over the {timeout:g}s timeout")
+    return value
+
+
+class HookStats:
+    """单个钩子的统计（由 HookRunner 的锁保护）"""
+
+    def __init__(self, window: int):
+        self.dispatched = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.dropped = 0
+        self.running = 0
+        self.last_error: Optional[str] = None
+        # 单次执行耗时，以及从 dispatch 到开始执行的排队时长
+        self.latency = LatencyTracker(window)
+        self.wait = LatencyTracker(window)
+
+    def snapshot(self, queued: int) -> Dict[str, Any]:
+        def ms(tracker: LatencyTracker, q: float) -> Optional[float]:
+            value = tracker.quantile(q, 1)
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            "dispatched": self.dispatched,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "queued": queued,
+            "running": self.running,
+            "p50_ms": ms(self.latency, 0.5),
+            "p95_ms": ms(self.latency, 0.95),
+            "max_ms": ms(self.latency, 1.0),
+            "wait_p95_ms": ms(self.wait, 0.95),
+            "last_error": self.last_error,
+        }
+
+
+class HookRunner:
+    """
+    在有界线程池中执行完成后钩子（线程安全）
+
+    用法::
+
+        with HookRunner(max_workers=4) as hooks:
+            hooks.add(Hook("thumbnail", "ffmpeg -y -i {path} -frames:v 1 {task_id}.jpg", timeout=60))
+            hooks.add(Hook("notify", notify, on="any", retries=3))
+            ...
+            hooks.dispatch(task, path="output/video.mp4")   # 立即返回
+        # 退出时等待已入队的钩子执行完
+    """
+
+    def __init__(self, hooks: Iterable[Hook] = (), max_workers: int = 4, window: int = 200):
+        """
+        Args:
+            hooks: 初始钩子
+            max_workers: 所有钩子共享的最大并发执行数
+            window: 计算耗时分位数使用的最近样本数
+        """
+        self.max_workers = max_workers
+        self._window = window
+        self._hooks: Dict[str, Hook] = {}
+        self._stats: Dict[str, HookStats] = {}
+        self._pending: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+        self._closed = False
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hook")
+        for hook in hooks:
+            self.add(hook)
+
+    def __enter__(self) -> "HookRunner":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, hook: Hook) -> Hook:
+        """注册钩子（名称不能重复）"""
+        with self._lock:
+            if hook.name in self._hooks:
+                raise ValueError(f"Hook already registered: {hook.name}")
+            self._hooks[hook.name] = hook
+            self._stats[hook.name] = HookStats(self._window)
+            self._pending[hook.name] = deque()
+        return hook
+
+    def dispatch(self, task: TaskInfo, **fields: Any) -> int:
+        """
+        为终态任务排入所有匹配的钩子，不等待执行
+
+        Args:
+            task: 终态 TaskInfo；非终态任务不触发任何钩子
+            **fields: 传给钩子的额外字段（如下载后的 path）
+
+        Returns:
+            排入的钩子数
+        """
+        queued = 0
+        now = time.monotonic()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HookRunner is closed")
+            for name, hook in self._hooks.items():
+                if not hook.matches(task):
+                    continue
+                self._pending[name].append((task, fields, now))
+                self._stats[name].dispatched += 1
+                self._outstanding += 1
+                queued += 1
+                self._start_locked(name)
+        return queued
+
+    def _start_locked(self, name: str):
+        hook = self._hooks[name]
+        stats = self._stats[name]
+        pending = self._pending[name]
+        while pending and stats.running < hook.concurrency:
+            task, fields, queued_at = pending.popleft()
+            stats.running += 1
+            self._executor.submit(self._invoke, hook, task, fields, queued_at)
+
+    def _invoke(self, hook: Hook, task: TaskInfo, fields: Dict[str, Any], queued_at: float):
+        stats = self._stats[hook.name]
+        with self._lock:
+            stats.wait.record(time.monotonic() - queued_at)
+        error = None
+        for attempt in range(hook.retries + 1):
+            if attempt:
+                with self._lock:
+                    stats.retries += 1
+                if self._stop.wait(hook.backoff * 2 ** (attempt - 1)):
+                    break
+            start = time.monotonic()
+            try:
+                if callable(hook.action):
+                    call_hook(hook.action, hook.timeout, task, **fields)
+                else:
+                    run_command(hook.action, task, hook.timeout, **fields)
+                error = None
+            except HookTimeout as e:
+                error = e
+                with self._lock:
+                    stats.timeouts += 1
+            except Exception as e:
+                error = e
+            with self._lock:
+                stats.latency.record(time.monotonic() - start)
+            if error is None:
+                break
+
+        with self._lock:
+            if error is None:
+                stats.succeeded += 1
+            else:
+                stats.failed += 1
+                stats.last_error = f"{task.id}: {error}"
+            stats.running -= 1
+            self._outstanding -= 1
+            if not self._stop.is_set():
+                self._start_locked(hook.name)
+            self._idle.notify_all()
+        if error is not None:
+            print(f"⚠️  Hook {hook.name} failed for {task.id}: {error}", file=sys.stderr)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已排入的钩子全部执行完
+
+        Returns:
+            是否在超时前执行完
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self, wait: bool = True, timeout: Optional[float] = None):
+        """
+        停止接收新任务并关闭线程池
+
+        Args:
+            wait: 为 True 时等待已排入的钩子执行完；为 False 时丢弃尚未开始的钩子，
+                正在退避等待的重试不再执行
+            timeout: 等待的最长时间，超时后按 wait=False 处理
+        """
+        with self._lock:
+            self._closed = True
+        if not wait or not self.wait(timeout):
+            self._stop.set()
+            with self._lock:
+                for name, pending in self._pending.items():
+                    self._stats[name].dropped += len(pending)
+                    self._outstanding -= len(pending)
+                    pending.clear()
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {钩子名: 排入/成功/失败/超时/重试/丢弃次数、排队与执行中数量、
+            执行耗时 p50/p95/最大值和排队时长 p95（毫秒）、最近一次错误}
+        """
+        with self._lock:
+            return {name: self._stats[name].snapshot(len(self._pending[name])) for name in self._hooks}
+
+
+def format_hook_stats(stats: Dict[str, Dict[str, Any]]) -> str:
+    """格式化钩子统计"""
+    lines = []
+    for name, entry in stats.items():
+        latency = "-" if entry["p50_ms"] is None else f"p50 {entry['p50_ms']:.0f}ms p95 {entry['p95_ms']:.0f}ms"
+        lines.append(
+            f"  hook {name}: {entry['succeeded']} ok, {entry['failed']} failed "
+            f"({entry['timeouts']} timeouts, {entry['retries']} retries), {latency}"
+        )
+        if entry["last_error"]:
+            lines.append(f"    last error: {entry['last_error']}")
+    return "\n".join(lines)
+
+
+def add_hook_arguments(parser):
+    """为 CLI 添加 --on-success、--on-failure 和钩子执行参数"""
+    group = parser.add_argument_group("hooks")
+    group.add_argument(
+        "--on-success",
+        action="append",
+        metavar="CMD",
+        help="Command to run in the background after a task succeeds; {task_id}, {video_url}, {path}, ... "
+             "are substituted and the task JSON is written to stdin (repeatable)"
+    )
+    group.add_argument(
+        "--on-failure",
+        action="append",
+        metavar="CMD",
+        help="Command to run after a task fails, expires or is cancelled (repeatable)"
+    )
+    group.add_argument("--hook-workers", type=int, default=4, help="Hook commands run at once in total (default: 4)")
+    group.add_argument(
+        "--hook-concurrency",
+        type=int,
+        default=2,
+        help="Runs at once of each hook command (default: 2)"
+    )
+    group.add_argument("--hook-retries", type=int, default=2, help="Retries per failed hook run (default: 2)")
+    group.add_argument("--hook-timeout", type=float, default=300, help="Seconds per hook run (default: 300)")
+
+
+def hooks_from_args(args) -> Optional[HookRunner]:
+    """
+    按 CLI 参数创建 HookRunner
+
+    Returns:
+        HookRunner，未指定 --on-success / --on-failure 时返回 None
+    """
+    hooks: List[Hook] = []
+    for event, commands in (("success", args.on_success), ("failure", args.on_failure)):
+        for index, command in enumerate(commands or [], 1):
+            hooks.append(Hook(
+                f"{event}-{index}",
+                command,
+                on=event,
+                concurrency=args.hook_concurrency,
+                retries=args.hook_retries,
+                timeout=args.hook_timeout
+            ))
+    if not hooks:
+        return None
+    return HookRunner(hooks, max_workers=args.hook_workers)
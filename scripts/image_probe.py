@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+输入图片头部探测
+
+只读取文件头部字节获取真实格式和宽高（JPEG/PNG/WebP/GIF/BMP/TIFF，
+HEIC/HEIF 尽力解析），按 API 限制校验，并根据宽高比建议 ratio。
+不解码图片数据，可以在几秒内预检数千张图片。
+"""
+
+import io
+import os
+import sys
+import math
+import time
+import struct
+import argparse
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    from capabilities import get_capabilities
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from capabilities import get_capabilities
+    from profiling import add_profiling_arguments, start_profiling
+
+
+# API 输入图片限制（volcengine-API.md）
+MAX_FILE_SIZE = 30 * 1024 * 1024
+PIXEL_RANGE = (300, 6000)
+ASPECT_RANGE = (0.4, 2.5)
+
+SUPPORTED_FORMATS = frozenset({"jpeg", "png", "webp", "bmp", "tiff", "gif"})
+HEIC_FORMATS = frozenset({"heic", "heif"})
+
+IMAGE_SUFFIXES = frozenset({
+    ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff", ".gif", ".heic", ".heif"
+})
+
+# 固定宽高比（宽/高）
+FIXED_RATIOS: Dict[str, float] = {
+    "21:9": 21 / 9,
+    "16:9": 16 / 9,
+    "4:3": 4 / 3,
+    "1:1": 1.0,
+    "3:4": 3 / 4,
+    "9:16": 9 / 16,
+}
+
+# 图片宽高比与最接近的固定比例相差超过该比例时，建议使用 adaptive 以减少裁剪
+RATIO_TOLERANCE = 0.03
+
+# JPEG 中携带尺寸的 SOF 标记（排除 DHT/JPG/DAC）
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_HEIF_BRANDS = {b"heic": "heic", b"heix": "heic", b"hevc": "heic", b"heim": "heic",
+                b"heis": "heic", b"mif1": "heif", b"msf1": "heif"}
+_HEIF_SCAN_BYTES = 256 * 1024
+
+
+class ImageProbeError(Exception):
+    """无法识别图片格式或解析尺寸"""
+    pass
+
+
+class ImageHeaderError(ImageProbeError):
+    """已识别格式但文件头无法解析（截断或不常见的布局），无法判断图片是否合法"""
+    pass
+
+
+@dataclass
+class ImageInfo:
+    """图片头部信息"""
+    path: str
+    format: str
+    width: int
+    height: int
+    size: int
+    # EXIF 方向（1 为正常，5-8 表示宽高互换）
+    orientation: int = 1
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format}"
+
+    @property
+    def display_size(self) -> Tuple[int, int]:
+        """按 EXIF 方向旋转后的宽高"""
+        if self.orientation in (5, 6, 7, 8):
+            return self.height, self.width
+        return self.width, self.height
+
+    @property
+    def aspect(self) -> float:
+        width, height = self.display_size
+        return width / height if height else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["aspect"] = round(self.aspect, 4)
+        return data
+
+
+def _read_tiff_ifd0(f: BinaryIO) -> Dict[int, int]:
+    """
+    解析 TIFF 结构的第一个 IFD，返回 {tag: 数值}（只取 SHORT/LONG）
+
+    IFD 常位于像素数据之后，按文件头中的偏移定位，只读取 IFD 条目本身。
+    """
+    f.seek(0)
+    header = f.read(8)
+    if header[:2] == b"II":
+        endian = "<"
+    elif header[:2] == b"MM":
+        endian = ">"
+    else:
+        raise ImageHeaderError("Invalid TIFF header")
+    offset = struct.unpack_from(endian + "I", header, 4)[0]
+    f.seek(offset)
+    count = struct.unpack(endian + "H", f.read(2))[0]
+    data = f.read(count * 12)
+    tags = {}
+    for index in range(len(data) // 12):
+        entry = index * 12
+        tag, kind = struct.unpack_from(endian + "HH", data, entry)
+        if kind == 3:
+            tags[tag] = struct.unpack_from(endian + "H", data, entry + 8)[0]
+        elif kind == 4:
+            tags[tag] = struct.unpack_from(endian + "I", data, entry + 8)[0]
+    return tags
+
+
+def _probe_jpeg(f: BinaryIO) -> Tuple[int, int, int]:
+    orientation = 1
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            raise ImageHeaderError("JPEG size marker not found")
+        marker = byte[0]
+        if marker == 0xD8 or marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker == 0xD9:
+            raise ImageHeaderError("JPEG size marker not found")
+        length = struct.unpack(">H", f.read(2))[0]
+        if marker in _JPEG_SOF:
+            _, height, width = struct.unpack(">BHH", f.read(5))
+            return width, height, orientation
+        if marker == 0xE1 and orientation == 1:
+            segment = f.read(length - 2)
+            if segment[:6] == b"Exif\x00\x00":
+                try:
+                    orientation = _read_tiff_ifd0(io.BytesIO(segment[6:])).get(0x0112, 1)
+                except (struct.error, ImageProbeError):
+                    pass
+            continue
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _probe_webp(header: bytes) -> Tuple[int, int]:
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack_from("<HH", header, 26)
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = struct.unpack_from("<I", header, 21)[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    raise ImageHeaderError(f"Unknown WebP chunk {chunk!r}")
+
+
+def _probe_heif(f: BinaryIO) -> Tuple[int, int]:
+    """在头部范围内查找 ispe（图像空间尺寸）属性，取最大的一组（主图而非缩略图）"""
+    f.seek(0)
+    data = f.read(_HEIF_SCAN_BYTES)
+    best = (0, 0)
+    start = 0
+    while True:
+        index = data.find(b"ispe", start)
+        if index < 0 or index + 16 > len(data):
+            break
+        width, height = struct.unpack_from(">II", data, index + 8)
+        if width * height > best[0] * best[1]:
+            best = (width, height)
+        start = index + 4
+    if best == (0, 0):
+        raise ImageHeaderError("HEIF ispe property not found in header")
+    return best
+
+
+def probe_image(path: str) -> ImageInfo:
+    """
+    读取图片头部获取格式和尺寸
+
+    Args:
+        path: 图片路径
+
+    Returns:
+        ImageInfo
+
+    Raises:
+        ImageHeaderError: 已识别格式但无法解析尺寸
+        ImageProbeError: 无法识别格式
+        OSError: 文件无法读取
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(32)
+        orientation = 1
+        try:
+            if header[:3] == b"\xff\xd8\xff":
+                fmt = "jpeg"
+                width, height, orientation = _probe_jpeg(f)
+            elif header[:8] == b"\x89PNG\r\n\x1a\n" and header[12:16] == b"IHDR":
+                fmt = "png"
+                width, height = struct.unpack_from(">II", header, 16)
+            elif header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+                fmt = "webp"
+                width, height = _probe_webp(header)
+            elif header[:6] in (b"GIF87a", b"GIF89a"):
+                fmt = "gif"
+                width, height = struct.unpack_from("<HH", header, 6)
+            elif header[:2] == b"BM":
+                fmt = "bmp"
+                if struct.unpack_from("<I", header, 14)[0] == 12:
+                    width, height = struct.unpack_from("<HH", header, 18)
+                else:
+                    width, height = struct.unpack_from("<ii", header, 18)
+                    height = abs(height)
+            elif header[:4] in (b"II*\x00", b"MM\x00*"):
+                fmt = "tiff"
+                tags = _read_tiff_ifd0(f)
+                width, height = tags.get(256, 0), tags.get(257, 0)
+                if not (width and height):
+                    raise ImageHeaderError(f"TIFF size tags not found: {path}")
+                orientation = tags.get(0x0112, 1)
+            elif header[4:8] == b"ftyp" and header[8:12] in _HEIF_BRANDS:
+                fmt = _HEIF_BRANDS[header[8:12]]
+                width, height = _probe_heif(f)
+            else:
+                raise ImageProbeError(f"Unrecognized image format: {path}")
+        except struct.error:
+            raise ImageHeaderError(f"Truncated image header: {path}")
+
+    return ImageInfo(path=str(path), format=fmt, width=width, height=height,
+                     size=size, orientation=orientation)
+
+
+def check_image(info: ImageInfo, model: Optional[str] = None) -> List[str]:
+    """
+    按 API 输入限制校验图片
+
+    Args:
+        info: probe_image 的结果
+        model: 模型 ID（用于判断是否支持 HEIC/HEIF）
+
+    Returns:
+        问题描述列表，为空表示合法
+    """
+    problems = []
+    if info.format in HEIC_FORMATS:
+        caps = get_capabilities(model) if model else None
+        if caps is not None and not caps.heic:
+            problems.append(f"{info.format.upper()} is only supported by Seedance 1.5 pro")
+    elif info.format not in SUPPORTED_FORMATS:
+        problems.append(f"unsupported format {info.format}")
+
+    if info.size >= MAX_FILE_SIZE:
+        problems.append(f"file size {info.size / 1024 / 1024:.1f}MB exceeds 30MB")
+
+    low, high = PIXEL_RANGE
+    for name, value in (("width", info.width), ("height", info.height)):
+        if not low < value < high:
+            problems.append(f"{name} {value}px outside ({low}, {high})")
+
+    if info.height and not ASPECT_RANGE[0] < info.aspect < ASPECT_RANGE[1]:
+        problems.append(f"aspect ratio {info.aspect:.2f} outside ({ASPECT_RANGE[0]}, {ASPECT_RANGE[1]})")
+    return problems
+
+
+def check_image_file(path: str, model: Optional[str] = None) -> List[str]:
+    """
+    探测并校验图片文件
+
+    Returns:
+        问题描述列表（包括无法读取或无法识别）；文件头无法解析时不做判断，返回空列表
+    """
+    try:
+        return check_image(probe_image(path), model)
+    except ImageHeaderError:
+        return []
+    except (OSError, ImageProbeError) as e:
+        return [str(e)]
+
+
+def suggest_ratio(width: int, height: int, allow_adaptive: bool = True,
+                  tolerance: float = RATIO_TOLERANCE) -> str:
+    """
+    根据图片宽高建议 ratio
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        allow_adaptive: 是否可以返回 adaptive（参考图场景不支持）
+        tolerance: 与固定比例的允许偏差，超过时返回 adaptive
+
+    Returns:
+        ratio 取值
+    """
+    aspect = math.log(width / height)
+    best = min(FIXED_RATIOS, key=lambda name: abs(aspect - math.log(FIXED_RATIOS[name])))
+    if allow_adaptive and abs(aspect - math.log(FIXED_RATIOS[best])) > math.log(1 + tolerance):
+        return "adaptive"
+    return best
+
+
+def auto_ratio(model: str, image: Optional[str] = None, reference: bool = False) -> str:
+    """
+    为 --ratio auto 选择 ratio
+
+    Args:
+        model: 模型 ID
+        image: 首帧或第一张参考图路径，没有图片时为 None
+        reference: 是否为参考图场景（不支持 adaptive）
+
+    Returns:
+        ratio 取值
+    """
+    if image is None:
+        caps = get_capabilities(model)
+        return "adaptive" if caps is not None and caps.adaptive_text_ratio else "16:9"
+    try:
+        width, height = probe_image(image).display_size
+    except (OSError, ImageProbeError):
+        return "16:9" if reference else "adaptive"
+    if not height:
+        return "16:9" if reference else "adaptive"
+    return suggest_ratio(width, height, allow_adaptive=not reference)
+
+
+def iter_image_paths(paths: List[str]) -> List[str]:
+    """展开目录（递归查找常见图片扩展名），文件路径原样保留"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            result.extend(
+                str(p) for p in sorted(Path(path).rglob("*")) if p.suffix.lower() in IMAGE_SUFFIXES
+            )
+        else:
+            result.append(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-check input images against API limits by reading headers only",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Check a single image
+  python image_probe.py first_frame.png
+
+  # Check a whole directory for a model, suggesting ratios
+  python image_probe.py ./inputs --model doubao-seedance-1-0-lite-i2v
+
+  # Suggest ratios for reference images (adaptive not allowed)
+  python image_probe.py ./refs --reference --json
+        """
+    )
+    parser.add_argument("paths", nargs="+", help="Image files or directories")
+    parser.add_argument("--model", type=str, help="Model ID (HEIC/HEIF is only accepted by 1.5 pro)")
+    parser.add_argument(
+        "--reference",
+        action="store_true",
+        help="Images are reference images (never suggest adaptive)"
+    )
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "image_probe")
+
+    start = time.perf_counter()
+    results = []
+    for path in iter_image_paths(args.paths):
+        try:
+            info = probe_image(path)
+        except ImageHeaderError as e:
+            # 无法判断，不计为不合法
+            results.append({"path": path, "error": str(e), "problems": []})
+            continue
+        except (OSError, ImageProbeError) as e:
+            results.append({"path": path, "error": str(e), "problems": [str(e)]})
+            continue
+        width, height = info.display_size
+        item = info.to_dict()
+        item["problems"] = check_image(info, args.model)
+        item["ratio"] = suggest_ratio(width, height, allow_adaptive=not args.reference) if height else None
+        results.append(item)
+    elapsed = time.perf_counter() - start
+
+    invalid = sum(1 for item in results if item["problems"])
+    if args.json:
+        import json
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for item in results:
+            if "error" in item:
+                status = "❌" if item["problems"] else "❔"
+                print(f"{status} {item['path']}: {item['error']}")
+                continue
+            status = "⚠️" if item["problems"] else "✅"
+            print(f"{status} {item['path']}: {item['format']} {item['width']}x{item['height']}, "
+                  f"ratio {item['ratio']}")
+            for problem in item["problems"]:
+                print(f"   - {problem}")
+        print(f"\n{len(results)} images checked in {elapsed:.2f}s, {invalid} invalid")
+
+    sys.exit(1 if invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
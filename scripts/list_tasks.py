@@ -11,9 +11,11 @@ import argparse
 
 try:
     from seedance_client import SeedanceClient
+    from profiling import add_profiling_arguments, start_profiling
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from seedance_client import SeedanceClient
+    from profiling import add_profiling_arguments, start_profiling
 
 
 def format_task_list(data: dict) -> str:
@@ -135,7 +137,9 @@ Examples:
         help="Output raw JSON"
     )
 
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_profiling(args, "list_tasks")
 
     # 验证参数
     if args.page_num < 1:
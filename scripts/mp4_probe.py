@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+MP4 头部探测
+
+纯 Python 解析 MP4 的 moov 头部（通过 mmap 只触及头部所在的页），
+获取时长、分辨率、帧率和是否包含音轨，并与任务参数比对。
+不解码视频数据，也不需要 ffprobe 等外部工具。
+"""
+
+import os
+import sys
+import mmap
+import struct
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from profiling import add_profiling_arguments, start_profiling
+
+
+# 各分辨率/宽高比对应的输出像素（Seedance 1.0 系列与 1.5 pro 不同，任一匹配即可）
+RESOLUTION_PIXELS: Dict[Tuple[str, str], Tuple[Tuple[int, int], ...]] = {
+    ("480p", "16:9"): ((864, 480), (864, 496)),
+    ("480p", "4:3"): ((736, 544), (752, 560)),
+    ("480p", "1:1"): ((640, 640),),
+    ("480p", "3:4"): ((544, 736), (560, 752)),
+    ("480p", "9:16"): ((480, 864), (496, 864)),
+    ("480p", "21:9"): ((960, 416), (992, 432)),
+    ("720p", "16:9"): ((1248, 704), (1280, 720)),
+    ("720p", "4:3"): ((1120, 832), (1112, 834)),
+    ("720p", "1:1"): ((960, 960),),
+    ("720p", "3:4"): ((832, 1120), (834, 1112)),
+    ("720p", "9:16"): ((704, 1248), (720, 1280)),
+    ("720p", "21:9"): ((1504, 640), (1470, 630)),
+    ("1080p", "16:9"): ((1920, 1088), (1920, 1080)),
+    ("1080p", "4:3"): ((1664, 1248),),
+    ("1080p", "1:1"): ((1440, 1440),),
+    ("1080p", "3:4"): ((1248, 1664),),
+    ("1080p", "9:16"): ((1088, 1920), (1080, 1920)),
+    ("1080p", "21:9"): ((2176, 928), (2206, 946)),
+}
+
+# 宽高比未知（如 adaptive）时，短边与标称分辨率的允许偏差
+SHORT_SIDE_TOLERANCE = 0.15
+
+
+class MP4ProbeError(Exception):
+    """无法解析 MP4 头部"""
+    pass
+
+
+@dataclass
+class MP4Info:
+    """MP4 头部信息"""
+    duration: float
+    width: int
+    height: int
+    fps: Optional[float]
+    has_video: bool
+    has_audio: bool
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _iter_boxes(buf, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    遍历 [start, end) 范围内的 box
+
+    Yields:
+        (box 类型, 数据起始偏移, box 结束偏移)
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", buf, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                break
+            size = struct.unpack_from(">Q", buf, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise MP4ProbeError(f"Corrupt box {box_type!r} at offset {offset}")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find(buf, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    for found, data_start, box_end in _iter_boxes(buf, start, end):
+        if found == box_type:
+            return data_start, box_end
+    return None
+
+
+def _parse_mdhd(buf, start: int) -> Tuple[int, int]:
+    """返回 (timescale, duration)"""
+    version = buf[start]
+    if version == 1:
+        return struct.unpack_from(">IQ", buf, start + 20)
+    return struct.unpack_from(">II", buf, start + 12)
+
+
+def _parse_tkhd(buf, start: int) -> Tuple[int, int]:
+    """返回 (width, height)，源数据为 16.16 定点数"""
+    version = buf[start]
+    offset = start + (88 if version == 1 else 76)
+    width, height = struct.unpack_from(">II", buf, offset)
+    return width >> 16, height >> 16
+
+
+def _count_samples(buf, start: int, end: int) -> int:
+    """从 stts 统计采样（帧）总数"""
+    entry_count = struct.unpack_from(">I", buf, start + 4)[0]
+    total = 0
+    offset = start + 8
+    for _ in range(entry_count):
+        if offset + 8 > end:
+            break
+        total += struct.unpack_from(">I", buf, offset)[0]
+        offset += 8
+    return total
+
+
+def _parse_moov(buf, start: int, end: int) -> MP4Info:
+    mvhd = _find(buf, start, end, b"mvhd")
+    if mvhd is None:
+        raise MP4ProbeError("Missing mvhd box")
+    timescale, duration_units = _parse_mdhd(buf, mvhd[0])
+    duration = duration_units / timescale if timescale else 0.0
+
+    width = height = 0
+    fps = None
+    has_video = has_audio = False
+
+    for box_type, trak_start, trak_end in _iter_boxes(buf, start, end):
+        if box_type != b"trak":
+            continue
+        mdia = _find(buf, trak_start, trak_end, b"mdia")
+        if mdia is None:
+            continue
+        hdlr = _find(buf, mdia[0], mdia[1], b"hdlr")
+        handler = bytes(buf[hdlr[0] + 8:hdlr[0] + 12]) if hdlr else b""
+
+        if handler == b"soun":
+            has_audio = True
+        elif handler == b"vide":
+            has_video = True
+            tkhd = _find(buf, trak_start, trak_end, b"tkhd")
+            if tkhd:
+                width, height = _parse_tkhd(buf, tkhd[0])
+
+            mdhd = _find(buf, mdia[0], mdia[1], b"mdhd")
+            minf = _find(buf, mdia[0], mdia[1], b"minf")
+            stbl = _find(buf, minf[0], minf[1], b"stbl") if minf else None
+            stts = _find(buf, stbl[0], stbl[1], b"stts") if stbl else None
+            if mdhd and stts:
+                track_scale, track_units = _parse_mdhd(buf, mdhd[0])
+                samples = _count_samples(buf, stts[0], stts[1])
+                if track_scale and track_units and samples:
+                    fps = samples / (track_units / track_scale)
+
+    return MP4Info(
+        duration=round(duration, 3),
+        width=width,
+        height=height,
+        fps=round(fps, 3) if fps else None,
+        has_video=has_video,
+        has_audio=has_audio
+    )
+
+
+def probe_mp4(path: str) -> MP4Info:
+    """
+    解析 MP4 头部
+
+    通过 mmap 按需读取：只有 box 头和 moov 所在的页会被实际读入，
+    mdat 中的视频数据不会被访问。
+
+    Args:
+        path: MP4 文件路径
+
+    Returns:
+        MP4Info
+
+    Raises:
+        MP4ProbeError: 文件不是有效的 MP4 或缺少 moov
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 8:
+            raise MP4ProbeError(f"File too small to be an MP4: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            try:
+                moov = _find(buf, 0, len(buf), b"moov")
+                if moov is None:
+                    raise MP4ProbeError(f"No moov box found: {path}")
+                return _parse_moov(buf, moov[0], moov[1])
+            except struct.error as e:
+                # box 被截断或长度字段损坏，读取越界
+                raise MP4ProbeError(f"Truncated or corrupt box in {path}: {e}")
+
+
+def validate_video(
+    info: MP4Info,
+    resolution: Optional[str] = None,
+    ratio: Optional[str] = None,
+    duration: Optional[float] = None,
+    frames: Optional[int] = None,
+    framespersecond: Optional[float] = None,
+    expect_audio: Optional[bool] = None,
+    duration_tolerance: float = 0.5
+) -> List[str]:
+    """
+    将探测结果与任务参数比对
+
+    Args:
+        info: probe_mp4 的结果
+        resolution: 任务分辨率，如 "720p"
+        ratio: 任务宽高比，如 "16:9"
+        duration: 任务时长（秒）
+        frames: 任务帧数（指定时优先于 duration）
+        framespersecond: 任务帧率
+        expect_audio: 是否应包含音轨
+        duration_tolerance: 时长允许偏差（秒）
+
+    Returns:
+        不一致项的描述列表，为空表示校验通过
+    """
+    problems = []
+
+    if not info.has_video:
+        problems.append("no video track")
+
+    if resolution:
+        candidates = RESOLUTION_PIXELS.get((resolution, ratio or ""))
+        if candidates:
+            if (info.width, info.height) not in candidates:
+                expected = " or ".join(f"{w}x{h}" for w, h in candidates)
+                problems.append(f"resolution {info.width}x{info.height}, expected {expected}")
+        elif resolution.endswith("p") and resolution[:-1].isdigit():
+            nominal = int(resolution[:-1])
+            short_side = min(info.width, info.height)
+            if abs(short_side - nominal) > nominal * SHORT_SIDE_TOLERANCE:
+                problems.append(f"short side {short_side}px, expected about {nominal}px ({resolution})")
+
+    if frames and framespersecond:
+        duration = frames / framespersecond
+    if duration is not None and duration > 0:
+        if abs(info.duration - duration) > duration_tolerance:
+            problems.append(f"duration {info.duration:.2f}s, expected {duration:.2f}s")
+
+    if framespersecond and info.fps is not None:
+        if abs(info.fps - framespersecond) > 0.5:
+            problems.append(f"fps {info.fps:.2f}, expected {framespersecond}")
+
+    if expect_audio is not None and info.has_audio != expect_audio:
+        problems.append("missing audio track" if expect_audio else "unexpected audio track")
+
+    return problems
+
+
+def validate_task_video(path: str, task, expect_audio: Optional[bool] = None) -> Tuple[MP4Info, List[str]]:
+    """
+    探测文件并按 TaskInfo 校验
+
+    Args:
+        path: MP4 文件路径
+        task: TaskInfo
+        expect_audio: 是否应包含音轨
+
+    Returns:
+        (MP4Info, 不一致项列表)
+    """
+    info = probe_mp4(path)
+    problems = validate_video(
+        info,
+        resolution=task.resolution,
+        ratio=task.ratio,
+        duration=task.duration if task.duration and task.duration > 0 else None,
+        frames=task.frames,
+        framespersecond=task.framespersecond,
+        expect_audio=expect_audio
+    )
+    return info, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Probe MP4 headers (duration, resolution, fps, audio) without decoding",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Show header info
+  python mp4_probe.py output/video_abc.mp4
+
+  # Check against expected task parameters
+  python mp4_probe.py output/video_abc.mp4 --resolution 720p --ratio 16:9 --duration 5 --fps 24
+        """
+    )
+
+    parser.add_argument("paths", nargs="+", help="MP4 files to probe")
+    parser.add_argument("--resolution", type=str, help="Expected resolution (480p/720p/1080p)")
+    parser.add_argument("--ratio", type=str, help="Expected aspect ratio")
+    parser.add_argument("--duration", type=float, help="Expected duration in seconds")
+    parser.add_argument("--fps", type=float, help="Expected frames per second")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "mp4_probe")
+
+    results = []
+    failed = False
+    for path in args.paths:
+        try:
+            info = probe_mp4(path)
+        except (OSError, MP4ProbeError) as e:
+            results.append({"path": path, "error": str(e)})
+            failed = True
+            continue
+        problems = validate_video(
+            info, resolution=args.resolution, ratio=args.ratio,
+            duration=args.duration, framespersecond=args.fps
+        )
+        failed = failed or bool(problems)
+        results.append({"path": path, **info.to_dict(), "problems": problems})
+
+    if args.json:
+        import json
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for item in results:
+            if "error" in item:
+                print(f"❌ {item['path']}: {item['error']}")
+                continue
+            fps = f"{item['fps']:.2f}fps" if item["fps"] else "?fps"
+            audio = "audio" if item["has_audio"] else "no audio"
+            status = "✅" if not item["problems"] else "⚠️"
+            print(f"{status} {item['path']}: {item['width']}x{item['height']}, "
+                  f"{item['duration']:.2f}s, {fps}, {audio}")
+            for problem in item["problems"]:
+                print(f"   - {problem}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+带优先级抢占的任务提交器
+
+在固定的并发额度（slots，我方同时处于 queued/running 的任务数）内按优先级提交任务。
+额度已满时到达的高优先级任务会取消（DELETE）最新提交、仍在排队的低优先级任务，
+腾出额度立即提交；被抢占的任务回到待提交队列，保持原到达顺序，稍后重新提交。
+已开始运行的任务不会被抢占（取消前会再次确认状态，API 也不允许取消运行中的任务）。
+
+结束后按优先级统计等待提交时间、总耗时和因抢占损失的排队时间。
+"""
+
+import os
+import sys
+import time
+import json
+import heapq
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from seedance_client import (
+        SeedanceClient,
+        TaskInfo,
+        TaskStatus,
+        TransportConfig,
+        ResilienceConfig,
+        APIError,
+        RateLimitError,
+        SeedanceError,
+        ValidationError,
+    )
+    from capabilities import compile_payload
+    from work_queue import load_jobs
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import (
+        SeedanceClient,
+        TaskInfo,
+        TaskStatus,
+        TransportConfig,
+        ResilienceConfig,
+        APIError,
+        RateLimitError,
+        SeedanceError,
+        ValidationError,
+    )
+    from capabilities import compile_payload
+    from work_queue import load_jobs
+    from profiling import add_profiling_arguments, start_profiling
+
+
+PRIORITY_CLASSES = {"low": 0, "normal": 1, "high": 2, "urgent": 3}
+
+TERMINAL_STATUSES = (TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.EXPIRED, TaskStatus.CANCELLED)
+
+
+def parse_priority(value: Any) -> int:
+    """
+    解析优先级
+
+    Args:
+        value: 类别名（low/normal/high/urgent）或整数，数值越大越优先
+
+    Returns:
+        整数优先级
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in PRIORITY_CLASSES:
+        return PRIORITY_CLASSES[text]
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"Invalid priority: {value} (use {', '.join(PRIORITY_CLASSES)} or an integer)")
+
+
+def priority_name(priority: int) -> str:
+    for name, value in PRIORITY_CLASSES.items():
+        if value == priority:
+            return name
+    return str(priority)
+
+
+@dataclass
+class PriorityJob:
+    """一个待提交/已提交的任务及其时间线"""
+    payload: Dict[str, Any]
+    priority: int
+    seq: int
+    arrived_at: float
+    name: Optional[str] = None
+    # pending 表示等待提交；其余为最近一次查询到的任务状态
+    state: str = "pending"
+    task_id: Optional[str] = None
+    submitted_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    preemptions: int = 0
+    # 被抢占的任务在取消前已排队的时间之和
+    lost_seconds: float = 0.0
+    error: Optional[str] = None
+    cancelled_task_ids: List[str] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return self.name or f"job-{self.seq}"
+
+    def sort_key(self):
+        return (-self.priority, self.arrived_at, self.seq)
+
+
+class PrioritySubmitter:
+    """按优先级在固定额度内提交任务，必要时抢占排队中的低优先级任务"""
+
+    def __init__(
+        self,
+        client: SeedanceClient,
+        slots: int,
+        poll_interval: float = 5.0,
+        max_preemptions: int = 3,
+        on_event: Optional[Callable[[str, PriorityJob], None]] = None
+    ):
+        """
+        Args:
+            client: API 客户端
+            slots: 我方同时处于 queued/running 的任务上限（通常等于账号的默认档并发额度）
+            poll_interval: 状态轮询间隔（秒）
+            max_preemptions: 单个任务最多被抢占的次数，达到后不再被抢占，避免反复让出
+            on_event: 事件回调，参数为 (事件名, 任务)；事件为 submitted、started、
+                preempted、finished、failed
+        """
+        self.client = client
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self.max_preemptions = max_preemptions
+        self.on_event = on_event
+
+        self.jobs: List[PriorityJob] = []
+        self._pending: List[tuple] = []
+        self._in_flight: Dict[str, PriorityJob] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._backoff_until = 0.0
+        # 已出队、正在提交的任务数（此时既不在待提交队列也不在在途表中）
+        self._submitting = 0
+
+    def _emit(self, event: str, job: PriorityJob):
+        if self.on_event:
+            self.on_event(event, job)
+
+    def submit(self, payload: Dict[str, Any], priority: Any = "normal", name: Optional[str] = None) -> PriorityJob:
+        """
+        加入待提交队列（线程安全，可在 run() 运行期间调用）
+
+        Args:
+            payload: 创建任务 payload
+            priority: 优先级（见 parse_priority）
+            name: 任务名称
+
+        Returns:
+            PriorityJob
+        """
+        with self._lock:
+            job = PriorityJob(payload, parse_priority(priority), len(self.jobs), time.time(), name)
+            self.jobs.append(job)
+            heapq.heappush(self._pending, (job.sort_key(), job))
+        self._wake.set()
+        return job
+
+    def _poll(self):
+        """查询所有在途任务的状态"""
+        jobs = list(self._in_flight.values())
+        if not jobs:
+            return
+        futures = self.client.get_many([job.task_id for job in jobs])
+        for job, result in zip(jobs, self.client.iter_results(futures, return_exceptions=True)):
+            if isinstance(result, Exception):
+                continue
+            self._update(job, result)
+
+    def _update(self, job: PriorityJob, task: TaskInfo):
+        job.state = task.status.value
+        if task.status == TaskStatus.RUNNING and job.started_at is None:
+            job.started_at = time.time()
+            self._emit("started", job)
+        elif task.status in TERMINAL_STATUSES:
+            job.finished_at = time.time()
+            if job.started_at is None:
+                job.started_at = job.finished_at
+            if task.status != TaskStatus.SUCCEEDED:
+                job.error = task.error_message or task.status.value
+            with self._lock:
+                del self._in_flight[job.task_id]
+            self._emit("finished", job)
+
+    def _victims(self, priority: int) -> List[PriorityJob]:
+        """可抢占的任务：优先级更低、仍在排队、未达抢占上限；最低优先级、最新提交的在前"""
+        candidates = [
+            job for job in self._in_flight.values()
+            if job.priority < priority and job.state == TaskStatus.QUEUED.value
+            and job.preemptions < self.max_preemptions
+        ]
+        return sorted(candidates, key=lambda job: (job.priority, -job.submitted_at))
+
+    def _preempt(self, priority: int) -> bool:
+        """抢占一个排队中的低优先级任务，成功返回 True"""
+        for victim in self._victims(priority):
+            # 取消前再次确认仍在排队，运行中的任务绝不取消
+            try:
+                task = self.client.get_task(victim.task_id, fresh=True)
+            except SeedanceError:
+                continue
+            if task.status != TaskStatus.QUEUED:
+                self._update(victim, task)
+                continue
+            try:
+                self.client.cancel_task(victim.task_id)
+            except APIError:
+                # 查询与取消之间任务已开始运行
+                victim.state = TaskStatus.RUNNING.value
+                continue
+            except SeedanceError:
+                continue
+
+            now = time.time()
+            victim.cancelled_task_ids.append(victim.task_id)
+            victim.lost_seconds += now - victim.submitted_at
+            victim.preemptions += 1
+            victim.submitted_at = None
+            victim.state = "pending"
+            with self._lock:
+                heapq.heappush(self._pending, (victim.sort_key(), victim))
+                del self._in_flight[victim.task_id]
+            victim.task_id = None
+            self._emit("preempted", victim)
+            return True
+        return False
+
+    def _dispatch(self):
+        """按优先级填满额度；额度已满时尝试为更高优先级的任务抢占"""
+        while time.time() >= self._backoff_until:
+            with self._lock:
+                if not self._pending:
+                    return
+                job = heapq.heappop(self._pending)[1]
+                self._submitting += 1
+            try:
+                if len(self._in_flight) >= self.slots and not self._preempt(job.priority):
+                    self._requeue(job)
+                    return
+                task = self.client.create_task(job.payload)
+            except RateLimitError as e:
+                # 账号级限流：放回队列，稍后再试
+                self._requeue(job)
+                self._backoff_until = time.time() + max(self.poll_interval, 1.0)
+                job.error = str(e)
+                return
+            except SeedanceError as e:
+                job.state = "failed"
+                job.error = str(e)
+                job.finished_at = time.time()
+                with self._lock:
+                    self._submitting -= 1
+                self._emit("failed", job)
+                continue
+
+            job.task_id = task.id
+            job.submitted_at = time.time()
+            job.state = task.status.value
+            job.error = None
+            with self._lock:
+                self._in_flight[task.id] = job
+                self._submitting -= 1
+            self._emit("submitted", job)
+
+    def _requeue(self, job: PriorityJob):
+        """将已出队但未提交的任务放回待提交队列"""
+        with self._lock:
+            heapq.heappush(self._pending, (job.sort_key(), job))
+            self._submitting -= 1
+
+    def idle(self) -> bool:
+        """没有待提交和在途任务"""
+        with self._lock:
+            return not self._pending and not self._in_flight and not self._submitting
+
+    def run(self, until_empty: bool = True, stop: Optional[threading.Event] = None):
+        """
+        提交并跟踪任务
+
+        Args:
+            until_empty: 没有待提交和在途任务时返回；为 False 时持续等待 submit()
+            stop: 设置后返回（在途任务不会被取消）
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self._wake.clear()
+            self._poll()
+            self._dispatch()
+            if until_empty and self.idle():
+                return
+            self._wake.wait(self.poll_interval)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按优先级汇总时延
+
+        Returns:
+            {类别: {jobs, failed, preempted_jobs, preemptions, wait_mean_s, wait_p95_s,
+            total_mean_s, total_p95_s, lost_s}}；wait 为到达到最终提交的时间
+            （包含被抢占后重新等待的时间），total 为到达到完成的时间
+        """
+        def mean(values):
+            return round(sum(values) / len(values), 2) if values else None
+
+        def p95(values):
+            if not values:
+                return None
+            values = sorted(values)
+            return round(values[min(len(values) - 1, int(0.95 * len(values)))], 2)
+
+        classes: Dict[int, List[PriorityJob]] = {}
+        for job in self.jobs:
+            classes.setdefault(job.priority, []).append(job)
+
+        report = {}
+        for priority in sorted(classes, reverse=True):
+            jobs = classes[priority]
+            done = [job for job in jobs if job.finished_at is not None and job.task_id]
+            waits = [job.submitted_at - job.arrived_at for job in done]
+            totals = [job.finished_at - job.arrived_at for job in done]
+            report[priority_name(priority)] = {
+                "jobs": len(jobs),
+                "failed": sum(1 for job in jobs if job.error and job.finished_at),
+                "preempted_jobs": sum(1 for job in jobs if job.preemptions),
+                "preemptions": sum(job.preemptions for job in jobs),
+                "wait_mean_s": mean(waits),
+                "wait_p95_s": p95(waits),
+                "total_mean_s": mean(totals),
+                "total_p95_s": p95(totals),
+                "lost_s": round(sum(job.lost_seconds for job in jobs), 2),
+            }
+        return report
+
+
+def format_report(report: Dict[str, Dict[str, Any]]) -> str:
+    """格式化优先级时延报告"""
+    def cell(value):
+        return "-" if value is None else f"{value}"
+
+    lines = [
+        f"{'Class':<8} {'Jobs':>5} {'Failed':>6} {'Preempted':>9} {'Wait avg':>9} {'Wait p95':>9} "
+        f"{'Total avg':>10} {'Total p95':>10} {'Lost':>8}"
+    ]
+    for name, row in report.items():
+        lines.append(
+            f"{name:<8} {row['jobs']:>5} {row['failed']:>6} "
+            f"{row['preempted_jobs']:>4}/{row['preemptions']:<4} "
+            f"{cell(row['wait_mean_s']):>9} {cell(row['wait_p95_s']):>9} "
+            f"{cell(row['total_mean_s']):>10} {cell(row['total_p95_s']):>10} {row['lost_s']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Submit jobs by priority within a concurrency budget, preempting queued low-priority tasks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run a job file (JSON array or JSON lines with an optional "priority" key)
+  python priority_submitter.py jobs.jsonl --slots 10
+
+  # Jobs with "arrive_after": N are submitted N seconds after start,
+  # e.g. an urgent render arriving while bulk jobs fill the slots
+  python priority_submitter.py jobs.jsonl --slots 10 --poll-interval 2 --json
+
+Job file line:
+  {"prompt": "...", "priority": "high", "name": "trailer", "arrive_after": 30}
+        """
+    )
+
+    parser.add_argument("file", help="JSON/JSONL file of job objects")
+    parser.add_argument(
+        "--slots",
+        type=int,
+        required=True,
+        help="Maximum of our tasks queued or running at once"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="doubao-seedance-1-5-pro-251215",
+        help="Default model (default: doubao-seedance-1-5-pro-251215)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5,
+        help="Seconds between status polls (default: 5)"
+    )
+    parser.add_argument(
+        "--max-preemptions",
+        type=int,
+        default=3,
+        help="Stop preempting a job after this many times (default: 3)"
+    )
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        help="Override API Key"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output report as JSON"
+    )
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "priority_submitter")
+
+    try:
+        from create_task import read_image_file
+        entries = []
+        for index, job in enumerate(load_jobs(args.file, {"model": args.model})):
+            job = dict(job)
+            meta = {key: job.pop(key, None) for key in ("name", "priority", "arrive_after")}
+            try:
+                payload = compile_payload(job, read_image=read_image_file)
+            except ValidationError as e:
+                raise ValueError(f"job {meta['name'] or index}: {e}")
+            entries.append((meta, payload))
+
+        def on_event(event: str, job: PriorityJob):
+            if args.json:
+                return
+            detail = f" ({job.error})" if event == "failed" else f" {job.task_id or ''}"
+            print(f"{time.strftime('%H:%M:%S')} {event:<9} [{priority_name(job.priority)}] {job.label}{detail}")
+
+        transport = TransportConfig(max_concurrency=min(max(args.slots, 1), 32))
+        submitter = PrioritySubmitter(
+            SeedanceClient(api_key=args.api_key, transport=transport, resilience=ResilienceConfig()),
+            slots=args.slots,
+            poll_interval=args.poll_interval,
+            max_preemptions=args.max_preemptions,
+            on_event=on_event
+        )
+
+        # 立即到达的任务先入队，延迟到达的由定时器提交
+        timers = []
+        for meta, payload in entries:
+            priority = meta["priority"] if meta["priority"] is not None else "normal"
+            if meta["arrive_after"]:
+                timer = threading.Timer(
+                    float(meta["arrive_after"]), submitter.submit, (payload, priority, meta["name"])
+                )
+                timers.append(timer)
+            else:
+                submitter.submit(payload, priority, meta["name"])
+        for timer in timers:
+            timer.start()
+
+        # 延迟到达的任务提交前不退出
+        stop = threading.Event()
+        runner = threading.Thread(target=submitter.run, kwargs={"until_empty": False, "stop": stop})
+        runner.start()
+        try:
+            for timer in timers:
+                timer.join()
+            while not submitter.idle():
+                time.sleep(min(args.poll_interval, 1.0))
+        finally:
+            stop.set()
+            runner.join()
+
+        report = submitter.report()
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            print()
+            print(format_report(report))
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
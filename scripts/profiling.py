@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+按流水线阶段的 CPU 与内存剖析
+
+客户端库用 @profiled 标记各阶段：encode（编译 payload、读取并编码图片）、
+submit（创建任务）、poll（等待任务完成）、download（下载视频）。
+所有 CLI 工具支持 --profile 和 --trace-memory：
+
+- --profile：每个阶段单独的 cProfile 数据（多个线程中执行的同一阶段合并），
+  写入 <profile-dir>/<脚本>-<进程号>.<阶段>.prof，可用 pstats 或 snakeviz 查看
+- --trace-memory [N]：每次进入/离开阶段时的 tracemalloc 快照差异中分配最多的 N 处，
+  写入 <profile-dir>/<脚本>-<进程号>.<阶段>.mem.txt
+- 进程退出时在 stderr 输出各阶段的调用次数、墙钟时间、CPU 时间和内存峰值
+
+未启用时 phase() 返回共享的空上下文，@profiled 直接调用原函数，几乎没有开销。
+"""
+
+import os
+import sys
+import time
+import atexit
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+DEFAULT_PROFILE_DIR = "profiles"
+
+_NULL_CONTEXT = nullcontext()
+
+
+class PhaseStats:
+    """单个阶段的累计统计"""
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory = 0
+        self.net_memory = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wall_seconds": round(self.wall, 4),
+            "cpu_seconds": round(self.cpu, 4),
+            "peak_memory": self.peak_memory,
+            "net_memory": self.net_memory,
+        }
+
+
+class Profiler:
+    """按阶段统计墙钟/CPU 时间，可选 cProfile 与 tracemalloc（线程安全）"""
+
+    def __init__(
+        self,
+        name: str,
+        cpu: bool = False,
+        memory_top: int = 0,
+        output_dir: str = DEFAULT_PROFILE_DIR
+    ):
+        """
+        Args:
+            name: 输出文件名前缀（通常为脚本名）
+            cpu: 是否为每个阶段记录 cProfile 数据
+            memory_top: 大于 0 时启用 tracemalloc，记录每个阶段分配最多的 N 处
+            output_dir: 输出目录
+        """
+        self.name = name
+        self.cpu = cpu
+        self.memory_top = memory_top
+        self.output_dir = output_dir
+        self.prefix = os.path.join(output_dir, f"{name}-{os.getpid()}")
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._phases: Dict[str, PhaseStats] = {}
+        # (阶段, 线程) -> cProfile.Profile；同一线程重复进入同一阶段时累计到同一个对象
+        self._profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        # 阶段 -> (进行中的次数, 外层进入时的快照, 外层进入时的已分配内存)
+        self._memory: Dict[str, Tuple[int, Any, int]] = {}
+        self._memory_reports: Dict[str, int] = {}
+        self._started_wall = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._finished = False
+
+        if memory_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str):
+        """统计一个阶段；可以在多个线程中同时进入同一阶段"""
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        if self.memory_top:
+            self._enter_memory(name)
+        profile = self._enable_profile(name) if self.cpu else None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._local.profiling = False
+            peak, net = self._exit_memory(name) if self.memory_top else (0, 0)
+            with self._lock:
+                stats = self._phases.setdefault(name, PhaseStats())
+                stats.calls += 1
+                stats.wall += time.perf_counter() - wall
+                stats.cpu += time.thread_time() - cpu
+                stats.peak_memory = max(stats.peak_memory, peak)
+                stats.net_memory += net
+
+    def _enable_profile(self, name: str) -> Optional[cProfile.Profile]:
+        # 同一线程中嵌套的阶段只计时，由外层阶段的 cProfile 覆盖
+        if getattr(self._local, "profiling", False):
+            return None
+        key = (name, threading.get_ident())
+        with self._lock:
+            profile = self._profiles.setdefault(key, cProfile.Profile())
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 同一时间只允许一个 cProfile 处于启用状态
+            return None
+        self._local.profiling = True
+        return profile
+
+    def _enter_memory(self, name: str):
+        with self._lock:
+            active, snapshot, current = self._memory.get(name, (0, None, 0))
+            if active == 0:
+                # 并发进入同一阶段时只在最外层取快照；峰值为进程级，阶段重叠时互相包含
+                tracemalloc.reset_peak()
+                snapshot = tracemalloc.take_snapshot()
+                current = tracemalloc.get_traced_memory()[0]
+            self._memory[name] = (active + 1, snapshot, current)
+
+    def _exit_memory(self, name: str) -> Tuple[int, int]:
+        with self._lock:
+            active, snapshot, start = self._memory[name]
+            if active > 1:
+                self._memory[name] = (active - 1, snapshot, start)
+                return 0, 0
+            del self._memory[name]
+            current, peak = tracemalloc.get_traced_memory()
+            index = self._memory_reports.get(name, 0) + 1
+            self._memory_reports[name] = index
+        diff = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )).compare_to(snapshot, "lineno")
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        with open(f"{self.prefix}.{name}.mem.txt", "a", encoding="utf-8") as f:
+            f.write(f"# {name} #{index}: net {_format_bytes(current - start)}, peak {_format_bytes(peak)}\n")
+            for stat in diff[:self.memory_top]:
+                f.write(f"{stat}\n")
+            f.write("\n")
+        return peak, current - start
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {阶段: {calls, wall_seconds, cpu_seconds, peak_memory, net_memory}}，
+            另含 total（进程级墙钟时间与 CPU 时间）
+        """
+        with self._lock:
+            result = {name: stats.snapshot() for name, stats in self._phases.items()}
+        result["total"] = {
+            "calls": 1,
+            "wall_seconds": round(time.perf_counter() - self._started_wall, 4),
+            "cpu_seconds": round(time.process_time() - self._started_cpu, 4),
+            "peak_memory": tracemalloc.get_traced_memory()[1] if self.memory_top else 0,
+            "net_memory": 0,
+        }
+        return result
+
+    def finish(self, stream=None):
+        """写入各阶段的 cProfile 数据并输出汇总（只执行一次）"""
+        if self._finished:
+            return
+        self._finished = True
+        stream = stream or sys.stderr
+        written = []
+        if self.cpu:
+            import pstats
+            by_phase: Dict[str, list] = {}
+            with self._lock:
+                for (name, _thread), profile in self._profiles.items():
+                    by_phase.setdefault(name, []).append(profile)
+            if by_phase:
+                Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+            for name, profiles in sorted(by_phase.items()):
+                stats = pstats.Stats(profiles[0])
+                for profile in profiles[1:]:
+                    stats.add(profile)
+                path = f"{self.prefix}.{name}.prof"
+                stats.dump_stats(path)
+                written.append(path)
+        written.extend(f"{self.prefix}.{name}.mem.txt" for name in sorted(self._memory_reports))
+        print(format_summary(self.name, self.stats()), file=stream)
+        if written:
+            print(f"Profiles written to {self.prefix}.*", file=stream)
+
+
+def _format_bytes(size: int) -> str:
+    sign = "-" if size < 0 else ""
+    size = abs(size)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == "B" else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GiB"
+
+
+def format_summary(name: str, stats: Dict[str, Dict[str, Any]]) -> str:
+    """格式化各阶段统计"""
+    total = stats["total"]
+    lines = [
+        f"Profile of {name}: {total['wall_seconds']:.3f}s wall, {total['cpu_seconds']:.3f}s CPU",
+        f"  {'phase':<10} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'peak mem':>10} {'net mem':>10}",
+    ]
+    for phase, entry in stats.items():
+        if phase == "total":
+            continue
+        memory = (
+            f"{_format_bytes(entry['peak_memory']):>10} {_format_bytes(entry['net_memory']):>10}"
+            if entry["peak_memory"] else f"{'-':>10} {'-':>10}"
+        )
+        lines.append(
+            f"  {phase:<10} {entry['calls']:>6} {entry['wall_seconds']:>9.3f} {entry['cpu_seconds']:>9.3f} {memory}"
+        )
+    return "\n".join(lines)
+
+
+_active: Optional[Profiler] = None
+
+
+def phase(name: str):
+    """
+    标记流水线阶段（供客户端库和脚本使用）
+
+    未启用剖析时返回空上下文。
+    """
+    if _active is None:
+        return _NULL_CONTEXT
+    return _active.phase(name)
+
+
+def profiled(name: str):
+    """将函数的每次调用标记为一个阶段的装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install(profiler: Optional[Profiler]):
+    """设置当前进程使用的 Profiler（None 表示关闭）"""
+    global _active
+    _active = profiler
+
+
+def add_profiling_arguments(parser):
+    """为 CLI 添加 --profile、--trace-memory 和 --profile-dir 参数"""
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write per-phase cProfile data (encode, submit, poll, download) and print a phase summary on exit"
+    )
+    group.add_argument(
+        "--trace-memory",
+        type=int,
+        nargs="?",
+        const=10,
+        default=0,
+        metavar="N",
+        help="Record the top N allocations of each phase with tracemalloc (default N: 10)"
+    )
+    group.add_argument(
+        "--profile-dir",
+        type=str,
+        default=os.environ.get("SEEDANCE_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+        help="Directory for profile output (default: SEEDANCE_PROFILE_DIR env variable or ./profiles)"
+    )
+
+
+def start_profiling(args, name: str) -> Optional[Profiler]:
+    """
+    按 CLI 参数启用剖析，进程退出时输出汇总
+
+    Returns:
+        Profiler，未指定 --profile / --trace-memory 时返回 None
+    """
+    if not args.profile and not args.trace_memory:
+        return None
+    profiler = Profiler(name, cpu=args.profile, memory_top=args.trace_memory, output_dir=args.profile_dir)
+    install(profiler)
+    atexit.register(profiler.finish)
+    return profiler
@@ -16,6 +16,10 @@ try:
         TaskNotFoundError,
         TimeoutError
     )
+    from downloader import download_to_sinks, download_video
+    from sinks import FileSink, open_sinks, writes_stdout
+    from profiling import add_profiling_arguments, start_profiling
+    from hooks import add_hook_arguments, format_hook_stats, hooks_from_args
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from seedance_client import (
@@ -24,6 +28,10 @@ except ImportError:
         TaskNotFoundError,
         TimeoutError
     )
+    from downloader import download_to_sinks, download_video
+    from sinks import FileSink, open_sinks, writes_stdout
+    from profiling import add_profiling_arguments, start_profiling
+    from hooks import add_hook_arguments, format_hook_stats, hooks_from_args
 
 
 def format_task_info(task) -> str:
@@ -86,53 +94,6 @@ def poll_callback(task):
         print(f"\rQueued... (Task: {task.id[:8]}...)", end="", flush=True)
 
 
-def download_video(url: str, output_path: str):
-    """
-    下载视频文件
-
-    Args:
-        url: 视频下载 URL
-        output_path: 输出文件路径
-    """
-    try:
-        import requests
-        from tqdm import tqdm
-    except ImportError:
-        import requests
-        tqdm = None
-
-    print(f"\nDownloading video to: {output_path}")
-
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-
-    total_size = int(response.headers.get("content-length", 0))
-
-    with open(output_path, "wb") as f:
-        if tqdm:
-            progress_bar = tqdm(
-                total=total_size,
-                unit="B",
-                unit_scale=True,
-                desc="Downloading"
-            )
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                progress_bar.update(len(chunk))
-            progress_bar.close()
-        else:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    percent = downloaded / total_size * 100
-                    print(f"\r{percent:.1f}%", end="", flush=True)
-            print()
-
-    print(f"Video saved to: {output_path}")
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Query the status of a video generation task",
@@ -153,6 +114,12 @@ Examples:
 
   # Download completed video
   python query_task.py --watch <task_id> --download output.mp4
+
+  # Download through the local video store (no network if already stored)
+  python query_task.py --watch <task_id> --download output.mp4 --store ~/.seedance/store
+
+  # Stream the video straight into object storage and pipe it to ffmpeg, without touching local disk
+  python query_task.py --watch <task_id> --sink s3://renders/{task_id}.mp4 --sink - | ffmpeg -i pipe: ...
         """
     )
 
@@ -189,17 +156,89 @@ Examples:
         metavar="PATH",
         help="Download completed video to specified path (only when watch mode succeeds)"
     )
+    parser.add_argument(
+        "--sink",
+        type=str,
+        action="append",
+        metavar="SPEC",
+        help="Stream the completed video into this sink without a local temp file: a path, "
+             "s3://bucket/key (requires boto3, endpoint from SEEDANCE_S3_ENDPOINT) or - for stdout; "
+             "repeatable, {task_id} is substituted (only when watch mode succeeds)"
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=os.environ.get("SEEDANCE_STORE_DIR"),
+        metavar="DIR",
+        help="With --download, keep the video in this content-addressed store; "
+             "tasks already stored are linked without any network request "
+             "(default: SEEDANCE_STORE_DIR env variable)"
+    )
+    parser.add_argument(
+        "--store-quota",
+        type=str,
+        metavar="SIZE",
+        help="Evict least recently used videos from --store above this total size, e.g. 50G "
+             "(default: SEEDANCE_STORE_QUOTA env variable)"
+    )
+    parser.add_argument(
+        "--store-max-age",
+        type=str,
+        metavar="AGE",
+        help="Evict videos in --store not accessed for AGE, e.g. 30d "
+             "(default: SEEDANCE_STORE_MAX_AGE env variable)"
+    )
     parser.add_argument(
         "--api-key",
         type=str,
         help="Override API Key"
     )
+    parser.add_argument(
+        "--ledger",
+        type=str,
+        default=os.environ.get("SEEDANCE_LEDGER_DIR"),
+        help="Record usage and latency of finished tasks into this ledger directory "
+             "(default: SEEDANCE_LEDGER_DIR env variable, requires numpy)"
+    )
 
+    add_hook_arguments(parser)
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_profiling(args, "query_task")
 
     # 验证参数
-    if args.download and not args.watch:
-        parser.error("--download requires --watch")
+    if (args.download or args.sink) and not args.watch:
+        parser.error("--download and --sink require --watch")
+    if (args.on_success or args.on_failure) and not args.watch:
+        parser.error("--on-success and --on-failure require --watch")
+
+    # 视频写到标准输出时，其余输出改写到 stderr
+    if writes_stdout(args.sink or []):
+        sys.stdout = sys.stderr
+
+    # 用量账本
+    ledger = None
+    if args.ledger:
+        try:
+            from usage_ledger import UsageLedger, StartTimeObserver
+        except ImportError as e:
+            parser.error(str(e))
+        ledger = UsageLedger(args.ledger)
+
+    # 本地视频存储：已存储的任务直接链接，不访问网络
+    store = None
+    if args.store and args.download and not args.sink:
+        from video_store import open_store
+        try:
+            store = open_store(args.store, args.store_quota, args.store_max_age)
+        except ValueError as e:
+            parser.error(str(e))
+        # 需要记账或执行钩子时仍查询任务（视频从存储链接，不重新下载）
+        if store.get(args.task_id) is not None and not (ledger or args.on_success or args.on_failure):
+            store.link(args.task_id, args.download)
+            store.close()
+            print(f"📦 Task already stored, linked: {args.download}")
+            return
 
     try:
         client = SeedanceClient(api_key=args.api_key)
@@ -210,13 +249,18 @@ Examples:
             print(f"Poll interval: {args.poll_interval}s, Timeout: {args.timeout}s")
             print()
 
+            callback = StartTimeObserver(poll_callback) if ledger else poll_callback
+
             task = client.wait_for_completion(
                 task_id=args.task_id,
                 poll_interval=args.poll_interval,
                 timeout=args.timeout,
-                callback=poll_callback
+                callback=callback
             )
 
+            if ledger:
+                ledger.append(task, started_at=callback.started_at)
+
             # 清除进度显示
             print("\r" + " " * 50 + "\r", end="", flush=True)
 
@@ -240,13 +284,39 @@ Examples:
                 print(format_task_info(task))
 
             # 下载视频
-            if args.download and task.video_url:
-                download_video(task.video_url, args.download)
+            if args.sink and task.video_url:
+                sinks = open_sinks(args.sink, task_id=task.id)
+                if args.download:
+                    sinks.insert(0, FileSink(args.download))
+                download_to_sinks(
+                    task.video_url, sinks, session=client.cdn_session, task=task, timeout=client.download_timeout
+                )
+            elif args.download and task.video_url:
+                if store:
+                    store.fetch(
+                        task.id, task.video_url, session=client.cdn_session, task=task, timeout=client.download_timeout
+                    )
+                    store.link(task.id, args.download)
+                    print(f"📦 Stored in {args.store}, linked: {args.download}")
+                else:
+                    download_video(
+                        task.video_url, args.download, session=client.cdn_session, task=task, timeout=client.download_timeout
+                    )
+
+            # 完成后钩子
+            hooks = hooks_from_args(args)
+            if hooks:
+                hooks.dispatch(task, path=args.download if args.download and task.video_url else None)
+                hooks.close()
+                print(format_hook_stats(hooks.stats()), file=sys.stderr)
 
         else:
             # 单次查询
             task = client.get_task(args.task_id)
 
+            if ledger:
+                ledger.append(task)
+
             if args.json:
                 import json
                 result = {
@@ -275,6 +345,9 @@ Examples:
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if store:
+            store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+请求体压缩
+
+内联 base64 图片的创建任务请求体可达数十 MB，在带宽受限的出口上发送很慢，
+超时重试时还要再发送一次。启用压缩后，超过阈值的 JSON 请求体在首次发送前
+序列化并压缩一次（gzip 或 zstd，Content-Encoding 头），重试时复用同一份字节。
+服务端拒绝 Content-Encoding（415，或 400 且错误码/错误信息明确指向 Content-Encoding）时自动以
+未压缩的请求体重发，此后该客户端不再压缩。
+
+注意：base64 编码的 JPEG/PNG/WebP 本身已压缩，压缩只能去除 base64 的冗余（约 25%）；
+未压缩的图片格式和文本部分压缩率更高。
+"""
+
+import os
+import json
+import gzip
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+try:
+    # Python 3.14+ 标准库
+    from compression import zstd as _zstd
+except ImportError:
+    _zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ALGORITHMS = ("gzip", "zstd")
+
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+
+
+@dataclass
+class CompressionConfig:
+    """请求体压缩配置"""
+    # gzip 或 zstd（zstd 需要 Python 3.14+ 或安装 zstandard）
+    algorithm: str = "gzip"
+    # 序列化后的请求体不小于该字节数时才压缩
+    threshold: int = 64 * 1024
+    # 压缩级别，None 表示使用算法的默认级别
+    level: Optional[int] = None
+
+    def __post_init__(self):
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported compression algorithm: {self.algorithm} (choose from {', '.join(ALGORITHMS)})")
+        if self.algorithm == "zstd" and _zstd is None and zstandard is None:
+            raise ImportError(
+                "Missing optional dependency for zstd: zstandard. "
+                "Install with: pip install zstandard"
+            )
+
+    @classmethod
+    def from_env(cls) -> Optional["CompressionConfig"]:
+        """
+        读取 SEEDANCE_REQUEST_COMPRESSION 环境变量
+
+        格式为 ALGORITHM[:THRESHOLD]，如 "gzip" 或 "zstd:32768"；未设置时返回 None（不压缩）
+        """
+        value = os.environ.get("SEEDANCE_REQUEST_COMPRESSION")
+        if not value:
+            return None
+        algorithm, _, threshold = value.partition(":")
+        return cls(algorithm=algorithm.strip(), threshold=int(threshold) if threshold else cls.threshold)
+
+
+def compress(data: bytes, algorithm: str, level: Optional[int] = None) -> bytes:
+    """
+    压缩字节串
+
+    Args:
+        data: 原始字节
+        algorithm: gzip 或 zstd
+        level: 压缩级别，None 表示默认级别
+
+    Returns:
+        压缩后的字节（gzip 不写入文件修改时间，相同输入得到相同输出）
+    """
+    level = DEFAULT_LEVELS[algorithm] if level is None else level
+    if algorithm == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if _zstd is not None:
+        return _zstd.compress(data, level=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class PreparedBody:
+    """序列化（并可能已压缩）的 JSON 请求体，在重试间复用"""
+
+    def __init__(self, raw: bytes, encoding: Optional[str] = None, encoded: Optional[bytes] = None):
+        self.raw = raw
+        self.encoding = encoding
+        self.body = encoded if encoding else raw
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Encoding": self.encoding} if self.encoding else {}
+
+    def identity(self) -> "PreparedBody":
+        """未压缩的版本"""
+        return PreparedBody(self.raw)
+
+
+class CompressionStats:
+    """压缩统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prepared = 0
+        self.compressed = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.fallbacks = 0
+
+    def record(self, body: PreparedBody):
+        with self._lock:
+            self.prepared += 1
+            self.compressed += body.encoding is not None
+            self.raw_bytes += len(body.raw)
+            self.wire_bytes += len(body.body)
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            准备的请求体数、其中压缩的数量、原始与压缩后字节数（每个请求体计一次，不含重试）、
+            压缩率和服务端拒绝后回退的次数
+        """
+        with self._lock:
+            return {
+                "bodies": self.prepared,
+                "compressed": self.compressed,
+                "raw_bytes": self.raw_bytes,
+                "wire_bytes": self.wire_bytes,
+                "ratio": round(self.wire_bytes / self.raw_bytes, 4) if self.raw_bytes else None,
+                "fallbacks": self.fallbacks,
+            }
+
+
+def prepare_body(data: Any, config: Optional[CompressionConfig], dumps=None) -> PreparedBody:
+    """
+    序列化 JSON 请求体，超过阈值时压缩
+
+    Args:
+        data: 请求数据
+        config: 压缩配置，None 表示不压缩
+        dumps: 序列化函数（返回 bytes），默认与 requests 的 json= 一致
+
+    Returns:
+        PreparedBody
+    """
+    raw = dumps(data) if dumps else json.dumps(data, allow_nan=False).encode("utf-8")
+    if config is None or len(raw) < config.threshold:
+        return PreparedBody(raw)
+    return PreparedBody(raw, config.algorithm, compress(raw, config.algorithm, config.level))
+
+
+def rejects_encoding(status_code: int, text: str) -> bool:
+    """
+    服务端是否因为 Content-Encoding 拒绝了请求
+
+    415 视为拒绝；400 只有错误码或错误信息明确指向 Content-Encoding 时才算，
+    例如图片 base64 编码无效等普通参数错误不会触发以原始请求体重发。
+    """
+    if status_code == 415:
+        return True
+    if status_code != 400:
+        return False
+    try:
+        error = json.loads(text).get("error") or {}
+    except (ValueError, AttributeError):
+        error = {}
+    if not isinstance(error, dict):
+        error = {}
+    code = str(error.get("code") or "").lower().replace("-", "").replace("_", "").replace(".", "")
+    if "contentencoding" in code:
+        return True
+    message = str(error.get("message") or text).lower()
+    return "content-encoding" in message or "content encoding" in message
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+请求级容错：对冲请求与熔断
+
+- 对冲（hedging）：幂等的 GET 请求（查询任务、列出任务）在超过该端点近期延迟的
+  p95 后仍未返回时，再发送一个相同请求，采用先返回的结果，消除偶发的长尾卡顿。
+- 熔断（circuit breaker）：按端点统计连续的超时、连接错误和 5xx；
+  达到阈值后在冷却期内直接失败，不再向故障中的服务发送请求，
+  冷却期结束后放行少量探测请求，成功后恢复。
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class ResilienceConfig:
+    """对冲与熔断配置"""
+    # 是否对幂等 GET 请求启用对冲
+    hedge: bool = True
+    # 对冲延迟取该端点近期延迟的分位数
+    hedge_quantile: float = 0.95
+    # 对冲延迟的上下限（秒），样本不足时使用 hedge_initial_delay
+    hedge_min_delay: float = 0.05
+    hedge_max_delay: float = 5.0
+    hedge_initial_delay: float = 1.0
+    # 计算分位数使用的最近样本数，以及开始使用分位数的最少样本数
+    hedge_window: int = 200
+    hedge_min_samples: int = 20
+    # 对冲请求数不超过调用数的该比例，避免服务变慢时对冲进一步加重负载
+    hedge_budget: float = 0.1
+    # 是否启用按端点的熔断
+    breaker: bool = True
+    # 连续失败达到该次数后熔断
+    breaker_failures: int = 5
+    # 熔断冷却时间（秒），之后进入半开状态放行探测请求
+    breaker_cooldown: float = 30.0
+    # 半开状态同时放行的探测请求数
+    breaker_probes: int = 1
+
+
+class LatencyTracker:
+    """最近若干次请求（收到响应为止）的延迟（线程安全）"""
+
+    def __init__(self, window: int):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        """样本数不足时返回 None"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            values = sorted(self._samples)
+        return values[min(len(values) - 1, math.ceil(q * len(values)) - 1)]
+
+
+class CircuitBreaker:
+    """
+    连续失败计数熔断器（线程安全）
+
+    closed：正常放行；open：冷却期内全部拒绝；
+    half_open：冷却期结束后放行 probes 个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, failures: int, cooldown: float, probes: int = 1):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.probes = probes
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """是否放行一个请求（放行的请求必须随后调用 record_success/record_failure）"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = "half_open"
+                self._probing = 0
+            if self.state == "half_open":
+                if self._probing >= self.probes:
+                    self.rejected += 1
+                    return False
+                self._probing += 1
+            return True
+
+    def retry_after(self) -> float:
+        """距离下次放行探测请求的秒数"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(self.cooldown - (time.monotonic() - self._opened_at), 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            if self.state == "half_open":
+                self.state = "closed"
+                self._probing = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self.state == "half_open" or self._consecutive >= self.failures:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = 0
+
+
+class EndpointStats:
+    """每个端点的请求、对冲和熔断统计"""
+
+    def __init__(self, config: ResilienceConfig):
+        self.config = config
+        self.latency = LatencyTracker(config.hedge_window)
+        self.breaker = CircuitBreaker(config.breaker_failures, config.breaker_cooldown, config.breaker_probes)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> float:
+        """当前对冲延迟：近期延迟分位数，限制在上下限之间"""
+        value = self.latency.quantile(self.config.hedge_quantile, self.config.hedge_min_samples)
+        if value is None:
+            value = self.config.hedge_initial_delay
+        return min(max(value, self.config.hedge_min_delay), self.config.hedge_max_delay)
+
+    def count(self, calls: int = 0, requests: int = 0, hedge_wins: int = 0):
+        with self._lock:
+            self.calls += calls
+            self.requests += requests
+            self.hedge_wins += hedge_wins
+
+    def try_hedge(self) -> bool:
+        """对冲预算内时计数并返回 True"""
+        with self._lock:
+            if self.hedges + 1 > self.config.hedge_budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.latency.quantile(0.95, 1)
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+                "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+                "breaker": self.breaker.state,
+                "breaker_trips": self.breaker.trips,
+                "rejected": self.breaker.rejected,
+            }
+
+
+def endpoint_key(method: str, endpoint: str) -> str:
+    """
+    将请求归类为端点名称（用于分别统计延迟和熔断）
+
+    Returns:
+        "get_task"、"list_tasks"、"create_task"、"cancel_task" 或 "METHOD endpoint"
+    """
+    base = "/contents/generations/tasks"
+    if endpoint == base:
+        return {"GET": "list_tasks", "POST": "create_task"}.get(method, f"{method} {endpoint}")
+    if endpoint.startswith(base + "/"):
+        return {"GET": "get_task", "DELETE": "cancel_task"}.get(method, f"{method} {base}/{{id}}")
+    return f"{method} {endpoint}"
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+尾帧优先的审核模式
+
+大多数生成结果在审核时被淘汰，完整下载每个视频浪费 CDN 带宽和磁盘。审核模式下
+任务以 return_last_frame=true 创建，只下载几百 KB 的尾帧图片（图生视频任务另外保存
+输入的首帧，不产生下载），生成本地索引页 index.html（contact sheet）。审核通过的任务
+才加入下载队列（download_queue.py），按视频 URL 过期时间优先下载完整视频。
+
+审核目录结构：
+    <dir>/review.db          审核状态（SQLite）
+    <dir>/frames/            尾帧与首帧图片
+    <dir>/index.html         索引页，按待审核、通过、淘汰分组，待审核按视频过期时间排序
+    <dir>/downloads.db       通过任务的下载队列（fetch 时创建）
+"""
+
+import os
+import sys
+import html
+import time
+import base64
+import shutil
+import sqlite3
+import argparse
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+try:
+    import requests
+    from seedance_client import SeedanceClient, TaskInfo, TaskStatus, TransportConfig, parse_timestamp
+    from download_queue import DownloadQueue, url_expires_at
+    from cancel_task import parse_age
+    from profiling import add_profiling_arguments, profiled, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import requests
+    from seedance_client import SeedanceClient, TaskInfo, TaskStatus, TransportConfig, parse_timestamp
+    from download_queue import DownloadQueue, url_expires_at
+    from cancel_task import parse_age
+    from profiling import add_profiling_arguments, profiled, start_profiling
+
+
+DECISIONS = ("pending", "approved", "rejected")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    task_id           TEXT PRIMARY KEY,
+    model             TEXT,
+    prompt            TEXT,
+    resolution        TEXT,
+    ratio             TEXT,
+    duration          INTEGER,
+    video_url         TEXT,
+    video_expires_at  REAL NOT NULL,
+    last_frame        TEXT,
+    first_frame       TEXT,
+    frame_bytes       INTEGER NOT NULL DEFAULT 0,
+    decision          TEXT NOT NULL DEFAULT 'pending',
+    note              TEXT,
+    decided_at        REAL,
+    output_path       TEXT,
+    added_at          REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_decision ON reviews (decision, video_expires_at);
+"""
+
+# 尾帧图片的扩展名（按 Content-Type）
+IMAGE_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+
+
+def default_review_dir() -> str:
+    """审核目录：SEEDANCE_REVIEW_DIR 环境变量，默认 ./review"""
+    return os.environ.get("SEEDANCE_REVIEW_DIR", "review")
+
+
+class ReviewIndex:
+    """审核目录中的任务索引"""
+
+    def __init__(self, directory: str, session: Optional[requests.Session] = None):
+        """
+        Args:
+            directory: 审核目录（不存在时创建）
+            session: 下载尾帧使用的会话（通常为 SeedanceClient.cdn_session）
+        """
+        self.directory = Path(directory)
+        self.frames_dir = self.directory / "frames"
+        self.frames_dir.mkdir(parents=True, exist_ok=True)
+        self.session = session
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.directory / "review.db"), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def __contains__(self, task_id: str) -> bool:
+        return bool(self._execute("SELECT 1 FROM reviews WHERE task_id = ?", (task_id,)))
+
+    @profiled("download")
+    def _fetch_frame(self, task_id: str, url: str) -> Path:
+        """下载尾帧到 frames/，返回文件路径"""
+        http = self.session or requests
+        with http.get(url, timeout=(10, 60)) as response:
+            response.raise_for_status()
+            mime = response.headers.get("content-type", "").split(";")[0].strip()
+            data = response.content
+        suffix = IMAGE_EXTENSIONS.get(mime) or Path(urlparse(url).path).suffix or ".png"
+        path = self.frames_dir / f"{task_id}.last{suffix}"
+        part_path = path.with_name(path.name + ".part")
+        part_path.write_bytes(data)
+        os.replace(part_path, path)
+        return path
+
+    def _store_first_frame(self, task_id: str, source: str) -> str:
+        """
+        保存首帧（输入图片），不访问网络
+
+        Args:
+            source: 本地路径、data URL 或 http(s) URL（URL 原样引用）
+
+        Returns:
+            索引页中使用的图片地址
+        """
+        if source.startswith(("http://", "https://")):
+            return source
+        if source.startswith("data:"):
+            header, _, data = source.partition(",")
+            suffix = mimetypes.guess_extension(header[5:].split(";")[0]) or ".png"
+            path = self.frames_dir / f"{task_id}.first{suffix}"
+            path.write_bytes(base64.b64decode(data))
+        else:
+            path = self.frames_dir / f"{task_id}.first{Path(source).suffix or '.png'}"
+            shutil.copyfile(source, path)
+        return path.relative_to(self.directory).as_posix()
+
+    def add(self, task: TaskInfo, prompt: Optional[str] = None, first_frame: Optional[str] = None) -> bool:
+        """
+        下载尾帧并加入待审核
+
+        Args:
+            task: 已成功且带 last_frame_url 的任务（创建时需要 return_last_frame=true）
+            prompt: 提示词（仅用于索引页显示）
+            first_frame: 首帧来源，见 _store_first_frame
+
+        Returns:
+            是否新加入（已在索引中的任务返回 False）
+
+        Raises:
+            ValueError: 任务未成功或没有尾帧
+        """
+        if task.id in self:
+            return False
+        if task.status != TaskStatus.SUCCEEDED:
+            raise ValueError(f"Task {task.id} is {task.status.value}")
+        if not task.last_frame_url:
+            raise ValueError(f"Task {task.id} has no last_frame_url (create it with return_last_frame=true)")
+
+        path = self._fetch_frame(task.id, task.last_frame_url)
+        first = self._store_first_frame(task.id, first_frame) if first_frame else None
+        expires_at = url_expires_at(task.video_url, parse_timestamp(task.updated_at))
+        self._execute(
+            """
+            INSERT OR IGNORE INTO reviews (task_id, model, prompt, resolution, ratio, duration, video_url,
+                video_expires_at, last_frame, first_frame, frame_bytes, added_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (task.id, task.model, prompt, task.resolution, task.ratio, task.duration, task.video_url, expires_at,
+             path.relative_to(self.directory).as_posix(), first, path.stat().st_size, time.time())
+        )
+        return True
+
+    def add_many(self, tasks: List[TaskInfo], max_workers: int = 8) -> Dict[str, Any]:
+        """
+        并发下载多个任务的尾帧
+
+        Returns:
+            {"added": 新加入数, "skipped": 已存在或不可审核数, "errors": {task_id: 错误信息}}
+        """
+        result = {"added": 0, "skipped": 0, "errors": {}}
+
+        def add(task):
+            try:
+                return self.add(task)
+            except ValueError:
+                return False
+            except Exception as e:
+                result["errors"][task.id] = str(e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for added in executor.map(add, tasks):
+                if added:
+                    result["added"] += 1
+                elif added is False:
+                    result["skipped"] += 1
+        return result
+
+    def decide(self, task_ids: List[str], decision: str, note: Optional[str] = None) -> int:
+        """
+        记录审核结果（可以改判）
+
+        Returns:
+            更新的任务数
+        """
+        if decision not in DECISIONS:
+            raise ValueError(f"Invalid decision: {decision}")
+        updated = 0
+        for task_id in task_ids:
+            with self._lock:
+                cursor = self._db.execute(
+                    "UPDATE reviews SET decision = ?, note = COALESCE(?, note), decided_at = ? WHERE task_id = ?",
+                    (decision, note, time.time(), task_id)
+                )
+            updated += cursor.rowcount
+        return updated
+
+    def rows(self, decision: Optional[str] = None) -> List[sqlite3.Row]:
+        """按审核结果筛选，按视频过期时间排序"""
+        if decision:
+            return self._execute(
+                "SELECT * FROM reviews WHERE decision = ? ORDER BY video_expires_at", (decision,)
+            )
+        return self._execute("SELECT * FROM reviews ORDER BY video_expires_at")
+
+    def enqueue_approved(self, queue: DownloadQueue, output_dir: str) -> int:
+        """
+        把尚未入队的通过任务加入下载队列
+
+        Returns:
+            新入队的任务数
+        """
+        count = 0
+        for row in self._execute(
+            "SELECT * FROM reviews WHERE decision = 'approved' AND output_path IS NULL ORDER BY video_expires_at"
+        ):
+            output_path = str(Path(output_dir) / f"video_{row['task_id'].split('-')[-1]}.mp4")
+            queue.add(row["task_id"], output_path, row["video_url"], row["video_expires_at"])
+            self._execute("UPDATE reviews SET output_path = ? WHERE task_id = ?", (output_path, row["task_id"]))
+            count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            各审核结果数量、尾帧和已下载视频的字节数、按已下载视频的平均大小估算的
+            全部下载字节数，以及 1 小时内视频过期的待审核数
+        """
+        counts = {row["decision"]: row["n"] for row in self._execute(
+            "SELECT decision, COUNT(*) AS n FROM reviews GROUP BY decision"
+        )}
+        total = sum(counts.values())
+        frame_bytes = self._execute("SELECT COALESCE(SUM(frame_bytes), 0) AS n FROM reviews")[0]["n"]
+        video_sizes = [
+            Path(row["output_path"]).stat().st_size
+            for row in self._execute("SELECT output_path FROM reviews WHERE output_path IS NOT NULL")
+            if Path(row["output_path"]).exists()
+        ]
+        video_bytes = sum(video_sizes)
+        full_bytes = video_bytes / len(video_sizes) * total if video_sizes else None
+        expiring = self._execute(
+            "SELECT COUNT(*) AS n FROM reviews WHERE decision = 'pending' AND video_expires_at < ?",
+            (time.time() + 3600,)
+        )[0]["n"]
+        return {
+            **{decision: counts.get(decision, 0) for decision in DECISIONS},
+            "frame_bytes": frame_bytes,
+            "videos_fetched": len(video_sizes),
+            "video_bytes": video_bytes,
+            "estimated_full_download_bytes": round(full_bytes) if full_bytes else None,
+            "saved_ratio": round(1 - (frame_bytes + video_bytes) / full_bytes, 4) if full_bytes else None,
+            "pending_expiring_1h": expiring,
+        }
+
+    def write_sheet(self) -> Path:
+        """生成索引页 index.html"""
+        now = time.time()
+        sections = []
+        for decision in DECISIONS:
+            rows = self.rows(decision)
+            cards = []
+            for row in rows:
+                remaining = row["video_expires_at"] - now
+                expiry = f"video expires in {remaining / 3600:.1f}h" if remaining > 0 else "video expired"
+                images = "".join(
+                    f'<img src="{html.escape(src)}" loading="lazy" alt="{label}">'
+                    for label, src in (("first", row["first_frame"]), ("last", row["last_frame"])) if src
+                )
+                meta = " · ".join(str(v) for v in (row["resolution"], row["ratio"],
+                                                   f"{row['duration']}s" if row["duration"] else None) if v)
+                link = (f' · <a href="{html.escape(row["video_url"])}">play</a>'
+                        if row["video_url"] and remaining > 0 else "")
+                cards.append(
+                    f'<div class="card">{images}<div class="id">{html.escape(row["task_id"])}</div>'
+                    f'<div>{html.escape(meta)}</div>'
+                    f'<div class="{"urgent" if remaining < 3600 else ""}">{expiry}{link}</div>'
+                    f'<div class="prompt">{html.escape(row["prompt"] or "")}</div>'
+                    f'<div>{html.escape(row["note"] or "")}</div>'
+                    "</div>"
+                )
+            sections.append(f"<h2>{decision} ({len(rows)})</h2><div class=\"grid\">{''.join(cards)}</div>")
+
+        path = self.directory / "index.html"
+        path.write_text(
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Seedance review</title><style>"
+            "body{font-family:sans-serif;margin:1em}.grid{display:flex;flex-wrap:wrap;gap:12px}"
+            ".card{width:340px;font-size:12px}.card img{width:165px;margin-right:5px}"
+            ".id{font-family:monospace;font-weight:bold}.urgent{color:#c00}.prompt{color:#555}"
+            "</style></head><body>"
+            f"<p>Generated {time.strftime('%Y-%m-%d %H:%M:%S')}. Approve with "
+            "<code>review.py approve &lt;task_id&gt;...</code>, then <code>review.py fetch</code>.</p>"
+            + "".join(sections) + "</body></html>",
+            encoding="utf-8"
+        )
+        return path
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """格式化审核统计"""
+    lines = [
+        f"Pending: {stats['pending']}  Approved: {stats['approved']}  Rejected: {stats['rejected']}",
+        f"Frames: {stats['frame_bytes'] / 1024 / 1024:.2f} MB  "
+        f"Videos: {stats['videos_fetched']} fetched, {stats['video_bytes'] / 1024 / 1024:.2f} MB",
+    ]
+    if stats["estimated_full_download_bytes"]:
+        lines.append(
+            f"Downloading every video: ~{stats['estimated_full_download_bytes'] / 1024 / 1024:.1f} MB "
+            f"(saved {stats['saved_ratio']:.1%})"
+        )
+    if stats["pending_expiring_1h"]:
+        lines.append(f"⚠️  {stats['pending_expiring_1h']} pending task(s) have videos expiring within 1 hour")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Review finished tasks by their last frame and download only approved videos",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Create tasks straight into review (sets return_last_frame, fetches only the last frame)
+  python create_task.py --prompt "海边日落" --review ./review
+
+  # Pull last frames of all tasks that succeeded in the last 24 hours
+  python review.py --dir ./review collect --since 24h
+
+  # Open review/index.html, then record decisions
+  python review.py --dir ./review approve cgt-20250101-abc cgt-20250101-def
+  python review.py --dir ./review reject cgt-20250101-xyz --note "hands"
+
+  # Download approved videos, most urgent URL first
+  python review.py --dir ./review fetch --output-dir ./output
+        """
+    )
+    parser.add_argument(
+        "--dir",
+        type=str,
+        default=default_review_dir(),
+        help="Review directory (default: SEEDANCE_REVIEW_DIR env variable or ./review)"
+    )
+    parser.add_argument("--api-key", type=str, help="Override API Key")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Fetch last frames of tasks into the review")
+    add_parser.add_argument("task_ids", nargs="+", help="Task IDs")
+    add_parser.add_argument("--first-frame", type=str, help="Input image to show as first frame (single task)")
+    add_parser.add_argument("--prompt", type=str, help="Prompt to show on the sheet (single task)")
+
+    collect_parser = subparsers.add_parser("collect", help="Add all recently succeeded tasks with a last frame")
+    collect_parser.add_argument("--since", type=str, default="24h", help="Created within this age (default: 24h)")
+    collect_parser.add_argument("--model", type=str, help="Only this model")
+    collect_parser.add_argument("--max-workers", type=int, default=8, help="Parallel frame downloads (default: 8)")
+
+    for decision, verb in (("approve", "Approve"), ("reject", "Reject"), ("reset", "Mark as pending again")):
+        decide_parser = subparsers.add_parser(decision, help=f"{verb} tasks")
+        decide_parser.add_argument("task_ids", nargs="+", help="Task IDs")
+        decide_parser.add_argument("--note", type=str, help="Note shown on the sheet")
+
+    fetch_parser = subparsers.add_parser("fetch", help="Download approved videos through the download queue")
+    fetch_parser.add_argument("--output-dir", type=str, default="output", help="Output directory (default: ./output)")
+    fetch_parser.add_argument("--download-queue", type=str, metavar="DB",
+                              help="Download queue database (default: <dir>/downloads.db)")
+    fetch_parser.add_argument("--max-workers", type=int, default=8, help="Maximum concurrency (default: 8)")
+    fetch_parser.add_argument("--enqueue-only", action="store_true",
+                              help="Only enqueue; run download_queue.py run separately")
+
+    subparsers.add_parser("sheet", help="Regenerate index.html")
+    subparsers.add_parser("stats", help="Show review and bandwidth statistics")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "review")
+
+    try:
+        client = None
+        if args.command in ("add", "collect", "fetch"):
+            transport = TransportConfig(max_concurrency=getattr(args, "max_workers", 10))
+            client = SeedanceClient(api_key=args.api_key, transport=transport)
+        index = ReviewIndex(args.dir, session=client.cdn_session if client else None)
+        output: Dict[str, Any] = {}
+
+        if args.command == "add":
+            if len(args.task_ids) > 1 and (args.first_frame or args.prompt):
+                parser.error("--first-frame and --prompt apply to a single task")
+            for task_id in args.task_ids:
+                task = client.get_task(task_id)
+                added = index.add(task, prompt=args.prompt, first_frame=args.first_frame)
+                output[task_id] = "added" if added else "already in review"
+                if not args.json:
+                    print(f"{task_id}: {output[task_id]}")
+
+        elif args.command == "collect":
+            since = time.time() - parse_age(args.since)
+            tasks = []
+            for item in client.iter_tasks(status="succeeded", model=args.model):
+                task = TaskInfo.from_dict(item)
+                created = parse_timestamp(task.created_at)
+                if task.last_frame_url and (created is None or created >= since) and task.id not in index:
+                    tasks.append(task)
+            output = index.add_many(tasks, max_workers=args.max_workers)
+            if not args.json:
+                print(f"Added {output['added']} task(s), skipped {output['skipped']}")
+                for task_id, error in output["errors"].items():
+                    print(f"   ⚠️  {task_id}: {error}", file=sys.stderr)
+
+        elif args.command in ("approve", "reject", "reset"):
+            decision = {"approve": "approved", "reject": "rejected", "reset": "pending"}[args.command]
+            updated = index.decide(args.task_ids, decision, note=args.note)
+            output = {"updated": updated}
+            if not args.json:
+                print(f"{decision.capitalize()}: {updated} task(s)")
+            if updated < len(args.task_ids):
+                print(f"Warning: {len(args.task_ids) - updated} task(s) not in review", file=sys.stderr)
+
+        elif args.command == "fetch":
+            queue = DownloadQueue(args.download_queue or str(index.directory / "downloads.db"), client=client)
+            enqueued = index.enqueue_approved(queue, args.output_dir)
+            if not args.enqueue_only:
+                queue.run(max_workers=args.max_workers)
+            output = {"enqueued": enqueued, **queue.metrics()}
+            queue.close()
+            if not args.json:
+                print(f"Enqueued {enqueued} approved video(s)")
+
+        if args.command != "stats":
+            sheet = index.write_sheet()
+            if not args.json and args.command != "sheet":
+                print(f"Contact sheet: {sheet}")
+            elif not args.json:
+                print(f"Wrote {sheet}")
+
+        if args.command in ("stats", "fetch"):
+            stats = index.stats()
+            output.update(stats)
+            if not args.json:
+                print(format_stats(stats))
+
+        if args.json:
+            import json
+            print(json.dumps(output, indent=2, ensure_ascii=False))
+
+        index.close()
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,700 @@
+#!/usr/bin/env python3
+"""
+多镜头项目执行器
+
+读取 YAML/JSON 描述的镜头依赖图，并发执行互不依赖的分支。
+用 from 指定的子镜头以该父镜头的尾帧作为首帧：父镜头完成后只下载很小的尾帧图片，
+立即提交子镜头，不等待完整视频下载。结束后输出关键路径耗时。
+"""
+
+import os
+import sys
+import time
+import json
+import queue
+import base64
+import argparse
+import threading
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    from seedance_client import SeedanceClient, TaskStatus, TransportConfig
+    from create_task import read_image_file
+    from downloader import download_video
+    from capabilities import PASSTHROUGH_PREFIXES, compile_payload, validate_job
+    from image_probe import check_image_file
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import SeedanceClient, TaskStatus, TransportConfig
+    from create_task import read_image_file
+    from downloader import download_video
+    from capabilities import PASSTHROUGH_PREFIXES, compile_payload, validate_job
+    from image_probe import check_image_file
+    from profiling import add_profiling_arguments, start_profiling
+
+
+# 项目文件 defaults 未指定时使用的参数（与 create_task.py 默认值一致）
+DEFAULT_PARAMS: Dict[str, Any] = {
+    "model": "doubao-seedance-1-5-pro-251215",
+    "resolution": "720p",
+    "ratio": "16:9",
+    "duration": 5,
+    "watermark": False,
+    "service_tier": "default",
+}
+
+# 直接透传到请求 payload 的镜头参数
+PAYLOAD_FIELDS = (
+    "model", "resolution", "ratio", "duration", "frames", "seed", "watermark",
+    "camera_fixed", "generate_audio", "service_tier", "return_last_frame",
+)
+
+SHOT_FIELDS = {"id", "prompt", "after", "from", "image", "last_frame", "output"} | set(PAYLOAD_FIELDS)
+
+
+class ProjectError(Exception):
+    """项目文件无效"""
+    pass
+
+
+@dataclass
+class Shot:
+    """镜头定义"""
+    id: str
+    prompt: Optional[str] = None
+    # 依赖的镜头，全部完成后才会提交本镜头
+    after: List[str] = field(default_factory=list)
+    # 使用该父镜头的尾帧作为首帧
+    chain_from: Optional[str] = None
+    image: Optional[str] = None
+    last_frame: Optional[str] = None
+    output: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ShotResult:
+    """镜头执行结果，时间为相对项目开始的秒数"""
+    shot_id: str
+    status: str = "pending"
+    task_id: Optional[str] = None
+    error: Optional[str] = None
+    # 依赖全部满足的时间
+    ready_at: Optional[float] = None
+    # 开始提交任务的时间
+    submitted_at: Optional[float] = None
+    # 首次观察到 running 的时间
+    started_at: Optional[float] = None
+    # 任务进入终态的时间
+    finished_at: Optional[float] = None
+    # 子镜头可以开始的时间（尾帧已获取）
+    released_at: Optional[float] = None
+    video_url: Optional[str] = None
+    download_path: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+
+def parse_project(data: Dict[str, Any], base_dir: Optional[Path] = None) -> List[Shot]:
+    """
+    解析项目定义并校验依赖图
+
+    Args:
+        data: 包含 shots 列表和可选 defaults 的字典
+        base_dir: 图片等相对路径的基准目录
+
+    Returns:
+        按拓扑序排列的镜头列表
+
+    Raises:
+        ProjectError: 字段无效、依赖不存在或存在环
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("shots"), list):
+        raise ProjectError("Project must contain a 'shots' list")
+
+    defaults = dict(DEFAULT_PARAMS)
+    defaults.update(data.get("defaults") or {})
+
+    def resolve(path: Optional[str]) -> Optional[str]:
+        if path and base_dir is not None and not os.path.isabs(path):
+            return str(base_dir / path)
+        return path
+
+    shots: Dict[str, Shot] = {}
+    for index, raw in enumerate(data["shots"]):
+        if not isinstance(raw, dict) or not raw.get("id"):
+            raise ProjectError(f"Shot #{index + 1} must be a mapping with an 'id'")
+        shot_id = str(raw["id"])
+        if shot_id in shots:
+            raise ProjectError(f"Duplicate shot id: {shot_id}")
+        unknown = set(raw) - SHOT_FIELDS
+        if unknown:
+            raise ProjectError(f"Shot {shot_id}: unknown fields {', '.join(sorted(unknown))}")
+
+        # after 只表示依赖顺序，只有显式的 from 才以父镜头尾帧作为首帧
+        after = _as_list(raw.get("after"))
+        chain_from = raw.get("from")
+        if chain_from is not None:
+            chain_from = str(chain_from)
+            if raw.get("image"):
+                raise ProjectError(f"Shot {shot_id}: 'image' and 'from' are mutually exclusive")
+            if chain_from not in after:
+                after.append(chain_from)
+
+        if not raw.get("prompt") and not raw.get("image") and chain_from is None:
+            raise ProjectError(f"Shot {shot_id}: needs a prompt, an image or a parent shot")
+
+        params = {name: defaults[name] for name in PAYLOAD_FIELDS if name in defaults}
+        params.update({name: raw[name] for name in PAYLOAD_FIELDS if name in raw})
+
+        shot = Shot(
+            id=shot_id,
+            prompt=raw.get("prompt"),
+            after=after,
+            chain_from=chain_from,
+            image=resolve(raw.get("image")),
+            last_frame=resolve(raw.get("last_frame")),
+            output=raw.get("output"),
+            params=params
+        )
+
+        # 父镜头尾帧在运行时才可用，校验时用占位 data URL 代替
+        placeholder = "data:image/png;base64," if chain_from else None
+        problems = validate_job(shot_job(shot, placeholder))
+        for path in (shot.image, shot.last_frame):
+            if path and not path.startswith(PASSTHROUGH_PREFIXES):
+                problems.extend(f"{path}: {problem}" for problem in check_image_file(path, params.get("model")))
+        if problems:
+            raise ProjectError(f"Shot {shot_id}: {'; '.join(problems)}")
+        shots[shot_id] = shot
+
+    # Kahn 拓扑排序，同时检查未知依赖和环
+    indegree = {shot_id: 0 for shot_id in shots}
+    children: Dict[str, List[str]] = {shot_id: [] for shot_id in shots}
+    for shot in shots.values():
+        for parent in shot.after:
+            if parent not in shots:
+                raise ProjectError(f"Shot {shot.id}: unknown dependency '{parent}'")
+            indegree[shot.id] += 1
+            children[parent].append(shot.id)
+
+    ordered = []
+    frontier = [shot_id for shot_id, degree in indegree.items() if degree == 0]
+    while frontier:
+        shot_id = frontier.pop(0)
+        ordered.append(shots[shot_id])
+        for child in children[shot_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                frontier.append(child)
+
+    if len(ordered) != len(shots):
+        cyclic = sorted(shot_id for shot_id, degree in indegree.items() if degree > 0)
+        raise ProjectError(f"Dependency cycle among shots: {', '.join(cyclic)}")
+
+    return ordered
+
+
+def load_project(path: str) -> List[Shot]:
+    """
+    读取 YAML 或 JSON 项目文件
+
+    Args:
+        path: 项目文件路径（.yaml/.yml 需要 PyYAML）
+
+    Returns:
+        按拓扑序排列的镜头列表
+    """
+    project_path = Path(path)
+    text = project_path.read_text(encoding="utf-8")
+    if project_path.suffix.lower() in (".yaml", ".yml"):
+        if yaml is None:
+            raise ImportError(
+                "Missing optional dependency for YAML projects: pyyaml. "
+                "Install with: pip install pyyaml"
+            )
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    return parse_project(data, base_dir=project_path.parent)
+
+
+def shot_job(shot: Shot, first_frame: Optional[str] = None) -> Dict[str, Any]:
+    """
+    将镜头转换为 compile_payload 的任务描述
+
+    Args:
+        shot: 镜头定义
+        first_frame: 父镜头尾帧的 data URL（没有时使用 shot.image）
+
+    Returns:
+        任务描述
+    """
+    job = dict(shot.params)
+    job.update(prompt=shot.prompt, image=first_frame or shot.image, last_frame=shot.last_frame)
+    return job
+
+
+def build_payload(shot: Shot, first_frame: Optional[str], return_last_frame: bool) -> Dict[str, Any]:
+    """
+    构建镜头的创建任务 payload
+
+    Args:
+        shot: 镜头定义
+        first_frame: 父镜头尾帧的 data URL（没有时读取 shot.image）
+        return_last_frame: 是否需要返回尾帧（有子镜头以其为首帧时为 True）
+
+    Returns:
+        请求 payload
+    """
+    job = shot_job(shot, first_frame)
+    if return_last_frame:
+        job["return_last_frame"] = True
+    return compile_payload(job, read_image=read_image_file)
+
+
+def critical_path(shots: List[Shot], results: Dict[str, ShotResult]) -> List[str]:
+    """
+    计算关键路径
+
+    从最晚结束的镜头开始，沿“最晚放行的父镜头”回溯。
+
+    Returns:
+        关键路径上的镜头 ID（从根到叶）
+    """
+    by_id = {shot.id: shot for shot in shots}
+    finished = [r for r in results.values() if r.finished_at is not None]
+    if not finished:
+        return []
+
+    current = max(finished, key=lambda r: r.finished_at).shot_id
+    path = [current]
+    while by_id[current].after:
+        parents = [results[p] for p in by_id[current].after if results[p].released_at is not None]
+        if not parents:
+            break
+        current = max(parents, key=lambda r: r.released_at).shot_id
+        path.append(current)
+    path.reverse()
+    return path
+
+
+class ProjectRunner:
+    """
+    项目执行器
+
+    每个镜头在线程池中执行“提交 → 轮询 → 获取尾帧”，完整视频在单独的下载线程池中下载；
+    主线程在镜头放行（尾帧可用）后立即提交依赖它的子镜头，
+    视频下载与子镜头生成并行进行，不占用镜头线程。
+    """
+
+    def __init__(
+        self,
+        client: SeedanceClient,
+        shots: List[Shot],
+        concurrency: int = 4,
+        poll_interval: int = 5,
+        timeout: int = 1800,
+        download_dir: Optional[str] = None,
+        frames_dir: Optional[str] = None,
+        on_event=None
+    ):
+        """
+        Args:
+            client: SeedanceClient
+            shots: load_project/parse_project 的结果
+            concurrency: 同时执行的镜头数
+            poll_interval: 轮询间隔（秒）
+            timeout: 单个镜头的超时时间（秒）
+            download_dir: 下载完整视频的目录，None 表示不下载
+            frames_dir: 保存尾帧图片的目录，None 表示不保存
+            on_event: 事件回调，参数为 (事件名, ShotResult)
+        """
+        self.client = client
+        self.shots = shots
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.download_dir = Path(download_dir) if download_dir else None
+        self.frames_dir = Path(frames_dir) if frames_dir else None
+        self.on_event = on_event
+
+        self._by_id = {shot.id: shot for shot in shots}
+        self._children: Dict[str, List[str]] = {shot.id: [] for shot in shots}
+        for shot in shots:
+            for parent in shot.after:
+                self._children[parent].append(shot.id)
+        self._chained = {shot.chain_from for shot in shots if shot.chain_from}
+
+        self.results = {shot.id: ShotResult(shot.id) for shot in shots}
+        self._events: "queue.Queue" = queue.Queue()
+        self._downloads: Optional[ThreadPoolExecutor] = None
+        self._start = 0.0
+
+    def _now(self) -> float:
+        return round(time.monotonic() - self._start, 3)
+
+    def _emit(self, name: str, result: ShotResult):
+        if self.on_event:
+            self.on_event(name, result)
+
+    def _fetch_last_frame(self, shot: Shot, url: str) -> str:
+        """下载尾帧图片并编码为 data URL"""
+        response = self.client.cdn_session.get(url, timeout=self.client.timeout)
+        response.raise_for_status()
+        mime_type = response.headers.get("content-type", "image/png").split(";")[0]
+        if self.frames_dir:
+            self.frames_dir.mkdir(parents=True, exist_ok=True)
+            extension = mime_type.split("/")[-1].replace("jpeg", "jpg")
+            (self.frames_dir / f"{shot.id}_last.{extension}").write_bytes(response.content)
+        data = base64.b64encode(response.content).decode("utf-8")
+        return f"data:{mime_type};base64,{data}"
+
+    def _run_shot(self, shot: Shot, first_frame: Optional[str]):
+        result = self.results[shot.id]
+        result.submitted_at = self._now()
+        try:
+            payload = build_payload(shot, first_frame, shot.id in self._chained)
+            task = self.client.create_task(payload)
+            result.task_id = task.id
+            result.status = "running"
+            self._emit("submitted", result)
+
+            def observe(current):
+                if result.started_at is None and current.status == TaskStatus.RUNNING:
+                    result.started_at = self._now()
+
+            task = self.client.wait_for_completion(
+                task.id, poll_interval=self.poll_interval, timeout=self.timeout, callback=observe
+            )
+            result.finished_at = self._now()
+            if task.status != TaskStatus.SUCCEEDED:
+                result.status = task.status.value
+                result.error = task.error_message or f"Task {task.status.value}"
+                self._events.put(("failed", shot.id, None))
+                return
+
+            result.video_url = task.video_url
+            frame = None
+            if shot.id in self._chained:
+                if not task.last_frame_url:
+                    raise ValueError("Task returned no last_frame_url")
+                frame = self._fetch_last_frame(shot, task.last_frame_url)
+            result.released_at = self._now()
+            self._events.put(("released", shot.id, frame))
+
+            if self.download_dir and task.video_url:
+                # 下载交给下载线程池，镜头线程立即用于下一个镜头
+                self._downloads.submit(self._download, shot, task)
+                return
+
+            result.status = "succeeded"
+            self._events.put(("done", shot.id, None))
+
+        except Exception as e:
+            if result.finished_at is None:
+                result.finished_at = self._now()
+            result.status = "error"
+            result.error = str(e)
+            kind = "done" if result.released_at is not None else "failed"
+            self._events.put((kind, shot.id, None))
+
+    def _download(self, shot: Shot, task):
+        result = self.results[shot.id]
+        try:
+            self.download_dir.mkdir(parents=True, exist_ok=True)
+            output = self.download_dir / (shot.output or f"{shot.id}.mp4")
+            download_video(
+                task.video_url, output, session=self.client.cdn_session, task=task, timeout=self.client.download_timeout
+            )
+            result.download_path = str(output)
+            result.status = "succeeded"
+        except Exception as e:
+            # 尾帧已放行，子镜头不受影响，只记录下载错误
+            result.status = "error"
+            result.error = str(e)
+        self._events.put(("done", shot.id, None))
+
+    def _skip_descendants(self, shot_id: str):
+        for child in self._children[shot_id]:
+            child_result = self.results[child]
+            if child_result.status == "pending":
+                child_result.status = "skipped"
+                child_result.error = f"Dependency {shot_id} did not succeed"
+                self._emit("skipped", child_result)
+                self._skip_descendants(child)
+
+    def run(self) -> Dict[str, ShotResult]:
+        """
+        执行项目
+
+        Returns:
+            {镜头 ID: ShotResult}
+        """
+        self._start = time.monotonic()
+        waiting = {shot.id: set(shot.after) for shot in self.shots}
+        frames: Dict[str, Optional[str]] = {}
+        outstanding = 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="shot") as executor, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="download") as downloads:
+            self._downloads = downloads
+            def submit(shot_id: str):
+                nonlocal outstanding
+                shot = self._by_id[shot_id]
+                self.results[shot_id].status = "queued"
+                self.results[shot_id].ready_at = self._now()
+                frame = None
+                if shot.chain_from:
+                    frame = frames.get(shot.chain_from)
+                    # 尾帧只在提交子镜头时需要，全部子镜头提交后释放
+                    siblings = self._children[shot.chain_from]
+                    if all(self.results[c].status != "pending" for c in siblings):
+                        frames.pop(shot.chain_from, None)
+                executor.submit(self._run_shot, shot, frame)
+                outstanding += 1
+
+            for shot in self.shots:
+                if not shot.after:
+                    submit(shot.id)
+
+            while outstanding:
+                kind, shot_id, frame = self._events.get()
+                result = self.results[shot_id]
+
+                if kind == "released":
+                    if self._children[shot_id]:
+                        self._emit("released", result)
+                    frames[shot_id] = frame
+                    for child in self._children[shot_id]:
+                        waiting[child].discard(shot_id)
+                        if not waiting[child] and self.results[child].status == "pending":
+                            submit(child)
+                    continue
+
+                outstanding -= 1
+                self._emit(kind, result)
+                if kind == "failed":
+                    self._skip_descendants(shot_id)
+
+        return self.results
+
+
+def format_report(shots: List[Shot], results: Dict[str, ShotResult]) -> str:
+    """
+    格式化执行结果与关键路径
+
+    Args:
+        shots: 镜头列表
+        results: ProjectRunner.run 的返回值
+
+    Returns:
+        格式化的字符串
+    """
+    def span(start, end):
+        if start is None or end is None:
+            return "-"
+        return f"{end - start:.1f}s"
+
+    lines = [
+        f"{'Shot':<16} {'Status':<10} {'Start':>8} {'End':>8} {'Wait':>7} {'Queue':>7} {'Run':>7} {'Frame':>7}  Task ID",
+        "-" * 100,
+    ]
+    for shot in shots:
+        r = results[shot.id]
+        start = f"{r.submitted_at:.1f}s" if r.submitted_at is not None else "-"
+        end = f"{r.released_at or r.finished_at:.1f}s" if r.finished_at is not None else "-"
+        lines.append(
+            f"{shot.id:<16} {r.status:<10} {start:>8} {end:>8} "
+            f"{span(r.ready_at, r.submitted_at):>7} "
+            f"{span(r.submitted_at, r.started_at or r.finished_at):>7} "
+            f"{span(r.started_at, r.finished_at):>7} "
+            f"{span(r.finished_at, r.released_at):>7}  {r.task_id or ''}"
+        )
+        if r.error:
+            lines.append(f"{'':<16} ↳ {r.error}")
+
+    path = critical_path(shots, results)
+    if path:
+        makespan = max(r.finished_at for r in results.values() if r.finished_at is not None)
+        lines.append("")
+        lines.append(f"Critical path: {' → '.join(path)} ({makespan:.1f}s makespan)")
+        totals = {"wait": 0.0, "queue": 0.0, "run": 0.0, "frame": 0.0}
+        for shot_id in path:
+            r = results[shot_id]
+            if r.ready_at is not None and r.submitted_at is not None:
+                totals["wait"] += r.submitted_at - r.ready_at
+            if r.submitted_at is not None and r.finished_at is not None:
+                totals["queue"] += (r.started_at or r.finished_at) - r.submitted_at
+            if r.started_at is not None and r.finished_at is not None:
+                totals["run"] += r.finished_at - r.started_at
+            if r.released_at is not None and r.finished_at is not None:
+                totals["frame"] += r.released_at - r.finished_at
+        lines.append("  " + ", ".join(f"{name} {value:.1f}s" for name, value in totals.items()))
+    return "\n".join(lines)
+
+
+def format_plan(shots: List[Shot]) -> str:
+    """格式化执行计划（--dry-run）"""
+    lines = []
+    for shot in shots:
+        deps = ", ".join(shot.after) if shot.after else "-"
+        first = f"last frame of {shot.chain_from}" if shot.chain_from else (shot.image or "text only")
+        lines.append(f"{shot.id:<16} after: {deps:<24} first frame: {first}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a multi-shot project graph, chaining shots through last frames",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Project file (YAML or JSON):
+  defaults:
+    model: doubao-seedance-1-5-pro-251215
+    resolution: 720p
+  shots:
+    - id: opening
+      prompt: "Wide shot of a harbor at dawn"
+    - id: dock
+      after: opening            # starts from opening's last frame
+      prompt: "Camera moves along the dock"
+    - id: boat
+      after: [opening]
+      prompt: "A boat leaves the harbor"
+
+Examples:
+  # Validate the graph and show the plan
+  python run_project.py project.yaml --dry-run
+
+  # Run with up to 4 shots in flight and download all videos
+  python run_project.py project.yaml --concurrency 4 --output-dir ./output/project
+        """
+    )
+
+    parser.add_argument("project", type=str, help="Project file (.yaml/.yml/.json)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Shots running at the same time (default: 4)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=5,
+        help="Seconds between polls (default: 5)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=1800,
+        help="Timeout per shot in seconds (default: 1800)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Download finished videos into this directory (default: no download)"
+    )
+    parser.add_argument(
+        "--frames-dir",
+        type=str,
+        help="Also save fetched last-frame images into this directory"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only validate the graph and print the execution plan"
+    )
+    parser.add_argument("--api-key", type=str, help="Override API Key")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "run_project")
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+
+    try:
+        shots = load_project(args.project)
+    except (OSError, ValueError, ImportError, ProjectError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.dry_run:
+        if args.json:
+            print(json.dumps([asdict(shot) for shot in shots], indent=2, ensure_ascii=False))
+        else:
+            print(format_plan(shots))
+        return
+
+    print_lock = threading.Lock()
+    started = time.monotonic()
+
+    def on_event(name, result):
+        if args.json:
+            return
+        with print_lock:
+            label = {
+                "submitted": f"submitted ({result.task_id})",
+                "released": "done, children released",
+                "done": result.status,
+                "failed": f"{result.status}: {result.error}",
+                "skipped": "skipped",
+            }[name]
+            print(f"[{time.monotonic() - started:7.1f}s] {result.shot_id}: {label}")
+
+    try:
+        client = SeedanceClient(
+            api_key=args.api_key,
+            transport=TransportConfig(max_concurrency=max(args.concurrency, 10))
+        )
+        runner = ProjectRunner(
+            client,
+            shots,
+            concurrency=args.concurrency,
+            poll_interval=args.poll_interval,
+            timeout=args.timeout,
+            download_dir=args.output_dir,
+            frames_dir=args.frames_dir,
+            on_event=on_event
+        )
+        results = runner.run()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({
+            "shots": {shot_id: r.to_dict() for shot_id, r in results.items()},
+            "critical_path": critical_path(shots, results),
+        }, indent=2, ensure_ascii=False))
+    else:
+        print()
+        print(format_report(shots, results))
+
+    if any(r.status != "succeeded" for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,15 @@ Seedance API Client
 """
 
 import os
+import sys
 import time
 import json
-from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 from enum import Enum
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 try:
     import requests
@@ -22,6 +26,32 @@ except ImportError as e:
         "Install with: pip install -r requirements.txt"
     )
 
+try:
+    from transport import PooledAdapter, TransportConfig, TransportStats, build_adapters  # noqa: F401
+    from task_cache import TaskCache  # noqa: F401
+    from resilience import ResilienceConfig, EndpointStats, endpoint_key  # noqa: F401
+    from request_compression import (  # noqa: F401
+        CompressionConfig, CompressionStats, PreparedBody, prepare_body, rejects_encoding
+    )
+    from cassette import cassette_adapter
+    from profiling import profiled
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from transport import PooledAdapter, TransportConfig, TransportStats, build_adapters
+    from task_cache import TaskCache
+    from resilience import ResilienceConfig, EndpointStats, endpoint_key
+    from request_compression import (
+        CompressionConfig, CompressionStats, PreparedBody, prepare_body, rejects_encoding
+    )
+    from cassette import cassette_adapter
+    from profiling import profiled
+
+try:
+    # 可选：更快的 JSON 解码器
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class TaskStatus(Enum):
     """任务状态枚举"""
@@ -76,50 +106,185 @@ class NetworkError(SeedanceError):
     pass
 
 
+class CircuitOpenError(SeedanceError):
+    """端点熔断中，请求未发送"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint}, retry after {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
 class TimeoutError(SeedanceError):
     """超时错误"""
     pass
 
 
-@dataclass
+class ValidationError(SeedanceError):
+    """请求参数在本地校验失败（未发送请求）"""
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+_STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+
+
+def _intern(value: Any) -> Any:
+    """对重复度高的字符串字段做 intern，非字符串原样返回"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class TaskInfo:
-    """任务信息"""
-    id: str
-    status: TaskStatus
-    model: str
-    created_at: str
-    video_url: Optional[str] = None
-    last_frame_url: Optional[str] = None
-    resolution: Optional[str] = None
-    ratio: Optional[str] = None
-    duration: Optional[int] = None
-    error_message: Optional[str] = None
-    usage: Optional[Dict[str, Any]] = None
+    """
+    任务信息
+
+    使用 __slots__ 存储以降低大量任务（如列表全量扫描）时的内存占用。
+    model、resolution、ratio 等高重复字符串会被 intern，status 通过查表获得；
+    usage 直接引用解码后的原始字典，不做拷贝。
+    """
+
+    __slots__ = (
+        "id", "status", "model", "created_at", "video_url", "last_frame_url",
+        "resolution", "ratio", "duration", "error_message", "usage",
+        "updated_at", "service_tier", "frames", "framespersecond", "generate_audio"
+    )
+
+    def __init__(
+        self,
+        id: str,
+        status: TaskStatus,
+        model: str,
+        created_at: str,
+        video_url: Optional[str] = None,
+        last_frame_url: Optional[str] = None,
+        resolution: Optional[str] = None,
+        ratio: Optional[str] = None,
+        duration: Optional[int] = None,
+        error_message: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        updated_at: Optional[Any] = None,
+        service_tier: Optional[str] = None,
+        frames: Optional[int] = None,
+        framespersecond: Optional[int] = None,
+        generate_audio: Optional[bool] = None
+    ):
+        self.id = id
+        self.status = status
+        self.model = _intern(model)
+        self.created_at = created_at
+        self.video_url = video_url
+        self.last_frame_url = last_frame_url
+        self.resolution = _intern(resolution)
+        self.ratio = _intern(ratio)
+        self.duration = duration
+        self.error_message = error_message
+        self.usage = usage
+        self.updated_at = updated_at
+        self.service_tier = _intern(service_tier)
+        self.frames = frames
+        self.framespersecond = framespersecond
+        self.generate_audio = generate_audio
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"TaskInfo({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "TaskInfo":
-        """从字典创建 TaskInfo"""
-        try:
-            status = TaskStatus(data.get("status", "queued"))
-        except ValueError:
-            status = TaskStatus.QUEUED
-
-        content = data.get("content", {})
-        usage = data.get("usage", {})
-
-        return cls(
-            id=data.get("id", ""),
-            status=status,
-            model=data.get("model", ""),
-            created_at=data.get("created_at", ""),
-            video_url=content.get("video_url"),
-            last_frame_url=content.get("last_frame_url"),
-            resolution=data.get("resolution"),
-            ratio=data.get("ratio"),
-            duration=data.get("duration"),
-            error_message=data.get("error_message"),
-            usage=usage
-        )
+        """从字典创建 TaskInfo（content/usage 不做拷贝）"""
+        status = _STATUS_BY_VALUE.get(data.get("status", "queued"), TaskStatus.QUEUED)
+
+        content = data.get("content") or {}
+
+        # 绕过 __init__ 直接填充 slots，减少大批量解析时的调用开销
+        task = cls.__new__(cls)
+        task.id = data.get("id", "")
+        task.status = status
+        task.model = _intern(data.get("model", ""))
+        task.created_at = data.get("created_at", "")
+        task.video_url = content.get("video_url")
+        task.last_frame_url = content.get("last_frame_url")
+        task.resolution = _intern(data.get("resolution"))
+        task.ratio = _intern(data.get("ratio"))
+        task.duration = data.get("duration")
+        task.error_message = data.get("error_message")
+        task.usage = data.get("usage", {})
+        task.updated_at = data.get("updated_at")
+        task.service_tier = _intern(data.get("service_tier"))
+        task.frames = data.get("frames")
+        task.framespersecond = data.get("framespersecond")
+        task.generate_audio = data.get("generate_audio")
+        return task
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶限流器
+
+    以固定速率补充令牌，允许最多 burst 个请求突发。
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: 每秒请求数
+            burst: 桶容量，默认与 rate 相同（至少为 1）
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, burst if burst is not None else int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """阻塞直到获得指定数量的令牌"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    解析任务时间字段为 Unix 时间戳（秒）
+
+    API 返回整数时间戳，部分文档示例使用 ISO 8601 字符串，两种都支持。
+
+    Args:
+        value: 时间字段值
+
+    Returns:
+        Unix 时间戳，无法解析时返回 None
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
 
 
 class SeedanceClient:
@@ -127,6 +292,7 @@ class SeedanceClient:
 
     DEFAULT_BASE_URL = "https://ark.cn-beijing.volces.com/api/v3"
     DEFAULT_TIMEOUT = 60
+    DEFAULT_CONNECT_TIMEOUT = 10
     MAX_RETRIES = 3
     RETRY_DELAYS = [1, 2, 4]  # 秒
 
@@ -134,7 +300,13 @@ class SeedanceClient:
         self,
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
-        timeout: int = DEFAULT_TIMEOUT
+        timeout: int = DEFAULT_TIMEOUT,
+        fast_json: bool = True,
+        transport: Optional[TransportConfig] = None,
+        task_cache: Optional[TaskCache] = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        resilience: Optional[ResilienceConfig] = None,
+        compression: Optional[CompressionConfig] = None
     ):
         """
         初始化客户端
@@ -142,16 +314,151 @@ class SeedanceClient:
         Args:
             api_key: API Key，如果为 None 则从环境变量或 .env 文件读取
             base_url: API 基础 URL，默认为官方 URL
-            timeout: 请求超时时间（秒）
+            timeout: 读取超时时间（秒），即等待服务端响应数据的最长时间
+            fast_json: 安装了 orjson 时使用其解码响应
+            transport: 传输层配置（连接池大小、keep-alive、HTTP/2、连接预热），默认按 10 并发配置
+            task_cache: get_task 的状态缓存；提供时并发查询同一任务只发送一次请求，
+                可在多个客户端（包括异步调用方）之间共享
+            connect_timeout: 建立连接的超时时间（秒），与读取超时分开设置，
+                服务不可达时尽快失败
+            resilience: 对冲与熔断配置；提供时幂等 GET 请求在超过近期 p95 延迟后
+                发送对冲请求，各端点连续失败后熔断
+            compression: 请求体压缩配置；为 None 时读取 SEEDANCE_REQUEST_COMPRESSION
+                环境变量，未设置时不压缩
         """
         self.api_key = api_key or self._get_api_key()
         self.base_url = (base_url or self.DEFAULT_BASE_URL).rstrip("/")
         self.timeout = timeout
+        self.fast_json = fast_json
+        self.transport = transport or TransportConfig()
+        self.task_cache = task_cache
+        self.connect_timeout = connect_timeout
+        self.resilience = resilience
+        self.compression = compression or CompressionConfig.from_env()
+        self.compression_stats = CompressionStats()
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self.stats = TransportStats()
+        adapters = build_adapters(self.transport, self.stats)
+
+        # API 会话：带认证头，API 主机使用独立连接池（录制/回放时替换为 cassette 适配器）
+        self._api_adapter = cassette_adapter(adapters["api"])
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         })
+        self.session.mount(self.base_url, self._api_adapter)
+
+        # 线程安全策略：创建客户端的线程使用 self.session，其他线程各自持有
+        # 一个 Session（复制 self.session 的请求头），但共享同一个 API 适配器。
+        # urllib3 连接池本身是线程安全的，因此连接仍在所有线程间复用，
+        # 而 Session 上的 cookie、请求头等可变状态不会跨线程共享。
+        self._owner_thread = threading.get_ident()
+        self._local = threading.local()
+        self._thread_sessions: List[requests.Session] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        # 下载会话：不携带认证头，CDN 主机共用一组连接池
+        self.cdn_session = requests.Session()
+        self.cdn_session.mount("https://", adapters["cdn"])
+        self.cdn_session.mount("http://", adapters["cdn"])
+
+        # 连接预热：后台建立到 API 主机的连接，调用方同时准备请求体；
+        # 录制/回放时 API 适配器不是连接池，不预热
+        self._warmup: Optional[threading.Thread] = None
+        if self.transport.warmup and isinstance(self._api_adapter, PooledAdapter):
+            self._warmup = threading.Thread(target=self._warm_up, name="seedance-warmup", daemon=True)
+            self._warmup.start()
+
+    @property
+    def download_timeout(self) -> Tuple[float, float]:
+        """下载视频时的 (连接超时, 读取超时)，读取超时为两个数据块之间的最长等待"""
+        return (self.connect_timeout, self.timeout)
+
+    def transport_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        连接复用统计
+
+        Returns:
+            api / cdn 连接池的请求数、握手数和复用率
+        """
+        return self.stats.snapshot()
+
+    def resilience_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        对冲与熔断统计
+
+        Returns:
+            每个端点的请求数、对冲次数、对冲胜出次数、p95 延迟、当前对冲延迟和熔断状态
+        """
+        with self._executor_lock:
+            endpoints = dict(self._endpoints)
+        return {key: stats.snapshot() for key, stats in sorted(endpoints.items())}
+
+    def compression_info(self) -> Dict[str, Any]:
+        """
+        请求体压缩统计
+
+        Returns:
+            算法、阈值（未启用时为 None）与 CompressionStats.snapshot()
+        """
+        return {
+            "algorithm": self.compression.algorithm if self.compression else None,
+            "threshold": self.compression.threshold if self.compression else None,
+            **self.compression_stats.snapshot(),
+        }
+
+    def close(self):
+        """关闭线程池和所有连接"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=True)
+            self._hedge_executor = None
+        for session in self._thread_sessions:
+            session.close()
+        self.session.close()
+        self.cdn_session.close()
+
+    def _warm_up(self):
+        """预热线程：失败时忽略，第一个请求照常建立连接并报告错误"""
+        try:
+            self._api_adapter.warm_up(
+                self.base_url, self.session, self.transport.warmup_connections, self.connect_timeout
+            )
+        except Exception:
+            pass
+
+    def _await_warmup(self):
+        """等待预热完成，避免第一个请求在预热握手期间另建一个连接"""
+        thread = self._warmup
+        if thread is not None:
+            thread.join(self.connect_timeout)
+            self._warmup = None
+
+    def _get_session(self) -> requests.Session:
+        """返回当前线程使用的 API 会话"""
+        if threading.get_ident() == self._owner_thread:
+            return self.session
+
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            session.mount(self.base_url, self._api_adapter)
+            self._local.session = session
+            with self._executor_lock:
+                self._thread_sessions.append(session)
+        return session
+
+    def __enter__(self) -> "SeedanceClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def _get_api_key(self) -> str:
         """
@@ -192,7 +499,7 @@ class SeedanceClient:
         Args:
             method: HTTP 方法
             endpoint: API 端点
-            data: 请求体数据
+            data: 请求体数据（或已序列化的 PreparedBody）
             params: URL 查询参数
             retry_count: 当前重试次数
 
@@ -204,19 +511,26 @@ class SeedanceClient:
         """
         url = f"{self.base_url}{endpoint}"
 
-        try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                json=data,
-                params=params,
-                timeout=self.timeout
-            )
+        # 请求体只序列化/压缩一次，重试时复用
+        if data is not None and self.compression is not None and not isinstance(data, PreparedBody):
+            data = prepare_body(data, self.compression)
+            self.compression_stats.record(data)
 
-            # 处理响应
-            return self._handle_response(response)
+        stats = None
+        if self.resilience is not None:
+            stats = self._endpoint_stats(endpoint_key(method, endpoint))
+            if self.resilience.breaker and not stats.breaker.allow():
+                raise CircuitOpenError(endpoint_key(method, endpoint), stats.breaker.retry_after())
+
+        try:
+            if stats is not None and self.resilience.hedge and method == "GET":
+                response = self._send_hedged(stats, url, params)
+            else:
+                response = self._send(stats, method, url, data, params)
 
         except requests.exceptions.Timeout:
+            if stats is not None:
+                stats.breaker.record_failure()
             if retry_count < self.MAX_RETRIES:
                 delay = self.RETRY_DELAYS[min(retry_count, len(self.RETRY_DELAYS) - 1)]
                 time.sleep(delay)
@@ -224,11 +538,108 @@ class SeedanceClient:
             raise TimeoutError(f"Request timeout after {self.timeout}s")
 
         except requests.exceptions.ConnectionError as e:
+            if stats is not None:
+                stats.breaker.record_failure()
             raise NetworkError(f"Connection error: {e}")
 
         except requests.exceptions.RequestException as e:
+            if stats is not None:
+                stats.breaker.record_failure()
             raise NetworkError(f"Request error: {e}")
 
+        if stats is not None:
+            if response.status_code >= 500:
+                stats.breaker.record_failure()
+            else:
+                stats.breaker.record_success()
+
+        # 服务端不接受压缩的请求体：以原始请求体重发，此后不再压缩
+        if isinstance(data, PreparedBody) and data.encoding and rejects_encoding(response.status_code, response.text):
+            self.compression = None
+            self.compression_stats.record_fallback()
+            return self._make_request(method, endpoint, data.identity(), params, retry_count)
+
+        # 处理响应
+        return self._handle_response(response)
+
+    def _endpoint_stats(self, key: str) -> EndpointStats:
+        with self._executor_lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats(self.resilience)
+            return stats
+
+    def _send(
+        self,
+        stats: Optional[EndpointStats],
+        method: str,
+        url: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None
+    ) -> requests.Response:
+        """发送一次请求（连接/读取超时分开），记录端点延迟"""
+        if self._warmup is not None:
+            self._await_warmup()
+        start = time.monotonic()
+        if isinstance(data, PreparedBody):
+            body = {"data": data.body, "headers": data.headers}
+        else:
+            body = {"json": data}
+        response = self._get_session().request(
+            method=method,
+            url=url,
+            params=params,
+            timeout=(self.connect_timeout, self.timeout),
+            **body
+        )
+        if stats is not None:
+            stats.latency.record(time.monotonic() - start)
+            stats.count(requests=1)
+        return response
+
+    def _send_hedged(
+        self,
+        stats: EndpointStats,
+        url: str,
+        params: Optional[Dict]
+    ) -> requests.Response:
+        """
+        发送幂等 GET 请求，超过对冲延迟仍未返回时再发一个相同请求，采用先成功的结果
+
+        对冲次数受 hedge_budget 限制（占调用数的比例）。
+
+        落后的请求在后台自然结束（受读取超时约束），其连接随后归还连接池。
+        """
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * self.transport.max_concurrency,
+                    thread_name_prefix="seedance-hedge"
+                )
+            executor = self._hedge_executor
+
+        stats.count(calls=1)
+        primary = executor.submit(self._send, stats, "GET", url, None, params)
+        try:
+            return primary.result(timeout=stats.hedge_delay())
+        except FutureTimeoutError:
+            pass
+        if not stats.try_hedge():
+            return primary.result()
+
+        hedge = executor.submit(self._send, stats, "GET", url, None, params)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        stats.count(hedge_wins=1)
+                    return future.result()
+                error = future.exception()
+        raise error
+
     def _handle_response(self, response: requests.Response) -> Dict[str, Any]:
         """
         处理 API 响应
@@ -242,10 +653,7 @@ class SeedanceClient:
         Raises:
             APIError: API 返回错误
         """
-        try:
-            data = response.json()
-        except json.JSONDecodeError:
-            data = {}
+        data = self._decode_json(response)
 
         # 成功响应
         if response.status_code == 200:
@@ -286,6 +694,25 @@ class SeedanceClient:
             response=data
         )
 
+    def _decode_json(self, response: requests.Response) -> Dict[str, Any]:
+        """
+        解码响应 JSON
+
+        安装了 orjson 且 fast_json 开启时直接从原始字节解码，
+        否则回退到 response.json()。解码失败返回空字典。
+        """
+        if self.fast_json and orjson is not None:
+            try:
+                return orjson.loads(response.content)
+            except orjson.JSONDecodeError:
+                return {}
+
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            return {}
+
+    @profiled("submit")
     def create_task(self, payload: Dict[str, Any]) -> TaskInfo:
         """
         创建视频生成任务
@@ -312,12 +739,15 @@ class SeedanceClient:
         else:
             raise APIError("Unexpected response format: missing task id")
 
-    def get_task(self, task_id: str) -> TaskInfo:
+    def get_task(self, task_id: str, fresh: bool = False) -> TaskInfo:
         """
         查询单个任务状态
 
+        配置了 task_cache 时先读缓存，并发查询同一任务的调用共享同一个请求。
+
         Args:
             task_id: 任务 ID
+            fresh: 为 True 时不读取缓存（例如取消任务前确认最新状态）
 
         Returns:
             TaskInfo 对象
@@ -325,6 +755,11 @@ class SeedanceClient:
         Raises:
             TaskNotFoundError: 任务不存在
         """
+        if self.task_cache is not None:
+            return self.task_cache.fetch(task_id, self._fetch_task, fresh=fresh)
+        return self._fetch_task(task_id)
+
+    def _fetch_task(self, task_id: str) -> TaskInfo:
         endpoint = f"/contents/generations/tasks/{task_id}"
         data = self._make_request("GET", endpoint)
         return TaskInfo.from_dict(data)
@@ -335,7 +770,8 @@ class SeedanceClient:
         page_size: int = 10,
         status: Optional[str] = None,
         model: Optional[str] = None,
-        task_ids: Optional[List[str]] = None
+        task_ids: Optional[List[str]] = None,
+        service_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         列出任务（支持筛选和分页）
@@ -346,6 +782,7 @@ class SeedanceClient:
             status: 按状态筛选
             model: 按模型筛选
             task_ids: 特定任务 ID 列表
+            service_tier: 按服务等级筛选（default / flex）
 
         Returns:
             响应数据，包含 tasks 列表和分页信息
@@ -357,20 +794,61 @@ class SeedanceClient:
             "page_size": min(page_size, 500)
         }
 
-        # 添加筛选参数
-        filters = {}
+        # 添加筛选参数（filter.xxx 形式，task_ids 以重复参数传递）
         if status:
-            filters["status"] = status
+            params["filter.status"] = status
         if model:
-            filters["model"] = model
+            params["filter.model"] = model
         if task_ids:
-            filters["task_ids"] = ",".join(task_ids)
-
-        if filters:
-            params["filter"] = filters
+            params["filter.task_ids"] = list(task_ids)
+        if service_tier:
+            params["filter.service_tier"] = service_tier
 
         return self._make_request("GET", endpoint, params=params)
 
+    def iter_tasks(
+        self,
+        status: Optional[str] = None,
+        model: Optional[str] = None,
+        task_ids: Optional[List[str]] = None,
+        service_tier: Optional[str] = None,
+        page_size: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐页遍历符合条件的全部任务
+
+        Args:
+            status: 按状态筛选
+            model: 按模型筛选
+            task_ids: 特定任务 ID 列表
+            service_tier: 按服务等级筛选
+            page_size: 每页数量（最大 500）
+
+        Yields:
+            单个任务的原始字典
+        """
+        page_num = 1
+        seen = 0
+        while True:
+            data = self.list_tasks(
+                page_num=page_num,
+                page_size=page_size,
+                status=status,
+                model=model,
+                task_ids=task_ids,
+                service_tier=service_tier
+            )
+            # 官方接口返回 items/total，旧版文档为 tasks/page.total
+            tasks = data.get("items", data.get("tasks")) or []
+            total = data.get("total", data.get("page", {}).get("total", 0))
+
+            yield from tasks
+
+            seen += len(tasks)
+            if not tasks or seen >= total or page_num >= 500:
+                return
+            page_num += 1
+
     def cancel_task(self, task_id: str) -> Dict[str, Any]:
         """
         取消或删除任务
@@ -384,8 +862,113 @@ class SeedanceClient:
             响应数据
         """
         endpoint = f"/contents/generations/tasks/{task_id}"
-        return self._make_request("DELETE", endpoint)
+        try:
+            return self._make_request("DELETE", endpoint)
+        finally:
+            if self.task_cache is not None:
+                self.task_cache.invalidate(task_id)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """惰性创建有界线程池，大小与连接池一致"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.transport.max_concurrency,
+                    thread_name_prefix="seedance"
+                )
+            return self._executor
+
+    def _submit_all(
+        self,
+        func: callable,
+        items: Iterable[Any],
+        rate_limiter: Optional[RateLimiter]
+    ) -> List[Future]:
+        executor = self._get_executor()
+
+        def call(item):
+            if rate_limiter:
+                rate_limiter.acquire()
+            return func(item)
 
+        return [executor.submit(call, item) for item in items]
+
+    def submit_many(
+        self,
+        payloads: Iterable[Dict[str, Any]],
+        rate_limiter: Optional[RateLimiter] = None
+    ) -> List[Future]:
+        """
+        并发创建多个任务
+
+        请求在内部有界线程池（大小为 transport.max_concurrency）中执行。
+
+        Args:
+            payloads: 任务创建参数列表
+            rate_limiter: 可选的限流器，每个请求发送前获取一个令牌
+
+        Returns:
+            与 payloads 顺序一致的 Future 列表，结果为 TaskInfo
+        """
+        return self._submit_all(self.create_task, payloads, rate_limiter)
+
+    def get_many(
+        self,
+        task_ids: Iterable[str],
+        rate_limiter: Optional[RateLimiter] = None
+    ) -> List[Future]:
+        """
+        并发查询多个任务
+
+        Args:
+            task_ids: 任务 ID 列表
+            rate_limiter: 可选的限流器
+
+        Returns:
+            与 task_ids 顺序一致的 Future 列表，结果为 TaskInfo
+        """
+        return self._submit_all(self.get_task, task_ids, rate_limiter)
+
+    def cancel_many(
+        self,
+        task_ids: Iterable[str],
+        rate_limiter: Optional[RateLimiter] = None
+    ) -> List[Future]:
+        """
+        并发取消/删除多个任务
+
+        Args:
+            task_ids: 任务 ID 列表
+            rate_limiter: 可选的限流器
+
+        Returns:
+            与 task_ids 顺序一致的 Future 列表，结果为响应数据
+        """
+        return self._submit_all(self.cancel_task, task_ids, rate_limiter)
+
+    @staticmethod
+    def iter_results(
+        futures: Iterable[Future],
+        return_exceptions: bool = False
+    ) -> Iterator[Any]:
+        """
+        按提交顺序逐个产出结果
+
+        Args:
+            futures: submit_many / get_many / cancel_many 返回的 Future 列表
+            return_exceptions: 为 True 时产出异常对象而不是抛出
+
+        Yields:
+            每个请求的结果（或异常）
+        """
+        for future in futures:
+            if return_exceptions:
+                error = future.exception()
+                yield error if error is not None else future.result()
+            else:
+                yield future.result()
+
+    @profiled("poll")
     def wait_for_completion(
         self,
         task_id: str,
@@ -411,7 +994,14 @@ class SeedanceClient:
         start_time = time.time()
 
         while True:
-            task = self.get_task(task_id)
+            try:
+                task = self.get_task(task_id)
+            except CircuitOpenError as e:
+                # 服务故障期间不再轮询，等到熔断器放行探测请求
+                if time.time() - start_time + max(poll_interval, e.retry_after) >= timeout:
+                    raise TimeoutError(f"Task did not complete within {timeout}s")
+                time.sleep(max(poll_interval, e.retry_after))
+                continue
 
             # 调用回调
             if callback:
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+视频输出目标（sink）
+
+下载的视频流直接写入一个或多个 sink，不需要先落盘：
+- FileSink：本地文件（先写 .part，完成后原子重命名）
+- StdoutSink：标准输出（管道给 ffmpeg 等）
+- S3Sink：S3 兼容对象存储的分段上传（需要 boto3，或传入兼容的客户端，
+  例如测试用的 LocalMultipartClient）
+- TeeSink：同时写入多个 sink，先写出全部数据再逐个提交
+
+BufferedSink 在后台线程中写入，与下载重叠；队列有界，写入跟不上时阻塞下载线程，
+反压传递到 TCP 接收窗口，内存占用不超过缓冲区加 S3 分段大小。
+"""
+
+import os
+import sys
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+# S3 分段上传除最后一段外每段至少 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_BUFFER_BYTES = 8 * 1024 * 1024
+
+
+class SinkError(Exception):
+    """sink 写入失败"""
+    pass
+
+
+class Sink:
+    """sink 基类：write() 若干次后 close() 提交，出错时 abort() 丢弃"""
+
+    name = "sink"
+
+    def write(self, chunk: bytes):
+        raise NotImplementedError
+
+    def flush(self):
+        """写出所有已接收的数据但不提交（close() 之前调用，可省略）"""
+        pass
+
+    def close(self) -> Dict[str, Any]:
+        """
+        提交写入的数据
+
+        Returns:
+            sink 的描述（类型、位置、字节数等）
+        """
+        raise NotImplementedError
+
+    def abort(self):
+        """丢弃已写入的数据（可重复调用）"""
+        pass
+
+
+class FileSink(Sink):
+    """本地文件"""
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.part_path = self.path.with_name(self.path.name + ".part")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.part_path, "wb")
+        self.size = 0
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def flush(self):
+        self._file.close()
+
+    def close(self) -> Dict[str, Any]:
+        self._file.close()
+        os.replace(self.part_path, self.path)
+        return {"sink": self.name, "path": str(self.path), "bytes": self.size}
+
+    def abort(self):
+        self._file.close()
+        self.part_path.unlink(missing_ok=True)
+
+
+class StdoutSink(Sink):
+    """标准输出（或其他二进制流），不关闭底层流"""
+
+    name = "stdout"
+
+    def __init__(self, stream: Optional[BinaryIO] = None):
+        # 使用进程的原始标准输出：CLI 写视频到标准输出时把 sys.stdout 重定向到 stderr
+        self.stream = stream or sys.__stdout__.buffer
+        self.size = 0
+
+    def __str__(self) -> str:
+        return "stdout"
+
+    def write(self, chunk: bytes):
+        self.stream.write(chunk)
+        self.size += len(chunk)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self) -> Dict[str, Any]:
+        self.stream.flush()
+        return {"sink": self.name, "bytes": self.size}
+
+
+class S3Sink(Sink):
+    """S3 兼容对象存储的分段上传，只在内存中保留一个分段"""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        client=None,
+        part_size: int = DEFAULT_PART_SIZE,
+        extra_args: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            bucket: 存储桶
+            key: 对象键
+            client: boto3 S3 客户端或实现了 create_multipart_upload / upload_part /
+                complete_multipart_upload / abort_multipart_upload 的兼容对象；
+                为 None 时用 boto3 创建（endpoint 取 SEEDANCE_S3_ENDPOINT 环境变量）
+            part_size: 分段大小（至少 5 MiB）
+            extra_args: 传给 create_multipart_upload 的额外参数（如 ContentType）
+        """
+        if client is None:
+            if boto3 is None:
+                raise ImportError(
+                    "Missing optional dependency for S3 sinks: boto3. "
+                    "Install with: pip install boto3"
+                )
+            client = boto3.client("s3", endpoint_url=os.environ.get("SEEDANCE_S3_ENDPOINT"))
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.size = 0
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        upload = client.create_multipart_upload(Bucket=bucket, Key=key, **(extra_args or {"ContentType": "video/mp4"}))
+        self.upload_id = upload["UploadId"]
+
+    def __str__(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+    def _upload_part(self, data):
+        number = len(self._parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=bytes(data)
+        )
+        self._parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def write(self, chunk: bytes):
+        self._buffer += chunk
+        self.size += len(chunk)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part(self._buffer)
+            self._buffer = bytearray()
+
+    def flush(self):
+        # 上传最后一个分段，之后只差 complete_multipart_upload
+        if self._buffer or not self._parts:
+            self._upload_part(self._buffer)
+            self._buffer = bytearray()
+
+    def close(self) -> Dict[str, Any]:
+        self.flush()
+        response = self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self._parts}
+        )
+        self.upload_id = None
+        return {
+            "sink": self.name,
+            "bucket": self.bucket,
+            "key": self.key,
+            "bytes": self.size,
+            "parts": len(self._parts),
+            "etag": response.get("ETag"),
+        }
+
+    def abort(self):
+        self._buffer = bytearray()
+        if self.upload_id:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            self.upload_id = None
+
+
+class LocalMultipartClient:
+    """
+    S3 分段上传接口的本地替身（用于测试和基准）
+
+    对象保存为 <root>/<bucket>/<key>，未完成的分段保存在 <root>/.uploads/ 中。
+    upload_delay 模拟每个分段的上传耗时（秒）。
+    """
+
+    def __init__(self, root: str, upload_delay: float = 0.0):
+        self.root = Path(root)
+        self.upload_delay = upload_delay
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def _upload_dir(self, upload_id: str) -> Path:
+        return self.root / ".uploads" / upload_id
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            self._counter += 1
+            upload_id = f"{os.getpid()}-{self._counter}-{time.time_ns()}"
+        self._upload_dir(upload_id).mkdir(parents=True)
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> Dict[str, Any]:
+        if self.upload_delay:
+            time.sleep(self.upload_delay)
+        (self._upload_dir(UploadId) / f"{PartNumber:05d}").write_bytes(Body)
+        return {"ETag": f'"{PartNumber}-{len(Body)}"'}
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        target = self.root / Bucket / Key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        upload_dir = self._upload_dir(UploadId)
+        with open(target, "wb") as f:
+            for part in MultipartUpload["Parts"]:
+                part_path = upload_dir / f"{part['PartNumber']:05d}"
+                f.write(part_path.read_bytes())
+                part_path.unlink()
+        upload_dir.rmdir()
+        return {"Bucket": Bucket, "Key": Key, "ETag": f'"{len(MultipartUpload["Parts"])}-parts"'}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> Dict[str, Any]:
+        upload_dir = self._upload_dir(UploadId)
+        if upload_dir.exists():
+            for part_path in upload_dir.iterdir():
+                part_path.unlink()
+            upload_dir.rmdir()
+        return {}
+
+
+class BufferedSink(Sink):
+    """
+    在后台线程中写入内层 sink
+
+    队列按字节数有界：已排队的数据达到 max_bytes 时 write() 阻塞，直到后台线程写出。
+    """
+
+    _DONE = object()
+
+    def __init__(self, inner: Sink, max_bytes: int = DEFAULT_BUFFER_BYTES):
+        self.inner = inner
+        self.name = inner.name
+        self.max_bytes = max_bytes
+        self.queued_bytes = 0
+        self.peak_bytes = 0
+        # 生产方因缓冲区已满而等待的总时间（秒）
+        self.stall_seconds = 0.0
+        self._condition = threading.Condition()
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=f"sink-{inner.name}", daemon=True)
+        self._thread.start()
+
+    def __str__(self) -> str:
+        return str(self.inner)
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is self._DONE:
+                return
+            if self._error is None:
+                try:
+                    self.inner.write(chunk)
+                except BaseException as e:
+                    self._error = e
+            with self._condition:
+                self.queued_bytes -= len(chunk)
+                self._condition.notify_all()
+
+    def write(self, chunk: bytes):
+        with self._condition:
+            if self.queued_bytes + len(chunk) > self.max_bytes and self.queued_bytes:
+                start = time.monotonic()
+                while self.queued_bytes + len(chunk) > self.max_bytes and self.queued_bytes and self._error is None:
+                    self._condition.wait()
+                self.stall_seconds += time.monotonic() - start
+            if self._error is not None:
+                raise SinkError(f"{self.name} sink failed: {self._error}") from self._error
+            self.queued_bytes += len(chunk)
+            self.peak_bytes = max(self.peak_bytes, self.queued_bytes)
+        self._queue.put(chunk)
+
+    def _finish(self):
+        if self._thread.is_alive():
+            self._queue.put(self._DONE)
+            self._thread.join()
+
+    def flush(self):
+        self._finish()
+        if self._error is not None:
+            raise SinkError(f"{self.name} sink failed: {self._error}") from self._error
+        self.inner.flush()
+
+    def close(self) -> Dict[str, Any]:
+        try:
+            self.flush()
+        except BaseException:
+            self.inner.abort()
+            raise
+        result = self.inner.close()
+        result.update(peak_buffered_bytes=self.peak_bytes, stall_seconds=round(self.stall_seconds, 3))
+        return result
+
+    def abort(self):
+        self._error = self._error or SinkError("aborted")
+        self._finish()
+        self.inner.abort()
+
+
+class TeeSink(Sink):
+    """
+    同时写入多个 sink
+
+    close() 分两步：先 flush() 所有 sink（写出全部数据、上传最后一个分段），
+    任一失败时全部放弃；都成功后再逐个提交（重命名文件、完成分段上传）。
+    提交本身失败时放弃尚未提交的 sink，已提交的保留；已写到标准输出的数据无法撤回。
+    """
+
+    name = "tee"
+
+    def __init__(self, sinks: Sequence[Sink]):
+        self.sinks = list(sinks)
+
+    def write(self, chunk: bytes):
+        for sink in self.sinks:
+            sink.write(chunk)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> Dict[str, Any]:
+        results = []
+        try:
+            self.flush()
+            for sink in self.sinks:
+                results.append(sink.close())
+        except BaseException:
+            for sink in self.sinks[len(results):]:
+                sink.abort()
+            raise
+        return {"sink": self.name, "sinks": results}
+
+    def abort(self):
+        for sink in self.sinks:
+            try:
+                sink.abort()
+            except Exception:
+                pass
+
+
+def open_sink(spec: str, **fields) -> Sink:
+    """
+    按描述创建 sink
+
+    Args:
+        spec: "-"（标准输出）、"s3://bucket/key" 或本地路径（可加 file: 前缀）；
+            可包含 {task_id} 等占位符，由 fields 填充
+
+    Returns:
+        Sink
+    """
+    spec = spec.format(**fields) if fields else spec
+    if spec == "-":
+        return StdoutSink()
+    if spec.startswith("s3://"):
+        parsed = urlparse(spec)
+        key = parsed.path.lstrip("/")
+        if not parsed.netloc or not key:
+            raise ValueError(f"Invalid S3 sink {spec!r}, expected s3://bucket/key")
+        return S3Sink(parsed.netloc, key)
+    if spec.startswith("file:"):
+        spec = spec[len("file:"):]
+    return FileSink(spec)
+
+
+def open_sinks(specs: Sequence[str], **fields) -> List[Sink]:
+    """按描述创建多个 sink；任一创建失败时放弃已创建的"""
+    sinks: List[Sink] = []
+    try:
+        for spec in specs:
+            sinks.append(open_sink(spec, **fields))
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    return sinks
+
+
+def writes_stdout(specs: Sequence[str]) -> bool:
+    """sink 描述中是否包含标准输出（此时进度信息应写到 stderr）"""
+    return "-" in specs
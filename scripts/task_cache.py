@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+任务状态缓存与请求合并
+
+同一进程中多个组件（界面、下载器、通知器）往往在同一秒内查询同一个任务。
+TaskCache 按任务状态设置缓存有效期：终态任务不会再变化，永久缓存（受容量上限约束）；
+排队/运行中的任务只缓存很短时间。缓存未命中时，并发查询同一任务 ID 的调用方
+共享同一个进行中的请求（single-flight），只发送一次 HTTP 请求。
+
+同步客户端使用 fetch()，异步调用方使用 fetch_async()，两者共享缓存和统计。
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+TERMINAL_STATUS_VALUES = frozenset({"succeeded", "failed", "expired", "cancelled"})
+
+
+class TaskCache:
+    """按状态区分有效期的任务缓存，带请求合并和命中率统计（线程安全）"""
+
+    def __init__(
+        self,
+        active_ttl: float = 1.0,
+        terminal_ttl: Optional[float] = None,
+        max_entries: int = 10000
+    ):
+        """
+        Args:
+            active_ttl: 排队/运行中任务的缓存秒数，0 表示不缓存（仅合并并发请求）
+            terminal_ttl: 终态任务的缓存秒数，None 表示永久
+            max_entries: 最多缓存的任务数，超出时淘汰最久未使用的
+        """
+        self.active_ttl = active_ttl
+        self.terminal_ttl = terminal_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # task_id -> (过期时间, TaskInfo)，过期时间为 None 表示永久
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._flights: Dict[str, Future] = {}
+        self._async_flights: Dict[Tuple[int, str], "asyncio.Future"] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._loads = 0
+
+    def _expiry(self, task) -> Optional[float]:
+        if task.status.value in TERMINAL_STATUS_VALUES:
+            return None if self.terminal_ttl is None else time.monotonic() + self.terminal_ttl
+        return time.monotonic() + self.active_ttl
+
+    def get(self, task_id: str):
+        """
+        读取未过期的缓存
+
+        Returns:
+            TaskInfo（多个调用方共享同一对象，不应修改），未命中时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is not None:
+                expires, task = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(task_id)
+                    self._hits += 1
+                    return task
+                del self._entries[task_id]
+            self._misses += 1
+            return None
+
+    def put(self, task):
+        """写入查询结果（TaskInfo）"""
+        if not task.id:
+            return
+        if self.active_ttl <= 0 and task.status.value not in TERMINAL_STATUS_VALUES:
+            return
+        expires = self._expiry(task)
+        with self._lock:
+            self._entries[task.id] = (expires, task)
+            self._entries.move_to_end(task.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, task_id: str):
+        """删除缓存（任务被取消或删除后调用）"""
+        with self._lock:
+            self._entries.pop(task_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def fetch(self, task_id: str, loader: Callable[[str], Any], fresh: bool = False):
+        """
+        读取缓存，未命中时调用 loader；并发调用同一 ID 时只有一个调用方执行 loader
+
+        Args:
+            task_id: 任务 ID
+            loader: 实际查询函数，参数为任务 ID，返回 TaskInfo
+            fresh: 为 True 时跳过缓存读取（仍合并并发请求，并写入结果）
+
+        Returns:
+            TaskInfo
+
+        Raises:
+            loader 抛出的异常（所有等待同一请求的调用方都会收到）
+        """
+        if not fresh:
+            task = self.get(task_id)
+            if task is not None:
+                return task
+
+        with self._lock:
+            flight = self._flights.get(task_id)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._flights[task_id] = flight
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return flight.result()
+
+        try:
+            task = loader(task_id)
+            with self._lock:
+                self._loads += 1
+            self.put(task)
+            flight.set_result(task)
+            return task
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(task_id, None)
+
+    async def fetch_async(
+        self,
+        task_id: str,
+        loader: Callable[[str], Awaitable[Any]],
+        fresh: bool = False
+    ):
+        """
+        fetch() 的异步版本，loader 为协程函数
+
+        同一事件循环内的并发调用合并为一次请求；不同事件循环（线程）各自发起请求，
+        但共享缓存。
+        """
+        if not fresh:
+            task = self.get(task_id)
+            if task is not None:
+                return task
+
+        loop = asyncio.get_running_loop()
+        key = (id(loop), task_id)
+        with self._lock:
+            flight = self._async_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = loop.create_future()
+                self._async_flights[key] = flight
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            # shield：某个等待方被取消时不影响进行中的请求
+            return await asyncio.shield(flight)
+
+        try:
+            task = await loader(task_id)
+            with self._lock:
+                self._loads += 1
+            self.put(task)
+            flight.set_result(task)
+            return task
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # 没有其他等待方时避免 "exception was never retrieved" 警告
+            flight.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_flights.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            hits（缓存命中）、misses、coalesced（合并到进行中请求的调用数）、
+            loads（实际请求数）、entries、hit_rate（命中率）和
+            saved_ratio（未发送请求的调用比例）
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            calls = self._hits + self._loads + self._coalesced
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "loads": self._loads,
+                "entries": len(self._entries),
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "saved_ratio": round(1 - self._loads / calls, 4) if calls else 0.0,
+            }
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+HTTP 传输层配置
+
+为 API 主机和 CDN（视频/图片下载）主机分别提供按并发度调优的连接池，
+支持 TCP keep-alive、空闲连接回收、可选的 HTTP/2，并统计连接复用情况。
+连接预热、跨进程 DNS 缓存和 TLS 会话恢复用于缩短短任务的首个请求延迟。
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import ssl
+import tempfile
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.ssl_ import create_urllib3_context, resolve_cert_reqs
+from urllib3.util.wait import wait_for_read
+
+
+@dataclass
+class TransportConfig:
+    """传输层配置"""
+    # 期望的最大并发请求数，连接池大小默认与之相同
+    max_concurrency: int = 10
+    # API 主机连接池大小（默认等于 max_concurrency）
+    api_pool_maxsize: Optional[int] = None
+    # 每个 CDN 主机的连接池大小（默认等于 max_concurrency）
+    cdn_pool_maxsize: Optional[int] = None
+    # 缓存连接池的 CDN 主机数量
+    cdn_pool_connections: int = 8
+    # TCP keep-alive 探测
+    keepalive: bool = True
+    keepalive_idle: int = 30
+    keepalive_interval: int = 10
+    keepalive_count: int = 3
+    # 连接池空闲超过该秒数后，下次请求前丢弃旧连接（服务端通常已关闭），None 表示不回收
+    idle_timeout: Optional[float] = 50.0
+    # 通过 urllib3 的实验性 HTTP/2 支持协商 h2（需要 urllib3>=2.3 和 h2）
+    http2: bool = False
+    # 创建客户端时在后台预先建立到 API 主机的连接（DNS、TCP、TLS），与本地准备请求体并行
+    warmup: bool = False
+    # 预热的连接数
+    warmup_connections: int = 1
+    # 跨进程 DNS 缓存文件路径（见 default_dns_cache_path），None 表示每次解析
+    dns_cache: Optional[str] = None
+    # DNS 缓存条目的有效期（秒）
+    dns_cache_ttl: float = 300.0
+    # 同一连接池内的新连接复用之前连接的 TLS 会话（会话票据），跳过完整握手
+    tls_resumption: bool = False
+
+    @property
+    def api_pool_size(self) -> int:
+        return self.api_pool_maxsize or self.max_concurrency
+
+    @property
+    def cdn_pool_size(self) -> int:
+        return self.cdn_pool_maxsize or self.max_concurrency
+
+
+class TransportStats:
+    """连接池统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = {}
+        self._handshakes: Dict[str, int] = {}
+        self._idle_resets: Dict[str, int] = {}
+        self._prewarmed: Dict[str, int] = {}
+        self._dns_cache_hits: Dict[str, int] = {}
+        self._tls_resumed: Dict[str, int] = {}
+
+    def _increment(self, counter: Dict[str, int], pool: str):
+        with self._lock:
+            counter[pool] = counter.get(pool, 0) + 1
+
+    def record_request(self, pool: str):
+        self._increment(self._requests, pool)
+
+    def record_handshake(self, pool: str):
+        self._increment(self._handshakes, pool)
+
+    def record_idle_reset(self, pool: str):
+        self._increment(self._idle_resets, pool)
+
+    def record_prewarm(self, pool: str):
+        self._increment(self._prewarmed, pool)
+
+    def record_dns_cache_hit(self, pool: str):
+        self._increment(self._dns_cache_hits, pool)
+
+    def record_tls_resumption(self, pool: str):
+        self._increment(self._tls_resumed, pool)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            每个连接池的请求数、新建连接（握手）数、空闲回收次数、连接复用率，
+            以及预热连接数、DNS 缓存命中数和 TLS 会话恢复数
+        """
+        with self._lock:
+            pools = set(self._requests) | set(self._handshakes)
+            result = {}
+            for pool in sorted(pools):
+                requests_count = self._requests.get(pool, 0)
+                handshakes = self._handshakes.get(pool, 0)
+                reuse = 1 - handshakes / requests_count if requests_count else 0.0
+                result[pool] = {
+                    "requests": requests_count,
+                    "handshakes": handshakes,
+                    "idle_resets": self._idle_resets.get(pool, 0),
+                    "reuse_ratio": round(max(reuse, 0.0), 4),
+                    "prewarmed": self._prewarmed.get(pool, 0),
+                    "dns_cache_hits": self._dns_cache_hits.get(pool, 0),
+                    "tls_resumed": self._tls_resumed.get(pool, 0),
+                }
+            return result
+
+
+def keepalive_socket_options(config: TransportConfig) -> list:
+    """构造 TCP keep-alive 相关的 socket 选项（平台不支持的选项会被跳过）"""
+    options = list(HTTPConnection.default_socket_options)
+    if not config.keepalive:
+        return options
+
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (
+        ("TCP_KEEPIDLE", config.keepalive_idle),
+        ("TCP_KEEPINTVL", config.keepalive_interval),
+        ("TCP_KEEPCNT", config.keepalive_count),
+    ):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+def enable_http2():
+    """
+    启用 urllib3 的实验性 HTTP/2 支持
+
+    该开关作用于整个进程。urllib3 目前每个连接同一时间只承载一个请求，
+    因此收益主要来自 h2 的头部压缩，并发仍依赖连接池。
+    """
+    try:
+        import h2  # noqa: F401
+        import urllib3.http2
+    except ImportError:
+        raise ImportError(
+            "HTTP/2 requires urllib3>=2.3 and h2. "
+            "Install with: pip install 'urllib3>=2.3' h2"
+        )
+    urllib3.http2.inject_into_urllib3()
+
+
+def default_dns_cache_path() -> Optional[str]:
+    """
+    默认的 DNS 缓存文件：SEEDANCE_DNS_CACHE 环境变量（设为空字符串表示关闭），
+    否则为 ~/.cache/seedance/dns.json
+    """
+    path = os.environ.get("SEEDANCE_DNS_CACHE")
+    if path is not None:
+        return path or None
+    return os.path.join(os.path.expanduser("~"), ".cache", "seedance", "dns.json")
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+class DNSCache:
+    """
+    跨进程共享的 DNS 缓存（JSON 文件）
+
+    只记录实际连接成功的地址；文件通过临时文件原子替换写入，
+    读写失败时退化为正常解析，不影响请求。
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]):
+        now = time.time()
+        entries = {key: entry for key, entry in entries.items() if entry.get("expires", 0) > now}
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".dns-", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+        self._entries = entries
+
+    def lookup(self, host: str, port: int) -> Optional[str]:
+        """返回未过期的缓存地址，没有时返回 None"""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(f"{host}:{port}")
+        if entry and entry.get("expires", 0) > time.time():
+            return entry.get("address")
+        return None
+
+    def store(self, host: str, port: int, address: str):
+        """记录连接成功的地址（先重新读取文件，保留其他进程写入的条目）"""
+        with self._lock:
+            entries = self._load()
+            entries[f"{host}:{port}"] = {"address": address, "expires": time.time() + self.ttl}
+            self._save(entries)
+
+    def invalidate(self, host: str, port: int):
+        """删除连接失败的条目"""
+        with self._lock:
+            entries = self._load()
+            if entries.pop(f"{host}:{port}", None) is not None:
+                self._save(entries)
+            else:
+                self._entries = entries
+
+
+def _drain_session_tickets(sock: ssl.SSLSocket) -> bool:
+    """
+    非阻塞地读掉 TLS 1.3 握手后服务端发来的会话票据
+
+    预热的连接还没有收发过数据，票据留在接收缓冲区时 urllib3 会认为连接已断开。
+
+    Returns:
+        False 表示连接已关闭或收到了意外的数据
+    """
+    try:
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+    except OSError:
+        return False
+    try:
+        for _ in range(16):
+            if not wait_for_read(sock, timeout=0.0):
+                return True
+            try:
+                sock.recv(1)
+            except ssl.SSLWantReadError:
+                # 只有握手后的消息，没有应用数据
+                continue
+            except (OSError, ValueError):
+                return False
+            # 收到应用数据或连接已关闭
+            return False
+        return True
+    finally:
+        try:
+            sock.settimeout(timeout)
+        except OSError:
+            pass
+
+
+def pooled_connection(base: type, cache: Optional[DNSCache], stats: TransportStats, name: str) -> type:
+    """
+    扩展 urllib3 连接类：
+
+    - 提供 DNS 缓存时，命中后直接连接缓存的地址，连接失败时删除条目并正常解析；
+      TLS 的 SNI 和证书主机名校验仍使用原主机名，只替换 TCP 连接的目标地址
+    - 预热的连接第一次取出时先读掉会话票据，避免被当作已断开而重新握手
+    """
+
+    class PooledConnection(base):
+        # warm_up() 建立连接后设置
+        prewarmed = False
+
+        @property
+        def is_connected(self) -> bool:
+            if self.prewarmed:
+                self.prewarmed = False
+                if isinstance(self.sock, ssl.SSLSocket) and not _drain_session_tickets(self.sock):
+                    return False
+            return super().is_connected
+
+        def _new_conn(self):
+            host = self._dns_host
+            if cache is None or _is_ip_address(host):
+                return super()._new_conn()
+
+            address = cache.lookup(host, self.port)
+            if address:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    stats.record_dns_cache_hit(name)
+                    return sock
+                except (NewConnectionError, ConnectTimeoutError):
+                    # 地址已变化：删除条目后重新解析
+                    cache.invalidate(host, self.port)
+                finally:
+                    self._dns_host = host
+
+            sock = super()._new_conn()
+            try:
+                cache.store(host, self.port, sock.getpeername()[0])
+            except OSError:
+                pass
+            return sock
+
+    return PooledConnection
+
+
+class ResumingSSLContext:
+    """
+    在同一连接池的新连接上恢复之前连接的 TLS 会话
+
+    包装 urllib3 使用的 SSLContext，wrap_socket 时传入同一主机最近一次握手的会话；
+    服务端接受时只做简化握手（省去证书交换和验证）。其余属性和方法都转发给原 context。
+    """
+
+    def __init__(self, context, stats: TransportStats, name: str):
+        object.__setattr__(self, "_context", context)
+        object.__setattr__(self, "_stats", stats)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_lock", threading.Lock())
+        # 主机名 -> 最近一次握手的 socket（弱引用）和可复用的会话
+        object.__setattr__(self, "_sockets", {})
+        object.__setattr__(self, "_sessions", {})
+
+    def __getattr__(self, attr):
+        return getattr(self._context, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._context, attr, value)
+
+    def _session(self, hostname: Optional[str]):
+        with self._lock:
+            ref = self._sockets.get(hostname)
+            sock = ref() if ref is not None else None
+            if sock is not None:
+                # TLS 1.3 的会话票据在握手之后才到达，因此在下次建立连接时再读取
+                try:
+                    session = sock.session
+                except (OSError, ValueError):
+                    session = None
+                if session is not None and (session.has_ticket or session.id):
+                    self._sessions[hostname] = session
+            session = self._sessions.get(hostname)
+        if session is not None and time.time() > session.time + session.timeout:
+            return None
+        return session
+
+    def wrap_socket(self, sock, server_hostname=None, **kwargs):
+        session = kwargs.pop("session", None) or self._session(server_hostname)
+        if session is None:
+            ssl_sock = self._context.wrap_socket(sock, server_hostname=server_hostname, **kwargs)
+        else:
+            # wrap_socket 失败时会关闭传入的 socket，保留一个副本用于不带会话重试
+            spare = sock.dup()
+            try:
+                ssl_sock = self._context.wrap_socket(sock, server_hostname=server_hostname, session=session, **kwargs)
+            except ssl.SSLError:
+                # 证书校验失败等握手错误（SSLCertVerificationError 也是 ValueError 的子类）
+                spare.close()
+                raise
+            except ValueError:
+                # 会话与当前 context 不匹配（握手前失败）：丢弃会话，完整握手
+                with self._lock:
+                    self._sessions.pop(server_hostname, None)
+                    self._sockets.pop(server_hostname, None)
+                ssl_sock = self._context.wrap_socket(spare, server_hostname=server_hostname, **kwargs)
+            else:
+                spare.close()
+        if ssl_sock.session_reused:
+            self._stats.record_tls_resumption(self._name)
+        with self._lock:
+            self._sockets[server_hostname] = weakref.ref(ssl_sock)
+        return ssl_sock
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    带统计和空闲回收的 HTTPAdapter
+
+    通过替换 urllib3 连接池类统计新建连接数；空闲超过 idle_timeout 后，
+    在下一个请求前清空连接池，避免复用已被服务端关闭的连接。
+    按配置为新连接启用 DNS 缓存和 TLS 会话恢复，并支持预热连接（warm_up）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: TransportConfig,
+        stats: TransportStats,
+        pool_connections: int,
+        pool_maxsize: int
+    ):
+        self.name = name
+        self.transport = config
+        self.stats = stats
+        self._last_used = time.monotonic()
+        self._in_flight = 0
+        self._idle_lock = threading.Lock()
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault("socket_options", keepalive_socket_options(self.transport))
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+        stats = self.stats
+        name = self.name
+        resumption = self.transport.tls_resumption
+        dns_cache = DNSCache(self.transport.dns_cache, self.transport.dns_cache_ttl) if self.transport.dns_cache else None
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = pooled_connection(HTTPConnectionPool.ConnectionCls, dns_cache, stats, name)
+
+            def _new_conn(self):
+                stats.record_handshake(name)
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            # 基于当前的 ConnectionCls，保留 enable_http2() 的替换
+            ConnectionCls = pooled_connection(HTTPSConnectionPool.ConnectionCls, dns_cache, stats, name)
+
+            def _new_conn(self):
+                stats.record_handshake(name)
+                if resumption and self.conn_kw.get("ssl_context") is None:
+                    # 连接池内的连接共用一个 context，会话才能复用；证书校验方式与连接池一致
+                    context = create_urllib3_context(cert_reqs=resolve_cert_reqs(self.cert_reqs))
+                    self.conn_kw["ssl_context"] = ResumingSSLContext(context, stats, name)
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def warm_up(
+        self,
+        url: str,
+        session: requests.Session,
+        connections: int = 1,
+        timeout: Optional[float] = None
+    ) -> int:
+        """
+        预先建立到 url 所在主机的连接并放回连接池，之后的请求直接复用
+
+        在调用线程中完成 DNS 解析、TCP 连接和 TLS 握手（通常在后台线程调用）。
+        通过代理访问时不预热。
+
+        Args:
+            url: 目标 URL（只使用协议、主机和端口）
+            session: 之后发送请求的会话，用于确定证书校验和代理设置
+            connections: 预热的连接数
+            timeout: 连接超时（秒）
+
+        Returns:
+            成功建立的连接数
+        """
+        settings = session.merge_environment_settings(url, {}, None, None, None)
+        if select_proxy(url, settings["proxies"]):
+            return 0
+
+        request = requests.Request("GET", url).prepare()
+        if hasattr(self, "get_connection_with_tls_context"):
+            pool = self.get_connection_with_tls_context(request, settings["verify"], settings["proxies"], settings["cert"])
+        else:
+            # requests<2.32.2
+            pool = self.get_connection(url, settings["proxies"])
+        self.cert_verify(pool, url, settings["verify"], settings["cert"])
+
+        warmed = 0
+        conns = []
+        try:
+            for _ in range(connections):
+                conn = pool._get_conn()
+                conns.append(conn)
+                if conn.is_connected:
+                    continue
+                conn.timeout = timeout
+                try:
+                    conn.connect()
+                except Exception:
+                    conn.close()
+                    raise
+                conn.prewarmed = True
+                warmed += 1
+                self.stats.record_prewarm(self.name)
+        finally:
+            for conn in conns:
+                pool._put_conn(conn)
+        return warmed
+
+    def send(self, request, **kwargs):
+        with self._idle_lock:
+            now = time.monotonic()
+            idle = now - self._last_used
+            if (self.transport.idle_timeout is not None and self._in_flight == 0
+                    and idle > self.transport.idle_timeout):
+                self.poolmanager.clear()
+                self.stats.record_idle_reset(self.name)
+            self._in_flight += 1
+
+        self.stats.record_request(self.name)
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            with self._idle_lock:
+                self._in_flight -= 1
+                self._last_used = time.monotonic()
+
+
+def build_adapters(config: TransportConfig, stats: TransportStats) -> Dict[str, PooledAdapter]:
+    """
+    按配置创建 API 与 CDN 两个连接池适配器
+
+    Returns:
+        {"api": PooledAdapter, "cdn": PooledAdapter}
+    """
+    if config.http2:
+        enable_http2()
+
+    return {
+        # API 只有一个主机，缓存 1 个连接池即可
+        "api": PooledAdapter("api", config, stats, 1, config.api_pool_size),
+        "cdn": PooledAdapter("cdn", config, stats, config.cdn_pool_connections, config.cdn_pool_size),
+    }
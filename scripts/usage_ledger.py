@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+用量与耗时账本
+
+将每个终态任务的 usage、时间戳、排队和运行耗时追加写入列式存储，
+并提供基于 NumPy 的向量化分组汇总。
+
+存储布局（一个目录）：
+    schema.json        列定义与分类列字典（model / resolution / tier / status）
+    <column>.bin       每列一个小端定长二进制文件，只追加
+    .lock              追加写入时的文件锁
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        f"Missing optional dependency for the usage ledger: {e.name}. "
+        "Install with: pip install numpy"
+    )
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    from seedance_client import TaskInfo, TaskStatus, parse_timestamp
+except ImportError:
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import TaskInfo, TaskStatus, parse_timestamp
+
+
+# 列名 -> NumPy dtype（固定小端，保证跨平台可读）
+COLUMNS = {
+    "task_key": "<u8",
+    "created_at": "<i8",
+    "updated_at": "<i8",
+    "day": "<i4",
+    "model": "<u2",
+    "resolution": "<u2",
+    "tier": "<u2",
+    "status": "<u2",
+    "duration": "<i2",
+    "completion_tokens": "<i8",
+    "total_tokens": "<i8",
+    "queue_seconds": "<f4",
+    "run_seconds": "<f4",
+}
+
+# 分类列：存储字典编码
+CATEGORICAL = ("model", "resolution", "tier", "status")
+
+# 可用于分组的维度
+GROUP_KEYS = CATEGORICAL + ("day",)
+
+SCHEMA_VERSION = 1
+
+# p95 估算用的对数直方图：桶宽约 2%，覆盖到约 11 小时
+HIST_BINS = 512
+HIST_SCALE = 48.0
+
+
+def task_key(task_id: str) -> int:
+    """任务 ID 的 64 位哈希，用于去重"""
+    digest = hashlib.blake2b(task_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class StartTimeObserver:
+    """
+    轮询回调包装器
+
+    记录首次观察到 running 状态的时间，用于拆分排队与运行耗时，
+    并将任务继续转发给原回调。
+    """
+
+    def __init__(self, callback: Optional[Callable] = None):
+        self.callback = callback
+        self.started_at: Optional[float] = None
+
+    def __call__(self, task: TaskInfo):
+        if self.started_at is None and task.status == TaskStatus.RUNNING:
+            self.started_at = time.time()
+        if self.callback:
+            self.callback(task)
+
+
+class UsageLedger:
+    """列式用量账本"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 账本目录，不存在时自动创建
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._schema_path = self.path / "schema.json"
+        self._load_schema()
+
+    def _load_schema(self):
+        if self._schema_path.exists():
+            with open(self._schema_path, "r", encoding="utf-8") as f:
+                schema = json.load(f)
+            if schema.get("version") != SCHEMA_VERSION:
+                raise ValueError(f"Unsupported ledger schema version: {schema.get('version')}")
+            self.dictionaries = schema["dictionaries"]
+        else:
+            self.dictionaries = {name: [] for name in CATEGORICAL}
+
+    def _save_schema(self):
+        schema = {
+            "version": SCHEMA_VERSION,
+            "columns": COLUMNS,
+            "dictionaries": self.dictionaries,
+        }
+        tmp_path = self._schema_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(schema, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._schema_path)
+
+    @contextmanager
+    def _locked(self):
+        """追加期间持有独占锁，避免多个进程交错写入"""
+        with open(self.path / ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # 其他进程可能已扩充字典，持锁后重新加载
+                self._load_schema()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _encode(self, column: str, value: Optional[str]) -> int:
+        values = self.dictionaries[column]
+        value = value or ""
+        try:
+            return values.index(value)
+        except ValueError:
+            values.append(value)
+            return len(values) - 1
+
+    def _row(self, task: TaskInfo, started_at: Optional[float]) -> Dict[str, Any]:
+        created = parse_timestamp(task.created_at)
+        updated = parse_timestamp(task.updated_at) or time.time()
+        usage = task.usage or {}
+
+        completion = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+        total = usage.get("total_tokens")
+        if total is None:
+            total = (usage.get("input_tokens", 0) or 0) + completion
+
+        queue_seconds = run_seconds = float("nan")
+        if created is not None and started_at is not None:
+            queue_seconds = max(started_at - created, 0.0)
+            run_seconds = max(updated - started_at, 0.0)
+
+        created = created if created is not None else updated
+        return {
+            "task_key": task_key(task.id),
+            "created_at": int(created),
+            "updated_at": int(updated),
+            "day": int(created // 86400),
+            "model": self._encode("model", task.model),
+            "resolution": self._encode("resolution", task.resolution),
+            "tier": self._encode("tier", task.service_tier or "default"),
+            "status": self._encode("status", task.status.value),
+            "duration": task.duration if task.duration is not None else -1,
+            "completion_tokens": int(completion),
+            "total_tokens": int(total),
+            "queue_seconds": queue_seconds,
+            "run_seconds": run_seconds,
+        }
+
+    def append(self, task: TaskInfo, started_at: Optional[float] = None) -> bool:
+        """
+        追加单个终态任务
+
+        Args:
+            task: 终态 TaskInfo
+            started_at: 首次观察到 running 的时间戳（未知时为 None）
+
+        Returns:
+            是否写入（已记录过的任务返回 False）
+        """
+        return self.append_many([(task, started_at)]) == 1
+
+    def append_many(self, entries: Iterable) -> int:
+        """
+        批量追加终态任务
+
+        Args:
+            entries: TaskInfo 或 (TaskInfo, started_at) 的可迭代对象
+
+        Returns:
+            实际写入的行数
+        """
+        pairs = [entry if isinstance(entry, tuple) else (entry, None) for entry in entries]
+
+        with self._locked():
+            count = self._row_count()
+            existing = self._column("task_key", count)
+            rows = []
+            seen = set()
+            for task, started_at in pairs:
+                if task.status.value not in ("succeeded", "failed", "expired", "cancelled"):
+                    continue
+                row = self._row(task, started_at)
+                if row["task_key"] in seen:
+                    continue
+                seen.add(row["task_key"])
+                rows.append(row)
+
+            if rows and len(existing):
+                if len(rows) <= 16:
+                    # 少量行逐个线性比较，比 np.isin 的全量排序快得多
+                    rows = [row for row in rows if not (existing == np.uint64(row["task_key"])).any()]
+                else:
+                    keys = np.fromiter((row["task_key"] for row in rows), dtype=np.uint64, count=len(rows))
+                    fresh = ~np.isin(keys, existing)
+                    rows = [row for row, keep in zip(rows, fresh) if keep]
+
+            del existing
+            if not rows:
+                return 0
+
+            self._save_schema()
+            for name, dtype in COLUMNS.items():
+                array = np.array([row[name] for row in rows], dtype=dtype)
+                with open(self.path / f"{name}.bin", "ab") as f:
+                    # 先截掉中断写入留下的尾部，保证各列按行对齐
+                    f.truncate(count * np.dtype(dtype).itemsize)
+                    f.write(array.tobytes())
+
+        return len(rows)
+
+    def _row_count(self) -> int:
+        """完整写入的行数（按最短列计算，忽略中断写入留下的尾部）"""
+        counts = []
+        for name, dtype in COLUMNS.items():
+            column_path = self.path / f"{name}.bin"
+            size = column_path.stat().st_size if column_path.exists() else 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def _column(self, name: str, rows: int) -> "np.ndarray":
+        if rows == 0:
+            return np.empty(0, dtype=COLUMNS[name])
+        return np.memmap(self.path / f"{name}.bin", dtype=COLUMNS[name], mode="r", shape=(rows,))
+
+    def load(self, columns: Optional[Sequence[str]] = None) -> Dict[str, "np.ndarray"]:
+        """
+        以内存映射方式加载列
+
+        Args:
+            columns: 需要的列名，默认全部
+
+        Returns:
+            列名 -> 只读数组
+        """
+        rows = self._row_count()
+        return {name: self._column(name, rows) for name in (columns or COLUMNS)}
+
+    def __len__(self) -> int:
+        return self._row_count()
+
+    def aggregate(
+        self,
+        group_by: Sequence[str] = ("model",),
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        向量化分组汇总
+
+        Args:
+            group_by: 分组维度，取自 model / resolution / tier / status / day
+            since: 仅统计 created_at >= since 的任务
+            until: 仅统计 created_at < until 的任务
+
+        Returns:
+            每组一个字典，包含分组键、任务数、token 合计、排队/运行耗时均值与 p95
+        """
+        for key in group_by:
+            if key not in GROUP_KEYS:
+                raise ValueError(f"Unknown group key: {key} (choose from {', '.join(GROUP_KEYS)})")
+
+        data = self.load(tuple(group_by) + (
+            "created_at", "updated_at", "completion_tokens", "total_tokens",
+            "queue_seconds", "run_seconds"
+        ))
+
+        mask = np.ones(len(data["created_at"]), dtype=bool)
+        if since is not None:
+            mask &= data["created_at"] >= since
+        if until is not None:
+            mask &= data["created_at"] < until
+        if not mask.any():
+            return []
+
+        # 组合分组键：分类列本身就是稠密编码，日期列减去最小值，再合成单一整数键
+        codes = []
+        dims = []
+        day_base = 0
+        for key in group_by:
+            column = np.asarray(data[key])[mask].astype(np.int64)
+            if key == "day":
+                day_base = int(column.min())
+                column -= day_base
+                dims.append(int(column.max()) + 1)
+            else:
+                dims.append(max(len(self.dictionaries[key]), 1))
+            codes.append(column)
+
+        if codes:
+            flat = np.ravel_multi_index(codes, dims)
+            populated = np.flatnonzero(np.bincount(flat, minlength=int(np.prod(dims))))
+            remap = np.empty(int(np.prod(dims)), dtype=np.int64)
+            remap[populated] = np.arange(len(populated))
+            inverse = remap[flat]
+        else:
+            populated = np.zeros(1, dtype=np.int64)
+            inverse = np.zeros(int(mask.sum()), dtype=np.int64)
+        n_groups = len(populated)
+
+        count = np.bincount(inverse, minlength=n_groups)
+        completion = np.bincount(inverse, weights=data["completion_tokens"][mask], minlength=n_groups)
+        total = np.bincount(inverse, weights=data["total_tokens"][mask], minlength=n_groups)
+        latency = (data["updated_at"][mask] - data["created_at"][mask]).astype(np.float64)
+
+        stats = {
+            "latency": self._group_stats(inverse, latency, n_groups),
+            "queue": self._group_stats(inverse, data["queue_seconds"][mask], n_groups),
+            "run": self._group_stats(inverse, data["run_seconds"][mask], n_groups),
+        }
+
+        group_codes = np.unravel_index(populated, dims) if codes else []
+        results = []
+        for i in range(n_groups):
+            row: Dict[str, Any] = {}
+            for key, code in zip(group_by, group_codes):
+                value = int(code[i])
+                if key == "day":
+                    row[key] = time.strftime("%Y-%m-%d", time.gmtime((value + day_base) * 86400))
+                else:
+                    row[key] = self.dictionaries[key][value]
+            row["tasks"] = int(count[i])
+            row["completion_tokens"] = int(completion[i])
+            row["total_tokens"] = int(total[i])
+            for name, (mean, p95) in stats.items():
+                row[f"{name}_mean_s"] = None if np.isnan(mean[i]) else round(float(mean[i]), 2)
+                row[f"{name}_p95_s"] = None if np.isnan(p95[i]) else round(float(p95[i]), 2)
+            results.append(row)
+
+        return results
+
+    @staticmethod
+    def _group_stats(inverse: "np.ndarray", values: "np.ndarray", n_groups: int):
+        """
+        按组计算均值与 p95，忽略 NaN
+
+        p95 基于对数分桶直方图估算（相对误差约 2%），避免对全量数据排序。
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        group = inverse[valid]
+        values = np.maximum(values[valid], 0.0)
+
+        n = np.bincount(group, minlength=n_groups)
+        sums = np.bincount(group, weights=values, minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums / n
+
+        p95 = np.full(n_groups, np.nan)
+        if len(values):
+            bins = np.minimum((np.log1p(values) * HIST_SCALE).astype(np.int64), HIST_BINS - 1)
+            histogram = np.bincount(
+                group * HIST_BINS + bins, minlength=n_groups * HIST_BINS
+            ).reshape(n_groups, HIST_BINS)
+            cumulative = np.cumsum(histogram, axis=1)
+            target = np.ceil(n * 0.95)[:, None]
+            index = np.argmax(cumulative >= target, axis=1)
+            present = n > 0
+            p95[present] = np.expm1((index[present] + 0.5) / HIST_SCALE)
+
+        return mean, p95
+
+
+def default_ledger_path() -> Optional[str]:
+    """账本目录：SEEDANCE_LEDGER_DIR 环境变量，未设置时返回 None"""
+    return os.environ.get("SEEDANCE_LEDGER_DIR") or None
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+用量与耗时报表
+
+从用量账本中按模型、分辨率、服务等级、状态和日期汇总 token 用量与耗时。
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+
+try:
+    from usage_ledger import UsageLedger, GROUP_KEYS, default_ledger_path
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from usage_ledger import UsageLedger, GROUP_KEYS, default_ledger_path
+    from profiling import add_profiling_arguments, start_profiling
+
+
+def parse_date(value: str) -> float:
+    """解析 YYYY-MM-DD（UTC）为时间戳"""
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+def format_report(rows: list, group_by: list) -> str:
+    """
+    格式化汇总结果为表格
+
+    Args:
+        rows: UsageLedger.aggregate 的返回值
+        group_by: 分组维度
+
+    Returns:
+        格式化的字符串
+    """
+    if not rows:
+        return "No usage recorded."
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    key_widths = {key: max(len(key), *(len(str(row[key])) for row in rows)) for key in group_by}
+    header = " ".join(f"{key:<{key_widths[key]}}" for key in group_by)
+    header += f" {'Tasks':>7} {'Tokens':>14} {'Queue avg':>10} {'Run avg':>9} {'Run p95':>9} {'Total p95':>10}"
+    lines = [header, "-" * len(header)]
+
+    for row in rows:
+        line = " ".join(f"{str(row[key]):<{key_widths[key]}}" for key in group_by)
+        line += (
+            f" {row['tasks']:>7} {row['total_tokens']:>14,}"
+            f" {fmt(row['queue_mean_s']):>10} {fmt(row['run_mean_s']):>9}"
+            f" {fmt(row['run_p95_s']):>9} {fmt(row['latency_p95_s']):>10}"
+        )
+        lines.append(line)
+
+    lines.append("")
+    lines.append(
+        f"Total: {sum(r['tasks'] for r in rows)} tasks, "
+        f"{sum(r['total_tokens'] for r in rows):,} tokens"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report token usage and latency from the usage ledger",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Usage per model
+  python usage_report.py --ledger ./ledger
+
+  # Per model and day since a date
+  python usage_report.py --group-by model,day --since 2025-01-01
+
+  # Per service tier and resolution as JSON
+  python usage_report.py --group-by tier,resolution --json
+        """
+    )
+
+    parser.add_argument(
+        "--ledger",
+        type=str,
+        default=default_ledger_path(),
+        help="Ledger directory (default: SEEDANCE_LEDGER_DIR env variable)"
+    )
+    parser.add_argument(
+        "--group-by",
+        type=str,
+        default="model",
+        help=f"Comma-separated group keys: {', '.join(GROUP_KEYS)} (default: model)"
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        help="Only tasks created on or after this UTC date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--until",
+        type=str,
+        help="Only tasks created before this UTC date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output raw JSON"
+    )
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "usage_report")
+
+    if not args.ledger:
+        parser.error("--ledger is required (or set SEEDANCE_LEDGER_DIR)")
+
+    group_by = [key.strip() for key in args.group_by.split(",") if key.strip()]
+    for key in group_by:
+        if key not in GROUP_KEYS:
+            parser.error(f"Unknown group key: {key}")
+
+    try:
+        since = parse_date(args.since) if args.since else None
+        until = parse_date(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"Invalid date: {e}")
+
+    try:
+        ledger = UsageLedger(args.ledger)
+        start = time.perf_counter()
+        rows = ledger.aggregate(group_by, since=since, until=until)
+        elapsed = time.perf_counter() - start
+
+        if args.json:
+            import json
+            print(json.dumps(rows, indent=2, ensure_ascii=False))
+        else:
+            print(format_report(rows, group_by))
+            print(f"Aggregated {len(ledger):,} rows in {elapsed * 1000:.0f} ms")
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
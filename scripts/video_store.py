@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+内容寻址的本地视频存储
+
+视频按内容哈希（SHA-256）保存在 objects/ 下，相同内容只保存一份；
+SQLite 索引记录任务 ID 到对象的映射，以及为其创建的可读文件名
+（硬链接，跨文件系统时退化为符号链接或复制）。
+已存储的任务直接返回本地文件，不发起任何网络请求；
+超出磁盘配额或超过保留时间时按最近访问时间（LRU）淘汰。
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    from seedance_client import SeedanceClient, TaskStatus
+    from downloader import DOWNLOAD_TIMEOUT, download_video
+    from cancel_task import parse_age
+    from profiling import add_profiling_arguments, start_profiling
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import SeedanceClient, TaskStatus
+    from downloader import DOWNLOAD_TIMEOUT, download_video
+    from cancel_task import parse_age
+    from profiling import add_profiling_arguments, start_profiling
+
+
+HASH_ALGORITHM = "sha256"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    digest       TEXT PRIMARY KEY,
+    size         INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_lru ON objects (last_access);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id      TEXT PRIMARY KEY,
+    digest       TEXT NOT NULL REFERENCES objects (digest),
+    stored_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_digest ON tasks (digest);
+CREATE TABLE IF NOT EXISTS links (
+    path         TEXT PRIMARY KEY,
+    digest       TEXT NOT NULL REFERENCES objects (digest),
+    kind         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_digest ON links (digest);
+"""
+
+
+def parse_size(value: str) -> int:
+    """
+    解析容量字符串为字节数
+
+    Args:
+        value: 如 "500M"、"20G"、"1.5T"，纯数字按字节处理
+
+    Returns:
+        字节数
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", value.lower())
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " kmgt".index(unit or " "))
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    """计算文件的 SHA-256（用于导入已有文件）"""
+    hasher = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@dataclass
+class StoreResult:
+    """fetch 的结果"""
+    task_id: str
+    path: Path
+    digest: str
+    size: int
+    # True 表示命中本地存储，未发起网络请求
+    cached: bool
+
+
+class VideoStore:
+    """内容寻址视频存储"""
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        quota_bytes: Optional[int] = None,
+        max_age: Optional[float] = None
+    ):
+        """
+        Args:
+            root: 存储根目录
+            quota_bytes: 对象总大小上限，超出时按 LRU 淘汰，None 表示不限
+            max_age: 超过该秒数未访问的对象会被淘汰，None 表示不限
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.mp4"
+
+    def get(self, task_id: str) -> Optional[Path]:
+        """
+        查找已存储的任务视频（更新访问时间）
+
+        Args:
+            task_id: 任务 ID
+
+        Returns:
+            对象文件路径，未存储时返回 None
+        """
+        rows = self._execute("SELECT digest FROM tasks WHERE task_id = ?", (task_id,))
+        if not rows:
+            return None
+        digest = rows[0]["digest"]
+        path = self.object_path(digest)
+        if not path.exists():
+            # 对象文件被外部删除，清理索引
+            self._forget(digest)
+            return None
+        self._execute("UPDATE objects SET last_access = ? WHERE digest = ?", (time.time(), digest))
+        return path
+
+    def put_file(
+        self,
+        task_id: str,
+        path: Union[str, Path],
+        digest: Optional[str] = None,
+        move: bool = True
+    ) -> Path:
+        """
+        将文件存入存储
+
+        Args:
+            task_id: 任务 ID
+            path: 视频文件路径
+            digest: 文件的 SHA-256（下载时已计算则传入，避免再次读取）
+            move: 为 True 时移动文件（同内容已存在时删除源文件），否则复制
+
+        Returns:
+            对象文件路径
+        """
+        path = Path(path)
+        digest = digest or hash_file(path)
+        target = self.object_path(digest)
+        now = time.time()
+
+        if target.exists():
+            if move:
+                path.unlink()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if move:
+                os.replace(path, target)
+            else:
+                shutil.copy2(path, target)
+
+        size = target.stat().st_size
+        self._execute(
+            "INSERT INTO objects (digest, size, created_at, last_access) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access",
+            (digest, size, now, now)
+        )
+        self._execute(
+            "INSERT OR REPLACE INTO tasks (task_id, digest, stored_at) VALUES (?, ?, ?)",
+            (task_id, digest, now)
+        )
+        # 刚存入的对象不参与淘汰，即使它本身超过配额
+        self.evict(keep=(digest,))
+        return target
+
+    def fetch(
+        self,
+        task_id: str,
+        url: Optional[str],
+        session=None,
+        task: Optional[Any] = None,
+        timeout: Tuple[float, float] = DOWNLOAD_TIMEOUT
+    ) -> StoreResult:
+        """
+        获取任务视频：已存储时直接返回，否则下载后存入
+
+        Args:
+            task_id: 任务 ID
+            url: 视频 URL（已存储时不使用）
+            session: 下载会话（通常为 SeedanceClient.cdn_session）
+            task: 对应的 TaskInfo，用于下载后的头部校验
+            timeout: 下载的 (连接超时, 读取超时)
+
+        Returns:
+            StoreResult
+        """
+        existing = self.get(task_id)
+        if existing is not None:
+            digest = existing.stem
+            return StoreResult(task_id, existing, digest, existing.stat().st_size, cached=True)
+
+        if not url:
+            raise ValueError(f"Task {task_id} is not stored and has no video URL")
+
+        part = self.tmp_dir / f"{task_id}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            result = download_video(
+                url, part, session=session, hash_algorithm=HASH_ALGORITHM, task=task, timeout=timeout
+            )
+            path = self.put_file(task_id, part, digest=result.digest)
+        finally:
+            if part.exists():
+                part.unlink()
+        return StoreResult(task_id, path, result.digest, result.size, cached=False)
+
+    def link(self, task_id: str, dest: Union[str, Path]) -> Path:
+        """
+        为已存储的任务创建可读文件名
+
+        优先硬链接（不占额外空间），跨文件系统时使用符号链接，都不支持时复制。
+
+        Args:
+            task_id: 任务 ID
+            dest: 目标路径
+
+        Returns:
+            目标路径
+        """
+        source = self.get(task_id)
+        if source is None:
+            raise KeyError(f"Task not in store: {task_id}")
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        if dest.exists() or dest.is_symlink():
+            if dest.exists() and os.path.samefile(dest, source):
+                return dest
+            dest.unlink()
+
+        try:
+            os.link(source, dest)
+            kind = "hardlink"
+        except OSError:
+            try:
+                os.symlink(source.resolve(), dest)
+                kind = "symlink"
+            except OSError:
+                shutil.copy2(source, dest)
+                kind = "copy"
+
+        self._execute(
+            "INSERT OR REPLACE INTO links (path, digest, kind) VALUES (?, ?, ?)",
+            (str(dest.absolute()), source.stem, kind)
+        )
+        return dest
+
+    def _forget(self, digest: str) -> int:
+        """
+        删除对象及其索引和可读链接，返回释放的对象字节数
+
+        复制出的文件是独立副本，不会被删除。
+        """
+        rows = self._execute("SELECT size FROM objects WHERE digest = ?", (digest,))
+        size = rows[0]["size"] if rows else 0
+
+        for row in self._execute("SELECT path, kind FROM links WHERE digest = ?", (digest,)):
+            link = Path(row["path"])
+            # 只删除仍指向该对象的链接，用户替换过的文件保留
+            try:
+                if row["kind"] == "symlink":
+                    if link.is_symlink() and Path(os.readlink(link)).stem == digest:
+                        link.unlink()
+                elif row["kind"] == "hardlink" and link.exists():
+                    obj = self.object_path(digest)
+                    if obj.exists() and os.path.samefile(link, obj):
+                        link.unlink()
+            except OSError:
+                pass
+
+        obj = self.object_path(digest)
+        if obj.exists():
+            obj.unlink()
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM links WHERE digest = ?", (digest,))
+            self._db.execute("DELETE FROM tasks WHERE digest = ?", (digest,))
+            self._db.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+            self._db.execute("COMMIT")
+        return size
+
+    def evict(
+        self,
+        quota_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        keep: Sequence[str] = ()
+    ) -> List[str]:
+        """
+        按保留时间和磁盘配额淘汰对象
+
+        Args:
+            quota_bytes: 覆盖实例的配额
+            max_age: 覆盖实例的保留时间（秒）
+            keep: 不淘汰的对象哈希
+
+        Returns:
+            被淘汰的对象哈希
+        """
+        quota_bytes = quota_bytes if quota_bytes is not None else self.quota_bytes
+        max_age = max_age if max_age is not None else self.max_age
+        evicted = []
+
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            for row in self._execute("SELECT digest FROM objects WHERE last_access < ?", (cutoff,)):
+                if row["digest"] in keep:
+                    continue
+                self._forget(row["digest"])
+                evicted.append(row["digest"])
+
+        if quota_bytes is not None:
+            total = self._execute("SELECT COALESCE(SUM(size), 0) AS total FROM objects")[0]["total"]
+            if total > quota_bytes:
+                for row in self._execute("SELECT digest FROM objects ORDER BY last_access"):
+                    if total <= quota_bytes:
+                        break
+                    if row["digest"] in keep:
+                        continue
+                    total -= self._forget(row["digest"])
+                    evicted.append(row["digest"])
+
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        objects = self._execute("SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS total FROM objects")[0]
+        tasks = self._execute("SELECT COUNT(*) AS n FROM tasks")[0]["n"]
+        links = {row["kind"]: row["n"] for row in self._execute(
+            "SELECT kind, COUNT(*) AS n FROM links GROUP BY kind"
+        )}
+        return {
+            "objects": objects["n"],
+            "bytes": objects["total"],
+            "tasks": tasks,
+            "deduplicated_tasks": tasks - objects["n"],
+            "links": links,
+            "quota_bytes": self.quota_bytes,
+        }
+
+
+def default_store_path() -> Optional[str]:
+    """SEEDANCE_STORE_DIR 环境变量指定的存储目录"""
+    return os.environ.get("SEEDANCE_STORE_DIR") or None
+
+
+def open_store(
+    root: Union[str, Path],
+    quota: Optional[str] = None,
+    max_age: Optional[str] = None
+) -> VideoStore:
+    """
+    按命令行参数打开存储，存入新视频时自动按配额和保留时间淘汰
+
+    Args:
+        root: 存储根目录
+        quota: 容量上限（如 "50G"），None 时读取 SEEDANCE_STORE_QUOTA 环境变量
+        max_age: 保留时间（如 "30d"），None 时读取 SEEDANCE_STORE_MAX_AGE 环境变量
+
+    Returns:
+        VideoStore
+
+    Raises:
+        ValueError: 容量或时长格式无效
+    """
+    quota = quota or os.environ.get("SEEDANCE_STORE_QUOTA")
+    max_age = max_age or os.environ.get("SEEDANCE_STORE_MAX_AGE")
+    return VideoStore(
+        root,
+        quota_bytes=parse_size(quota) if quota else None,
+        max_age=parse_age(max_age) if max_age else None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Content-addressed local video store",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Get a task's video, downloading only if it is not stored yet
+  python video_store.py --store ~/.seedance/store get <task_id> -o output/shot1.mp4
+
+  # Import an existing file
+  python video_store.py --store ~/.seedance/store import <task_id> output/video_abc.mp4
+
+  # Keep the store under 50GB and drop videos unused for 30 days
+  python video_store.py --store ~/.seedance/store evict --quota 50G --max-age 30d
+
+  # Show usage
+  python video_store.py --store ~/.seedance/store stats
+        """
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=default_store_path(),
+        help="Store directory (default: SEEDANCE_STORE_DIR env variable)"
+    )
+    parser.add_argument("--api-key", type=str, help="Override API Key")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    get_parser = subparsers.add_parser("get", help="Return a stored video, downloading it if missing")
+    get_parser.add_argument("task_id", help="Task ID")
+    get_parser.add_argument("-o", "--output", type=str, help="Create a readable link at this path")
+
+    import_parser = subparsers.add_parser("import", help="Add an existing video file")
+    import_parser.add_argument("task_id", help="Task ID")
+    import_parser.add_argument("path", help="Video file")
+    import_parser.add_argument("--move", action="store_true", help="Move instead of copy")
+
+    evict_parser = subparsers.add_parser("evict", help="Evict by quota and/or age")
+    evict_parser.add_argument("--quota", type=str, help="Maximum total size (e.g. 500M, 50G)")
+    evict_parser.add_argument("--max-age", type=str, help="Evict videos not accessed for AGE (e.g. 7d)")
+
+    subparsers.add_parser("stats", help="Show store statistics")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "video_store")
+
+    if not args.store:
+        parser.error("--store is required (or set SEEDANCE_STORE_DIR)")
+
+    try:
+        store = open_store(args.store)
+        result: Dict[str, Any] = {}
+
+        if args.command == "get":
+            path = store.get(args.task_id)
+            cached = path is not None
+            if path is None:
+                client = SeedanceClient(api_key=args.api_key)
+                task = client.get_task(args.task_id)
+                if task.status != TaskStatus.SUCCEEDED:
+                    raise ValueError(f"Task {args.task_id} has status {task.status.value}")
+                path = store.fetch(
+                    task.id, task.video_url, session=client.cdn_session, task=task, timeout=client.download_timeout
+                ).path
+            if args.output:
+                path = store.link(args.task_id, args.output)
+            result = {"task_id": args.task_id, "path": str(path), "cached": cached}
+            if not args.json:
+                print(f"{'✅ Stored' if cached else '📥 Downloaded'}: {path}")
+
+        elif args.command == "import":
+            path = store.put_file(args.task_id, args.path, move=args.move)
+            result = {"task_id": args.task_id, "path": str(path)}
+            if not args.json:
+                print(f"Imported {args.task_id} -> {path}")
+
+        elif args.command == "evict":
+            quota = parse_size(args.quota) if args.quota else None
+            max_age = parse_age(args.max_age) if args.max_age else None
+            if quota is None and max_age is None:
+                parser.error("evict needs --quota and/or --max-age")
+            evicted = store.evict(quota_bytes=quota, max_age=max_age)
+            result = {"evicted": evicted}
+            if not args.json:
+                print(f"Evicted {len(evicted)} videos")
+
+        stats = store.stats()
+        if args.json:
+            import json
+            result["stats"] = stats
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        elif args.command in ("stats", "evict"):
+            links = ", ".join(f"{kind}: {n}" for kind, n in sorted(stats["links"].items())) or "none"
+            print(f"Objects: {stats['objects']} ({stats['bytes'] / 1024 / 1024:.1f} MB)  "
+                  f"Tasks: {stats['tasks']} ({stats['deduplicated_tasks']} deduplicated)  Links: {links}")
+
+        store.close()
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
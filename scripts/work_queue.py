@@ -0,0 +1,772 @@
+#!/usr/bin/env python3
+"""
+多进程/多主机共享的持久化任务队列
+
+任务（已编译的请求 payload）保存在 SQLite 中，多个 worker 进程（可以在不同主机上，
+共享同一个数据库文件）通过租约认领任务：认领后调用 create_task 提交，
+在提交和 wait_for_completion 轮询期间续约。worker 崩溃后租约过期，任务被其他 worker 重新认领；
+已提交的任务记录了 task_id，重新认领时继续等待该任务，不会重复提交。
+
+每次认领都会递增 lease_token，续约和完成都以 token 为条件，
+租约已被他人接管的旧 worker 无法再写入结果；提交后才发现租约丢失时，
+task_id 仍会补记到尚无 task_id 的任务上，否则取消这次重复提交的任务。
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from seedance_client import (
+        SeedanceClient,
+        TaskInfo,
+        TaskStatus,
+        TransportConfig,
+        ResilienceConfig,
+        APIError,
+        InvalidRequestError,
+        RateLimitError,
+        NetworkError,
+        TimeoutError,
+        ValidationError,
+    )
+    from capabilities import compile_payload
+    from adaptive_concurrency import AdaptiveConcurrency, default_state_path, is_quota_error
+    from profiling import add_profiling_arguments, start_profiling
+    from hooks import HookRunner, add_hook_arguments, format_hook_stats, hooks_from_args
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from seedance_client import (
+        SeedanceClient,
+        TaskInfo,
+        TaskStatus,
+        TransportConfig,
+        ResilienceConfig,
+        APIError,
+        InvalidRequestError,
+        RateLimitError,
+        NetworkError,
+        TimeoutError,
+        ValidationError,
+    )
+    from capabilities import compile_payload
+    from adaptive_concurrency import AdaptiveConcurrency, default_state_path, is_quota_error
+    from profiling import add_profiling_arguments, start_profiling
+    from hooks import HookRunner, add_hook_arguments, format_hook_stats, hooks_from_args
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    name           TEXT,
+    payload        TEXT NOT NULL,
+    state          TEXT NOT NULL DEFAULT 'pending',
+    task_id        TEXT,
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    not_before     REAL NOT NULL DEFAULT 0,
+    lease_owner    TEXT,
+    lease_token    INTEGER NOT NULL DEFAULT 0,
+    lease_expires  REAL,
+    status         TEXT,
+    video_url      TEXT,
+    last_error     TEXT,
+    enqueued_at    REAL NOT NULL,
+    started_at     REAL,
+    finished_at    REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, not_before);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (state, lease_expires);
+"""
+
+# 这些异常通常是暂时的，任务放回队列稍后重试
+RETRYABLE_ERRORS = (RateLimitError, NetworkError, TimeoutError)
+
+
+class LeaseLostError(Exception):
+    """租约已过期并被其他 worker 接管"""
+    pass
+
+
+def default_worker_id() -> str:
+    """主机名:进程号"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """基于 SQLite 租约的任务队列"""
+
+    def __init__(self, path: str, lease_seconds: float = 60.0, max_attempts: int = 5):
+        """
+        Args:
+            path: SQLite 数据库文件路径（多主机时放在共享文件系统上）
+            lease_seconds: 租约时长，worker 崩溃后最多经过该时间被重新认领
+            max_attempts: 单个任务最大认领次数（包括崩溃后的重新认领）
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # 多进程同时写入时等待锁而不是立即报错
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _update_leased(self, job_id: int, token: int, sql: str, params: tuple = ()):
+        """仅在仍持有租约时更新，否则抛出 LeaseLostError"""
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET {sql} WHERE id = ? AND lease_token = ? AND state = 'leased'",
+                params + (job_id, token)
+            )
+        if cursor.rowcount == 0:
+            raise LeaseLostError(f"Lease on job {job_id} was lost")
+
+    def add(self, payload: Dict[str, Any], name: Optional[str] = None) -> int:
+        """
+        加入任务
+
+        Args:
+            payload: 已编译的创建任务 payload（图片需为 URL 或 data URL，
+                以便任意主机上的 worker 都能提交）
+            name: 任务名称（可选，便于查询）
+
+        Returns:
+            任务编号
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (name, payload, enqueued_at) VALUES (?, ?, ?)",
+                (name, json.dumps(payload, ensure_ascii=False), time.time())
+            )
+        return cursor.lastrowid
+
+    def claim(self, owner: str) -> Optional[sqlite3.Row]:
+        """
+        认领一个任务：待处理的任务，或租约已过期的任务
+
+        Args:
+            owner: worker 标识
+
+        Returns:
+            认领到的任务行（lease_token 为本次租约的凭据），没有可认领任务时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE 立即获取写锁，保证多个进程不会认领同一任务
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._db.execute(
+                        "SELECT id, attempts FROM jobs "
+                        "WHERE (state = 'pending' AND not_before <= ?) OR (state = 'leased' AND lease_expires < ?) "
+                        "ORDER BY id LIMIT 1",
+                        (now, now)
+                    ).fetchone()
+                    if row is None or row["attempts"] < self.max_attempts:
+                        break
+                    # 反复崩溃或失败的任务不再认领
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'failed', lease_owner = NULL, finished_at = ?, "
+                        "last_error = COALESCE(last_error, 'Lease expired too many times') WHERE id = ?",
+                        (now, row["id"])
+                    )
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_token = lease_token + 1, "
+                    "lease_expires = ?, attempts = attempts + 1, started_at = COALESCE(started_at, ?) "
+                    "WHERE id = ?",
+                    (owner, now + self.lease_seconds, now, row["id"])
+                )
+                claimed = self._db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._db.execute("COMMIT")
+                return claimed
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def extend(self, job_id: int, token: int):
+        """续约"""
+        self._update_leased(job_id, token, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def record_task(self, job_id: int, token: int, task_id: str):
+        """
+        记录已提交的 task_id，重新认领时继续等待而不是重复提交
+
+        只在尚未记录 task_id 时写入；租约丢失或已记录其他 task_id 时抛出 LeaseLostError
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET task_id = ? "
+                "WHERE id = ? AND lease_token = ? AND state = 'leased' AND task_id IS NULL",
+                (task_id, job_id, token)
+            )
+        if cursor.rowcount == 0:
+            raise LeaseLostError(f"Lease on job {job_id} was lost")
+
+    def adopt_task(self, job_id: int, task_id: str) -> bool:
+        """
+        租约丢失后补记已提交的 task_id
+
+        Returns:
+            任务未结束且尚未记录 task_id 时写入并返回 True；否则返回 False（提交是重复的）
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET task_id = ? "
+                "WHERE id = ? AND task_id IS NULL AND state IN ('pending', 'leased')",
+                (task_id, job_id)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: int, token: int, task: TaskInfo):
+        """记录终态任务：成功为 done，失败/过期/取消为 failed"""
+        state = "done" if task.status == TaskStatus.SUCCEEDED else "failed"
+        self._update_leased(
+            job_id, token,
+            "state = ?, status = ?, video_url = ?, last_error = ?, lease_owner = NULL, finished_at = ?",
+            (state, task.status.value, task.video_url, task.error_message, time.time())
+        )
+
+    def release(self, job_id: int, token: int, error: str, retry_after: float = 0.0):
+        """放回队列（保留 task_id），retry_after 秒后可再次认领"""
+        self._update_leased(
+            job_id, token,
+            "state = 'pending', last_error = ?, not_before = ?, lease_owner = NULL",
+            (error, time.time() + retry_after)
+        )
+
+    def fail(self, job_id: int, token: int, error: str):
+        """标记为失败，不再重试"""
+        self._update_leased(
+            job_id, token,
+            "state = 'failed', last_error = ?, lease_owner = NULL, finished_at = ?",
+            (error, time.time())
+        )
+
+    def requeue(self, states: Iterable[str] = ("failed",)) -> int:
+        """
+        将指定状态的任务重新放回队列（清除 task_id，重新提交）
+
+        Returns:
+            重新排队的任务数
+        """
+        states = list(states)
+        marks = ", ".join("?" for _ in states)
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET state = 'pending', task_id = NULL, attempts = 0, not_before = 0, "
+                f"status = NULL, video_url = NULL, finished_at = NULL WHERE state IN ({marks})",
+                tuple(states)
+            )
+        return cursor.rowcount
+
+    def jobs(self, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """列出任务（不含 payload）"""
+        columns = ("id, name, state, task_id, attempts, lease_owner, lease_expires, status, "
+                   "video_url, last_error, enqueued_at, started_at, finished_at")
+        if state:
+            rows = self._execute(f"SELECT {columns} FROM jobs WHERE state = ? ORDER BY id", (state,))
+        else:
+            rows = self._execute(f"SELECT {columns} FROM jobs ORDER BY id")
+        return [dict(row) for row in rows]
+
+    def metrics(self) -> Dict[str, Any]:
+        """各状态任务数、过期租约数和各 worker 持有的租约数"""
+        now = time.time()
+        counts = {state: 0 for state in ("pending", "leased", "done", "failed")}
+        for row in self._execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+            counts[row["state"]] = row["n"]
+        expired = self._execute(
+            "SELECT COUNT(*) AS n FROM jobs WHERE state = 'leased' AND lease_expires < ?", (now,)
+        )[0]["n"]
+        owners = {
+            row["lease_owner"]: row["n"]
+            for row in self._execute(
+                "SELECT lease_owner, COUNT(*) AS n FROM jobs WHERE state = 'leased' AND lease_expires >= ? "
+                "GROUP BY lease_owner",
+                (now,)
+            )
+        }
+        return {**counts, "expired_leases": expired, "workers": owners}
+
+
+class Worker:
+    """从 WorkQueue 认领任务、提交并等待完成"""
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        client: SeedanceClient,
+        worker_id: Optional[str] = None,
+        concurrency: int = 1,
+        poll_interval: float = 5.0,
+        timeout: float = 600.0,
+        limiter: Optional[AdaptiveConcurrency] = None,
+        hooks: Optional[HookRunner] = None
+    ):
+        """
+        Args:
+            queue: 任务队列
+            client: API 客户端
+            worker_id: worker 标识，默认为 主机名:进程号
+            concurrency: 本进程同时处理的任务数
+            poll_interval: 任务状态轮询间隔（秒），应明显小于租约时长
+            timeout: 单次认领中等待任务完成的最长时间，超时后放回队列
+            limiter: 自适应并发控制器；设置后按 (model, service_tier) 限制在途任务数，
+                concurrency 只是上限
+            hooks: 任务进入终态后在后台执行的钩子，不占用轮询线程
+        """
+        if poll_interval * 2 >= queue.lease_seconds:
+            raise ValueError("poll_interval must be less than half of the lease duration")
+        self.queue = queue
+        self.client = client
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.limiter = limiter
+        self.hooks = hooks
+        self.processed = 0
+        self._stats_lock = threading.Lock()
+
+    @contextmanager
+    def _heartbeat(self, job_id: int, token: int):
+        """在后台线程中定期续约（create_task 连同重试可能超过租约时长）"""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.queue.lease_seconds / 4):
+                try:
+                    self.queue.extend(job_id, token)
+                except LeaseLostError:
+                    return
+                except sqlite3.Error:
+                    continue
+
+        thread = threading.Thread(target=beat, name=f"lease-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _orphaned(self, job: sqlite3.Row, task_id: str):
+        """提交后租约丢失：补记 task_id，已有其他提交记录时取消本次提交的任务"""
+        if self.queue.adopt_task(job["id"], task_id):
+            return
+        try:
+            self.client.cancel_task(task_id)
+        except Exception as e:
+            print(f"Warning: could not cancel duplicate task {task_id} of job {job['id']}: {e}", file=sys.stderr)
+        # 仍持有租约时立即放回队列，由下一次认领等待已记录的任务
+        try:
+            self.queue.release(job["id"], job["lease_token"], f"Duplicate task {task_id} cancelled")
+        except LeaseLostError:
+            pass
+
+    def process(self, job: sqlite3.Row) -> Optional[TaskInfo]:
+        """
+        处理一个已认领的任务
+
+        Returns:
+            终态 TaskInfo；放回队列、失败或租约丢失时返回 None
+        """
+        job_id, token = job["id"], job["lease_token"]
+        lease_expires = job["lease_expires"]
+
+        def keep_alive(_task: TaskInfo):
+            # 剩余不足一半时续约，避免每次轮询都写数据库
+            nonlocal lease_expires
+            if lease_expires - time.time() < self.queue.lease_seconds / 2:
+                self.queue.extend(job_id, token)
+                lease_expires = time.time() + self.queue.lease_seconds
+
+        payload = json.loads(job["payload"])
+        task_id = job["task_id"]
+        try:
+            if not task_id:
+                # 提交前确认租约仍然有效，缩小重复提交的窗口
+                self.queue.extend(job_id, token)
+                # 提交（含超时重试）期间在后台续约
+                with self._heartbeat(job_id, token):
+                    if self.limiter:
+                        # 等待并发槽位期间继续续约
+                        task = self.limiter.create_task(
+                            self.client,
+                            payload,
+                            hold=True,
+                            on_wait=lambda: self.queue.extend(job_id, token),
+                            wait_interval=self.queue.lease_seconds / 4
+                        )
+                    else:
+                        task = self.client.create_task(payload)
+                task_id = task.id
+                try:
+                    self.queue.record_task(job_id, token, task_id)
+                except LeaseLostError:
+                    self._orphaned(job, task_id)
+                    return None
+            elif self.limiter:
+                self.limiter.track(task_id, payload.get("model", ""), payload.get("service_tier"))
+
+            task = self.client.wait_for_completion(
+                task_id,
+                poll_interval=self.poll_interval,
+                timeout=self.timeout,
+                callback=keep_alive
+            )
+            self.queue.complete(job_id, token, task)
+            if self.hooks:
+                self.hooks.dispatch(task)
+            return task
+
+        except LeaseLostError:
+            # 其他 worker 已接管，放弃本次处理
+            return None
+        except RETRYABLE_ERRORS as e:
+            self._retry(job, str(e))
+        except (InvalidRequestError, ValidationError) as e:
+            if is_quota_error(e):
+                self._retry(job, str(e))
+            else:
+                self._give_up(job, str(e))
+        except APIError as e:
+            if (e.status_code is not None and e.status_code >= 500) or is_quota_error(e):
+                self._retry(job, str(e))
+            else:
+                self._give_up(job, str(e))
+        except Exception as e:
+            self._retry(job, f"{type(e).__name__}: {e}")
+        finally:
+            if self.limiter and task_id:
+                self.limiter.task_done(task_id)
+        return None
+
+    def _retry(self, job: sqlite3.Row, error: str):
+        try:
+            self.queue.release(job["id"], job["lease_token"], error, min(5 * 2 ** (job["attempts"] - 1), 300))
+        except LeaseLostError:
+            pass
+
+    def _give_up(self, job: sqlite3.Row, error: str):
+        try:
+            self.queue.fail(job["id"], job["lease_token"], error)
+        except LeaseLostError:
+            pass
+
+    def _loop(self, until_empty: bool, idle_interval: float, stop: threading.Event):
+        while not stop.is_set():
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                if until_empty:
+                    metrics = self.queue.metrics()
+                    # 其他 worker 持有的租约可能因崩溃过期，全部结束后才退出
+                    if not metrics["pending"] and not metrics["leased"]:
+                        return
+                stop.wait(idle_interval)
+                continue
+            self.process(job)
+            with self._stats_lock:
+                self.processed += 1
+
+    def run(self, until_empty: bool = True, idle_interval: Optional[float] = None,
+            stop: Optional[threading.Event] = None):
+        """
+        处理队列
+
+        Args:
+            until_empty: 队列中没有待处理和租用中的任务时返回；为 False 时持续等待新任务
+            idle_interval: 没有可认领任务时的等待间隔，默认等于 poll_interval
+            stop: 设置后各线程在当前任务结束后退出
+        """
+        stop = stop or threading.Event()
+        idle = self.poll_interval if idle_interval is None else idle_interval
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._loop, until_empty, idle, stop) for _ in range(self.concurrency)]
+            for future in futures:
+                future.result()
+
+
+def load_jobs(path: str, defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    读取任务描述文件（JSON 数组或每行一个 JSON 对象）
+
+    每个对象的键与 create_task.py 参数一致（见 capabilities.validate_job），
+    可选的 "name" 用作任务名称。
+    """
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [{**defaults, **item} for item in items]
+
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    """格式化队列指标"""
+    lines = [
+        f"Pending: {metrics['pending']}  Leased: {metrics['leased']}  Done: {metrics['done']}  "
+        f"Failed: {metrics['failed']}  Expired leases: {metrics['expired_leases']}"
+    ]
+    for owner, count in sorted(metrics["workers"].items()):
+        lines.append(f"  {owner}: {count} leased")
+    for key, entry in metrics.get("concurrency", {}).items():
+        lines.append(
+            f"  {key}: limit {entry['limit']}  in flight {entry['in_flight']}  "
+            f"throttled {entry['throttles']}"
+        )
+    if metrics.get("hooks"):
+        lines.append(format_hook_stats(metrics["hooks"]))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Durable lease-based work queue shared by many worker processes and hosts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Enqueue jobs (JSON array or JSON lines, keys as in create_task.py)
+  python work_queue.py --db jobs.db add jobs.jsonl --model doubao-seedance-1-5-pro-251215
+
+  # Enqueue a single prompt
+  python work_queue.py --db jobs.db add --prompt "海边日落" --duration 5
+
+  # Run a worker with 8 concurrent jobs (start one per process/host)
+  python work_queue.py --db /shared/jobs.db work --concurrency 8
+
+  # Let the worker find the account's concurrency quota (up to 16), remembered across runs
+  python work_queue.py --db jobs.db work --concurrency 16 --adaptive --concurrency-state ~/.seedance/concurrency.json
+
+  # Publish and alert in the background without holding up polling
+  python work_queue.py --db jobs.db work --on-success "./publish.sh {task_id} {video_url}" --on-failure "./alert.sh {task_id}"
+
+  # Show progress, then requeue failed jobs
+  python work_queue.py --db jobs.db stats
+  python work_queue.py --db jobs.db requeue
+        """
+    )
+
+    parser.add_argument(
+        "--db",
+        type=str,
+        default="jobs.db",
+        help="Queue database path, on a shared filesystem for multiple hosts (default: jobs.db)"
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=60,
+        help="Lease duration in seconds; jobs of a dead worker are reclaimed after this (default: 60)"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="Maximum claims per job (default: 5)"
+    )
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        help="Override API Key"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output raw JSON"
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Enqueue jobs")
+    add_parser.add_argument("file", nargs="?", help="JSON/JSONL file of job objects")
+    add_parser.add_argument("--prompt", type=str, help="Enqueue a single text prompt")
+    add_parser.add_argument("--name", type=str, help="Job name (with --prompt)")
+    add_parser.add_argument(
+        "--model",
+        type=str,
+        default="doubao-seedance-1-5-pro-251215",
+        help="Default model (default: doubao-seedance-1-5-pro-251215)"
+    )
+    add_parser.add_argument("--resolution", type=str, help="Default resolution")
+    add_parser.add_argument("--ratio", type=str, help="Default aspect ratio")
+    add_parser.add_argument("--duration", type=int, help="Default duration in seconds")
+    add_parser.add_argument(
+        "--service-tier",
+        type=str,
+        choices=["default", "flex"],
+        help="Default service tier"
+    )
+
+    work_parser = subparsers.add_parser("work", help="Claim and run jobs")
+    work_parser.add_argument("--concurrency", type=int, default=4, help="Jobs in flight in this process (default: 4)")
+    work_parser.add_argument("--poll-interval", type=float, default=5, help="Seconds between polls (default: 5)")
+    work_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=600,
+        help="Seconds to wait for one task before releasing it back to the queue (default: 600)"
+    )
+    work_parser.add_argument("--worker-id", type=str, help="Worker identifier (default: host:pid)")
+    work_parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Tune in-flight tasks per model/service tier from rate-limit feedback (--concurrency is the ceiling)"
+    )
+    work_parser.add_argument(
+        "--concurrency-state",
+        type=str,
+        default=default_state_path(),
+        help="File to persist learned limits across runs (default: SEEDANCE_CONCURRENCY_STATE env variable)"
+    )
+    work_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep running and wait for new jobs instead of exiting when the queue is drained"
+    )
+    add_hook_arguments(work_parser)
+
+    list_parser = subparsers.add_parser("list", help="List jobs")
+    list_parser.add_argument(
+        "--state",
+        type=str,
+        choices=["pending", "leased", "done", "failed"],
+        help="Only jobs in this state"
+    )
+
+    requeue_parser = subparsers.add_parser("requeue", help="Put failed jobs back into the queue")
+    requeue_parser.add_argument(
+        "--state",
+        type=str,
+        action="append",
+        choices=["failed", "done"],
+        help="States to requeue (default: failed; repeatable)"
+    )
+
+    subparsers.add_parser("stats", help="Show queue metrics")
+
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args, "work_queue")
+
+    try:
+        queue = WorkQueue(args.db, lease_seconds=args.lease, max_attempts=args.max_attempts)
+
+        if args.command == "add":
+            if not args.file and not args.prompt:
+                parser.error("add requires a jobs file or --prompt")
+            defaults = {"model": args.model}
+            for name in ("resolution", "ratio", "duration", "service_tier"):
+                if getattr(args, name) is not None:
+                    defaults[name] = getattr(args, name)
+            if args.file:
+                jobs = load_jobs(args.file, defaults)
+            else:
+                jobs = [{**defaults, "prompt": args.prompt, "name": args.name}]
+
+            # 先编译全部任务，任一不合法时不入队；本地图片在此编码，worker 无需访问
+            from create_task import read_image_file
+            compiled = []
+            for index, job in enumerate(jobs):
+                job = dict(job)
+                name = job.pop("name", None)
+                try:
+                    compiled.append((name, compile_payload(job, read_image=read_image_file)))
+                except ValidationError as e:
+                    raise ValueError(f"job {name or index}: {e}")
+            ids = [queue.add(payload, name) for name, payload in compiled]
+            if args.json:
+                print(json.dumps({"added": ids}))
+            else:
+                print(f"Enqueued {len(ids)} jobs")
+
+        elif args.command == "work":
+            transport = TransportConfig(max_concurrency=args.concurrency)
+            hooks = hooks_from_args(args)
+            limiter = None
+            if args.adaptive:
+                limiter = AdaptiveConcurrency(
+                    state_path=args.concurrency_state,
+                    initial=min(4, args.concurrency),
+                    max_limit=args.concurrency
+                )
+            worker = Worker(
+                queue,
+                SeedanceClient(api_key=args.api_key, transport=transport, resilience=ResilienceConfig()),
+                worker_id=args.worker_id,
+                concurrency=args.concurrency,
+                poll_interval=args.poll_interval,
+                timeout=args.timeout,
+                limiter=limiter,
+                hooks=hooks
+            )
+            print(f"Worker {worker.worker_id} running {args.concurrency} jobs at a time", file=sys.stderr)
+            try:
+                worker.run(until_empty=not args.follow)
+            finally:
+                if limiter:
+                    limiter.save()
+                if hooks:
+                    hooks.close()
+            metrics = queue.metrics()
+            if limiter:
+                metrics["concurrency"] = limiter.metrics()
+            if hooks:
+                metrics["hooks"] = hooks.stats()
+            if args.json:
+                print(json.dumps({"processed": worker.processed, **metrics}, indent=2))
+            else:
+                print(f"Processed {worker.processed} jobs")
+                print(format_metrics(metrics))
+
+        elif args.command == "list":
+            jobs = queue.jobs(args.state)
+            if args.json:
+                print(json.dumps(jobs, indent=2, ensure_ascii=False))
+            else:
+                for job in jobs:
+                    detail = job["task_id"] or ""
+                    if job["state"] == "failed":
+                        detail = f"{detail} {job['last_error'] or job['status']}".strip()
+                    print(f"{job['id']:>6}  {job['state']:<8} {job['name'] or '-':<20} {detail}")
+
+        elif args.command == "requeue":
+            count = queue.requeue(args.state or ["failed"])
+            print(f"Requeued {count} jobs")
+
+        elif args.command == "stats":
+            metrics = queue.metrics()
+            if args.json:
+                print(json.dumps(metrics, indent=2))
+            else:
+                print(format_metrics(metrics))
+
+        queue.close()
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()